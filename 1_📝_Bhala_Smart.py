@@ -1,8 +1,14 @@
 import streamlit as st
-import ollama
-import json
-import os
-import re
+import time
+import uuid
+from tutor_ed.cache import ResultCache
+from tutor_ed.grader import DRAFT_MODEL, MARKING_MODE, BhalaSmartGrader, LLM_MODEL
+from tutor_ed.grammar_rules import format_findings
+from tutor_ed.models import registry
+from tutor_ed.revisions import Revision
+from tutor_ed.scheduler import scheduler
+from tutor_ed.sessions import SessionStore
+from tutor_ed.stats import StatsManager
 
 # --- 1. PAGE CONFIGURATION ---
 st.set_page_config(
@@ -13,32 +19,7 @@ st.set_page_config(
 )
 
 # --- 2. THE MEMORY (DATABASE) ---
-class StatsManager:
-    def __init__(self):
-        self.filename = "bhala_stats.json"
-        
-    def load_stats(self):
-        if not os.path.exists(self.filename):
-            return {"essays_marked": 0, "total_score": 0}
-        try:
-            with open(self.filename, "r") as f:
-                return json.load(f)
-        except:
-            return {"essays_marked": 0, "total_score": 0}
-
-    def update_stats(self, score):
-        data = self.load_stats()
-        data["essays_marked"] += 1
-        data["total_score"] += score
-        with open(self.filename, "w") as f:
-            json.dump(data, f)
-        return data
-
-    def get_average(self):
-        data = self.load_stats()
-        if data["essays_marked"] == 0:
-            return 0
-        return int(data["total_score"] / data["essays_marked"])
+# StatsManager lives in tutor_ed/stats.py (SQLite, safe across sessions)
 
 # --- 3. CUSTOM STYLING (FULL CSS RESTORED) ---
 st.markdown("""
@@ -168,46 +149,35 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- 4. THE BRAIN ---
-class BhalaSmartGrader:
-    def check_grammar(self, text):
-        prompt = """
-        TASK: Identify ONLY spelling, punctuation, and strict grammar errors in this South African English text.
-        CONTEXT: South African English (Grade 12).
-        - IGNORE THESE WORDS (Do not mark as errors): braai, ubuntu, bakkie, gogo, eish, mzansi, lekker, laaitie, bru, ja, nee.
-        - MARK THESE ERRORS: "Borrow me" (should be Lend me), "I'm coming" (when going), "Can able to".
-        OUTPUT: A bulleted list of errors. If none, say "✅ No mechanical errors found."
-        """
-        response = ollama.chat(model='llama3.2', messages=[{'role': 'system', 'content': prompt}, {'role': 'user', 'content': text}])
-        return response['message']['content']
+# BhalaSmartGrader lives in tutor_ed/grader.py (shared with the batch marker)
 
-    def check_feedback(self, text):
-        prompt = """
-        ROLE: South African English FAL Teacher.
-        TASK: Critique Tone, Structure, and Content based on CAPS Rubric.
-        GOLDEN RULE:
-        - "Bra" = Friend. "Robot" = Traffic Light. "Just now" = Later.
-        
-        REQUIRED OUTPUT FORMAT:
-        1. Give a bulleted critique of the essay structure and tone.
-        2. Be encouraging.
-        3. On the very last line, write the score exactly like this: SCORE: 80
-        """
-        response = ollama.chat(model='llama3.2', messages=[{'role': 'system', 'content': prompt}, {'role': 'user', 'content': text}])
-        return response['message']['content']
+# --- 5. INITIALIZATION & CALLBACKS ---
+@st.cache_resource
+def get_stats_db():
+    # One store per server process; it opens its own SQLite connection per call
+    return StatsManager()
 
-    def extract_score(self, feedback_text):
-        try:
-            match = re.search(r"SCORE:\s*(\d+)", feedback_text)
-            if match:
-                return int(match.group(1))
-            return 75
-        except:
-            return 75
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
 
-# --- 5. INITIALIZATION & CALLBACKS ---
-db = StatsManager()
+@st.cache_resource
+def get_session_store():
+    return SessionStore()
+
+db = get_stats_db()
+result_cache = get_result_cache()
+session_store = get_session_store()
+
+# Tiered marking drafts with the small model; a server without it marks with llama3.2 alone
+marking_mode = "full" if registry.problem(DRAFT_MODEL) else MARKING_MODE
+
+# Get llama3.2 (and the draft model) into memory while the student is still typing
+registry.prewarm(LLM_MODEL)
+if marking_mode != "full":
+    registry.prewarm(DRAFT_MODEL)
 stats = db.load_stats()
-avg_score = db.get_average()
+avg_score = stats["average"]
 
 if 'essay_input' not in st.session_state:
     st.session_state.essay_input = ""
@@ -215,10 +185,21 @@ if 'results_ready' not in st.session_state:
     st.session_state.results_ready = False
 if 'saved_grammar' not in st.session_state:
     st.session_state.saved_grammar = ""
+if 'saved_rules' not in st.session_state:
+    st.session_state.saved_rules = ""
 if 'saved_feedback' not in st.session_state:
     st.session_state.saved_feedback = ""
 if 'saved_score' not in st.session_state:
     st.session_state.saved_score = 0
+if 'revision' not in st.session_state:
+    # Per-paragraph results of the last marking: a resubmit only re-checks what was edited
+    st.session_state.revision = {}
+if 'session_id' not in st.session_state:
+    # Lets the shared LLM queue take turns between students. Kept in the URL as
+    # well, so whichever worker serves a reconnect finds the saved results.
+    st.session_state.session_id = st.query_params.get("sid") or uuid.uuid4().hex
+    st.query_params["sid"] = st.session_state.session_id
+    st.session_state.update(session_store.get(st.session_state.session_id))
 
 # --- CALLBACK FUNCTION (Fixes the Crash) ---
 def load_template_callback():
@@ -258,37 +239,99 @@ with col1:
     # Mark Button
     c1, c2, c3 = st.columns([1, 2, 1])
     with c2:
-        if st.button("🎯 **Submit for Marking**", use_container_width=True):
-            if not st.session_state.essay_input:
-                st.warning("Please write your essay first!")
-            else:
-                grader = BhalaSmartGrader()
-                
-                with st.spinner("Teacher is reviewing your work..."):
-                    # Process Grammar
-                    grammar_res = grader.check_grammar(st.session_state.essay_input)
-                    
-                    # Process Feedback
-                    feedback_res = grader.check_feedback(st.session_state.essay_input)
-                    score = grader.extract_score(feedback_res)
-                    
-                    # Save Data
-                    db.update_stats(score)
-                    
-                    st.session_state.saved_grammar = grammar_res
-                    st.session_state.saved_feedback = feedback_res
-                    st.session_state.saved_score = score
-                    st.session_state.results_ready = True
-                    
-                    st.balloons()
+        submitted = st.button("🎯 **Submit for Marking**", use_container_width=True)
+    
+    streamed_now = False
+    if submitted:
+        if not st.session_state.essay_input:
+            st.warning("Please write your essay first!")
+        elif registry.problem(LLM_MODEL):
+            st.error(registry.problem(LLM_MODEL))
+        else:
+            grader = BhalaSmartGrader(cache=result_cache, scheduler=scheduler, session_id=st.session_state.session_id,
+                                      mode=marking_mode)
+            revision = Revision(st.session_state.revision)
+            texts = {"grammar": "", "feedback": ""}
+            results = {}
+            failed = set()
+            started = time.monotonic()
+            streamed_now = True
+            
+            # Tabs fill in token by token while both checks run
+            st.markdown("### 📊 Assessment Results")
+            tab1, tab2 = st.tabs(["🔍 **Grammar Check**", "👩‍🏫 **Teacher's Feedback**"])
+            with tab1:
+                # Rule hits are ready before the model has even started
+                rules_res = format_findings(grader.check_rules(st.session_state.essay_input))
+                st.markdown("#### ⚡ Quick Check")
+                st.markdown(rules_res)
+                st.markdown("#### Grammar & Mechanics")
+                live = {"grammar": st.empty()}
+            with tab2:
+                st.markdown("#### Content & Structure")
+                live["feedback"] = st.empty()
+                live_score = st.empty()
+            
+            for name, delta, state in grader.mark_streaming(st.session_state.essay_input, revision=revision):
+                if state == "error":
+                    failed.add(name)
+                    texts[name] = delta
+                    live[name].error(delta)
+                    continue
+                if state == "queued":
+                    live[name].info(delta)
+                    continue
+                if state == "result":
+                    results[name] = delta
+                    continue
+                if state == "reset":
+                    texts[name] = ""   # the reviewed marking replaces the quick draft
+                texts[name] += delta
+                live[name].markdown(texts[name] + ("▌" if state in ("token", "reset") else ""))
+            
+            # The score is a field of the model's JSON answer; None if it never gave a usable one
+            score = results["feedback"].score if "feedback" in results else None
+            if revision.reused:
+                tab1.caption(f"♻️ Re-checked {revision.rechecked} edited paragraph(s); "
+                             f"{revision.reused} unchanged since your last marking.")
+            if revision.feedback_kept:
+                tab2.caption("♻️ Only small edits since your last marking, so the feedback and score are kept.")
+            if score is not None:
+                live_score.metric("Final Score", f"{score}/100")
+            elif "feedback" not in failed:
+                live_score.warning("No score this time. Please submit again.")
+            if score is not None and not revision.feedback_kept:
+                # Save Data (a failed feedback has no real score; a kept one was already counted)
+                db.record_essay(
+                    score,
+                    word_count=len(st.session_state.essay_input.split()),
+                    latency=round(time.monotonic() - started, 2)
+                )
+            
+            st.session_state.saved_rules = rules_res
+            st.session_state.saved_grammar = texts["grammar"]
+            st.session_state.saved_feedback = texts["feedback"]
+            st.session_state.saved_score = score
+            st.session_state.results_ready = True
+            st.session_state.revision = revision.state()
+            session_store.put(st.session_state.session_id, {
+                key: st.session_state[key]
+                for key in ("essay_input", "saved_rules", "saved_grammar", "saved_feedback", "saved_score", "results_ready",
+                            "revision")
+            })
+            
+            if score is not None:
+                st.balloons()
 
     # Results Section
-    if st.session_state.results_ready:
+    if st.session_state.results_ready and not streamed_now:
         st.markdown("### 📊 Assessment Results")
         tab1, tab2 = st.tabs(["🔍 **Grammar Check**", "👩‍🏫 **Teacher's Feedback**"])
         
         with tab1:
             st.markdown('<div class="grading-card">', unsafe_allow_html=True)
+            st.markdown("#### ⚡ Quick Check")
+            st.markdown(st.session_state.saved_rules)
             st.markdown("#### Grammar & Mechanics")
             st.markdown(st.session_state.saved_grammar)
             st.markdown('</div>', unsafe_allow_html=True)
@@ -298,7 +341,8 @@ with col1:
             st.markdown("#### Content & Structure")
             st.markdown(st.session_state.saved_feedback)
             st.divider()
-            st.metric("Final Score", f"{st.session_state.saved_score}/100")
+            if st.session_state.saved_score is not None:
+                st.metric("Final Score", f"{st.session_state.saved_score}/100")
             st.markdown('</div>', unsafe_allow_html=True)
 
 with col2:
@@ -314,6 +358,10 @@ with col2:
     
     st.progress(avg_score)
     
+    if any(stats["histogram"].values()):
+        st.caption("Score spread")
+        st.bar_chart({f"{b}+": n for b, n in stats["histogram"].items()})
+    
     st.markdown("---")
     st.markdown("### ⚡ Quick Actions")
     
@@ -1,9 +1,16 @@
 import streamlit as st
-import ollama
-import sympy
-from sympy import symbols, solve, diff, integrate, simplify, Eq
-# CRITICAL IMPORT: This allows Python to understand "2x" as "2*x"
-from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
+import uuid
+from tutor_ed.cache import ResultCache
+from tutor_ed.graphs import default_domain, key_points
+from tutor_ed.intent import read_query
+from tutor_ed.math_engine import NUMERIC_BUDGET, SympyMemo, solve_with_sympy
+from tutor_ed.metrics import metrics
+from tutor_ed.models import TUTOR_MODEL, registry
+from tutor_ed.problem_bank import ProblemBank
+from tutor_ed.scheduler import ServerBusy, scheduler
+from tutor_ed.solver_pool import SolverPool
+from tutor_ed.step_check import BADGES, INVALID
+from tutor_ed.tutor import ask_tutor_checked
 
 # --- PAGE CONFIG ---
 st.set_page_config(
@@ -81,109 +88,89 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- 1. THE PERFECT MATH ENGINE (SymPy) ---
-def solve_with_sympy(query):
-    x = symbols('x')
-    
-    # PRE-PROCESSING: Clean the input for Python
-    # 1. Replace powers: "x^2" -> "x**2"
-    # 2. Replace "=" with "-" so "2x = 6" becomes "2x - 6" (Expression equals 0)
-    clean_query = query.lower().replace("^", "**").replace("=", "-")
-    
-    # DEFINING RULES: Allow "2x" to be read as "2*x"
-    transformations = (standard_transformations + (implicit_multiplication_application,))
-    
-    try:
-        # A. CALCULUS: "Derive 2x^2"
-        if "derive" in clean_query or "differentiate" in clean_query:
-            # Remove keywords to isolate the math
-            clean_query = clean_query.replace("derive", "").replace("differentiate", "")
-            
-            # Parse and Calculate
-            expr = parse_expr(clean_query, transformations=transformations)
-            result = diff(expr, x)
-            return f"Calculated Derivative: {result}"
-            
-        elif "integrate" in clean_query:
-            clean_query = clean_query.replace("integrate", "")
-            expr = parse_expr(clean_query, transformations=transformations)
-            result = integrate(expr, x)
-            return f"Calculated Integral: {result} + C"
-            
-        # B. ALGEBRA: "Solve 2x^3 - ... = 0"
-        elif "solve" in clean_query:
-            clean_query = clean_query.replace("solve", "")
-            
-            # Parse using the "Human" rules
-            expr = parse_expr(clean_query, transformations=transformations)
-            
-            # Solve for x (Roots)
-            result = solve(expr, x)
-            return f"Exact Roots: {result}"
+# solve_with_sympy lives in tutor_ed/math_engine.py
+@st.cache_resource
+def get_math_memo():
+    # One memo per server process, shared by every student and every rerun
+    return SympyMemo()
 
-        # Default Fallback: Try to solve whatever is typed as an equation = 0
-        else:
-            expr = parse_expr(clean_query, transformations=transformations)
-            result = solve(expr, x)
-            return f"Exact Answer: {result}"
+@st.cache_resource
+def get_solver_pool():
+    # Worker processes start warming up on the first page load, not the first click
+    return SolverPool()
 
-    except Exception as e:
-        return f"ERROR: {str(e)}"
+@st.cache_resource
+def get_problem_bank():
+    # Pre-computed textbook exercises (python -m tutor_ed.problem_bank), loaded once per process
+    return ProblemBank()
 
-# --- 2. THE AI SOLVER (PHOTOMATH STYLE) ---
-def ask_tutor_stream(subject, topic, math_context=None):
-    
-    # LOGIC: If we have a verified answer, force "Marking Memo" mode
-    if math_context and "ERROR" not in math_context:
-        system_prompt = f"""
-        ROLE: Automated Math Solver (Photomath Style).
-        TASK: Show the vertical calculation steps to reach the answer: {math_context}
-        
-        STRICT VISUAL RULES:
-        1. NO paragraphs or conversational filler (e.g., "Let's assume...").
-        2. Output ONLY the math steps in vertical order.
-        3. Use LaTeX display mode ($$ ... $$) for EVERY line.
-        4. Format it exactly like a student's exam paper.
-        
-        EXAMPLE FORMAT:
-        $$ 2x^2 + 5x - 3 = 0 $$
-        $$ (2x - 1)(x + 3) = 0 $$
-        $$ 2x - 1 = 0 \\quad \\text{{or}} \\quad x + 3 = 0 $$
-        $$ x = \\frac{{1}}{{2}} \\quad \\text{{or}} \\quad x = -3 $$
-        """
-    else:
-        # Fallback for Physics/Theory (Still kept structured)
-        system_prompt = f"""
-        ROLE: Science Marking Memo Generator.
-        SUBJECT: {subject}
-        
-        INSTRUCTIONS:
-        1. Provide the solution in clear, vertical steps.
-        2. State the Formula first.
-        3. Show Substitution.
-        4. Show Final Answer.
-        5. Use LaTeX ($$) for all math.
-        """
-    
+solver_pool = get_solver_pool()
+problem_bank = get_problem_bank()
+registry.prewarm(TUTOR_MODEL)
+
+# --- 2. GRAPHS (NumPy) ---
+# "Sketch y = x^3 - 3x": tutor_ed/numeric.py evaluates the functions on a dense
+# grid in a solver worker, which keeps each compiled function for the next x range.
+# The page itself only needs pandas, and only once a graph is drawn.
+@st.cache_data(max_entries=256, show_spinner=False)
+def plot_view(intent, low, high):
+    # Dragging the slider back to a range already drawn costs nothing
+    view, seconds = solver_pool.run("plot", (intent, low, high), NUMERIC_BUDGET)
+    metrics.record("sympy", "plot", seconds)
+    return view
+
+@st.fragment
+def show_graph(intent):
+    # A fragment: moving the slider redraws the graph only, not the whole answer
+    import pandas as pd  # deferred: first paint doesn't pay for pandas/NumPy
+    low, high = default_domain(intent)
+    span = high - low
+    x_range = st.slider("x range", min_value=low - span, max_value=high + span, value=(low, high),
+                        step=span / 40)
+    if x_range[0] >= x_range[1]:
+        st.info("Pick an x range wider than a single point.")
+        return
     try:
-        # Check if model exists
-        try:
-            ollama.show('qwen2.5:1.5b')
-        except:
-            return "⚠️ Error: The model 'qwen2.5:1.5b' is not found. Please run `ollama pull qwen2.5:1.5b`."
-
-        stream = ollama.chat(
-            model='qwen2.5:1.5b', 
-            messages=[{'role': 'system', 'content': system_prompt}, 
-                      {'role': 'user', 'content': f"Solve this: {topic}"}],
-            stream=True
-        )
-        return stream
+        view = plot_view(intent, float(x_range[0]), float(x_range[1]))
     except Exception as e:
-        return f"Error: {str(e)}"
+        st.warning(f"Couldn't draw this graph: {e}")
+        return
+    st.line_chart(pd.DataFrame(view["curves"], index=pd.Index(view["x"], name="x")))
+    points = key_points(view)
+    if points:
+        st.dataframe(pd.DataFrame(points, columns=["point", "function", "x", "y"]), hide_index=True)
+    with st.expander("📋 Table of values"):
+        st.dataframe(pd.DataFrame(view["table"]), hide_index=True)
+
+# --- 3. THE AI SOLVER (PHOTOMATH STYLE) ---
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+result_cache = get_result_cache()
+
+# The prompts and the streaming call live in tutor_ed/tutor.py (also used by the load test)
+
+def render_steps(items, partial=""):
+    # Each $$ line carries its SymPy check: ✅ follows, ❌ wrong, ➖ couldn't be checked
+    lines = []
+    for item in items:
+        if item[0] == "step":
+            _, raw, verdict, reason = item
+            badge = f" {BADGES[verdict]}" if verdict else ""
+            note = f' <span style="color:#ff6b6b; font-size:0.8em;">{reason}</span>' if verdict == INVALID else ""
+            lines.append(f"{raw}{badge}{note}")
+        else:
+            lines.append(item[1])
+    return "\n".join(lines) + partial
+
+# --- 4. UI LAYOUT ---
+if 'session_id' not in st.session_state:
+    # Lets the shared LLM queue take turns between students
+    st.session_state.session_id = uuid.uuid4().hex
 
-# --- 3. UI LAYOUT ---
 st.markdown('<h1 style="text-align: center; color: #00D4FF;">🔬 Ukufunda-Sci</h1>', unsafe_allow_html=True)
-st.markdown('<p style="text-align: center; color: #aaa;">Engine: SymPy (Math) + Qwen (Steps)</p>', unsafe_allow_html=True)
+st.markdown('<p style="text-align: center; color: #aaa;">Engine: SymPy (Math, Science Formulas + Common Steps) + Qwen (Other Steps)</p>', unsafe_allow_html=True)
 
 # Input Container
 with st.container():
@@ -206,35 +193,72 @@ if st.button("🚀 **Show Calculation**", type="primary"):
     else:
         st.markdown("---")
         
-        # 1. RUN THE MATH ENGINE (SymPy)
-        math_result = solve_with_sympy(topic)
+        # 1. RUN THE MATH ENGINE (SymPy), unless the problem bank already has the answer
+        math_memo = get_math_memo()
+        banked = problem_bank.lookup(topic, subject)
+        math_result = banked["math_context"] if banked else solve_with_sympy(topic, memo=math_memo, pool=solver_pool)
         
         # Display Engine Status
         if math_result:
             if "ERROR" in math_result:
                 # If SymPy fails, show red error
                 st.markdown(f'<div class="error-box">⚠️ <b>Math Engine Warning:</b> {math_result}</div>', unsafe_allow_html=True)
+            elif math_result.startswith(("Approximate", "Numeric")):
+                # Exact solve ran out of time, or a graph read off numerically: clearly marked
+                st.markdown(f'<div class="success-box">≈ <b>Approximate Result:</b> {math_result}</div>', unsafe_allow_html=True)
             else:
                 # If SymPy succeeds, show green success box
                 st.markdown(f'<div class="success-box">✅ <b>Verified Result:</b> {math_result}</div>', unsafe_allow_html=True)
+            
+            if banked:
+                st.caption(f"📚 From the problem bank ({len(problem_bank)} pre-computed problems)")
+            else:
+                memo_stats = math_memo.metrics()
+                st.caption(f"Math engine memo: {memo_stats['hit_rate']:.0%} hit rate over {memo_stats['hits'] + memo_stats['misses']} problems")
+            
+            if math_result.startswith("Numeric"):
+                st.markdown(f"### 📈 **Graph**")
+                show_graph(read_query(topic))
         
         # 2. RUN THE AI SOLVER
         st.markdown(f"### 📝 **Step-by-Step Solution**")
         response_placeholder = st.empty()
-        full_text = ""
+        
+        def show_place_in_line(position, eta):
+            response_placeholder.info(f"⏳ You are #{position} in line (about {eta:.0f}s)...")
         
         try:
-            stream = ask_tutor_stream(subject, topic, math_context=math_result)
+            if banked and banked["steps"]:
+                events = iter(banked["steps"])
+            else:
+                events = ask_tutor_checked(
+                    subject, topic, math_context=math_result, run=solver_pool.run,
+                    session_id=st.session_state.session_id, on_wait=show_place_in_line,
+                    cache=result_cache, scheduler=scheduler
+                )
             
-            if isinstance(stream, str):
-                st.error(stream) 
+            if isinstance(events, str):
+                st.error(events) 
             else:
-                for chunk in stream:
-                    content = chunk['message']['content']
-                    full_text += content
-                    response_placeholder.markdown(f'<div class="result-card">{full_text}▌</div>', unsafe_allow_html=True)
+                items = []
+                repair_note = st.empty()
+                for event in events:
+                    partial = ""
+                    if event[0] in ("text", "step"):
+                        items.append(event)
+                    elif event[0] == "partial":
+                        partial = event[1]
+                    elif event[0] == "repair":
+                        # Only the steps from the wrong one onward are regenerated
+                        del items[event[1]:]
+                        repair_note.caption(f"🔁 A step didn't check out ({event[2]}), fixing it from there...")
+                    response_placeholder.markdown(f'<div class="result-card">{render_steps(items, partial)}▌</div>', unsafe_allow_html=True)
                 
-                response_placeholder.markdown(f'<div class="result-card">{full_text}</div>', unsafe_allow_html=True)
+                repair_note.empty()
+                response_placeholder.markdown(f'<div class="result-card">{render_steps(items)}</div>', unsafe_allow_html=True)
                 
+        except ServerBusy as e:
+            # Load shedding: a clear "come back soon", not a crash
+            response_placeholder.warning(str(e))
         except Exception as e:
             st.error(f"Something went wrong: {e}")
\ No newline at end of file
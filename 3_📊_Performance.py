@@ -0,0 +1,93 @@
+import time
+import streamlit as st
+from tutor_ed.metrics import metrics, summarize
+from tutor_ed.prompts import TEMPLATES
+from tutor_ed.scheduler import scheduler
+
+# --- PAGE CONFIG ---
+st.set_page_config(
+    page_title="Performance",
+    page_icon="📊",
+    layout="wide"
+)
+
+# --- 1. CONTROLS ---
+st.markdown('<h1 style="text-align: center; color: #00D4FF;">📊 Performance</h1>', unsafe_allow_html=True)
+st.markdown('<p style="text-align: center; color: #aaa;">Where the time goes: LLM calls, math engine stages, stats I/O</p>', unsafe_allow_html=True)
+
+c1, c2, c3 = st.columns([1, 2, 1])
+with c1:
+    window = st.selectbox("Window:", [5, 15, 60, 240], index=1, format_func=lambda m: f"Last {m} min")
+with c2:
+    source = st.radio("Source:", ["All workers (log)", "This process (live)"], horizontal=True)
+with c3:
+    live = st.toggle("Auto-refresh", value=True)
+
+# --- 2. THE DASHBOARD ---
+def bucketed(samples, seconds, value, by, q):
+    # One row per time bucket, one column per group: percentile q of `value`
+    import pandas as pd  # deferred: only this page needs it
+
+    frame = pd.DataFrame([s for s in samples if s[value] is not None and s["ok"]])
+    if frame.empty:
+        return frame
+    frame["time"] = pd.to_datetime(frame["ts"] // seconds * seconds, unit="s")
+    # Altair reads a colon in a field name as a type suffix ("qwen2.5:1.5b", "stats: read"), which breaks
+    # a one-series chart; the look-alike ratio sign reads the same
+    frame["group"] = frame[by].fillna("-").str.replace(":", "∶")
+    return frame.groupby(["time", "group"])[value].quantile(q).unstack("group")
+
+@st.fragment(run_every=5 if live else None)
+def dashboard():
+    since = time.time() - window * 60
+    samples = metrics.load(since) if source.startswith("All") else metrics.recent(since)
+
+    snapshot = scheduler.snapshot()
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("LLM slots busy", f"{snapshot['running']} / {snapshot['slots']}")
+    m2.metric("Waiting in queue", snapshot["waiting"])
+    m3.metric("Avg generation", f"{snapshot['avg_service']}s")
+    m4.metric("Requests in window", len(samples))
+
+    if not samples:
+        st.info("No requests in this window yet. Mark an essay or solve a problem, then come back.")
+        return
+
+    # Roughly 40 points across the window, never finer than 10s
+    bucket = max(10, window * 60 // 40)
+
+    st.markdown("### ⏱️ Rolling Percentiles")
+    st.dataframe(summarize(samples), hide_index=True, width="stretch")
+
+    llm = [s for s in samples if s["kind"] == "llm"]
+    if llm:
+        st.markdown("### 🤖 LLM Calls")
+        a, b = st.columns(2)
+        with a:
+            st.caption("p95 latency (s) per operation")
+            st.line_chart(bucketed(llm, bucket, "latency", "name", 0.95))
+        with b:
+            st.caption("Median tokens/s per model")
+            st.line_chart(bucketed(llm, bucket, "tokens_per_s", "model", 0.5))
+        a, b = st.columns(2)
+        with a:
+            st.caption("p95 queue wait (s) per operation")
+            st.line_chart(bucketed(llm, bucket, "queue_wait", "name", 0.95))
+        with b:
+            st.caption("p50 time to first token (s) per model")
+            st.line_chart(bucketed(llm, bucket, "ttft", "model", 0.5))
+        st.caption("p50 prompt tokens per template (as counted by Ollama)")
+        st.line_chart(bucketed(llm, bucket, "prompt_tokens", "name", 0.5))
+        with st.expander("🧾 Prompt templates"):
+            # The system turn is the same bytes on every call, so Ollama only evaluates it once per model load
+            st.dataframe([t.report() for t in TEMPLATES.values()], hide_index=True, width="stretch")
+
+    other = [s for s in samples if s["kind"] != "llm"]
+    if other:
+        st.markdown("### 🧮 Math Engine & Stats")
+        for sample in other:
+            sample["stage"] = f"{sample['kind']}: {sample['name']}"
+        st.caption("p95 latency (s) per stage")
+        st.line_chart(bucketed(other, bucket, "latency", "stage", 0.95))
+
+dashboard()
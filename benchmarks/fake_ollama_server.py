@@ -0,0 +1,181 @@
+"""
+Fake Ollama HTTP server for load tests.
+Speaks enough of the Ollama REST API (/api/chat, /api/generate, /api/tags,
+/api/ps, /api/show, /api/version) for the real `ollama` client, so the app
+code runs unchanged against it. Answers come from tutor_ed.fake_ollama with
+a configurable first-token latency, token rate and failure rate.
+
+    python benchmarks/fake_ollama_server.py --port 11435 --tokens-per-second 30 --failure-rate 0.02
+    OLLAMA_HOST=http://127.0.0.1:11435 streamlit run home.py
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from tutor_ed.fake_ollama import FakeOllamaClient  # noqa: E402
+from tutor_ed.models import full_name  # noqa: E402
+
+
+def now():
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Thousands of requests per run; keep the terminal for the report
+        pass
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, payload):
+        line = (json.dumps(payload) + "\n").encode()
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        client = self.server.client
+        if self.path == "/api/tags":
+            self._send_json(client.list())
+        elif self.path == "/api/ps":
+            self._send_json(client.ps())
+        elif self.path == "/api/version":
+            self._send_json({"version": "0.0.0-fake"})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        client = self.server.client
+        body = self._read_body()
+        if self.path == "/api/chat":
+            self._chat(body)
+        elif self.path == "/api/generate":
+            self._send_json({**client.generate(body.get("model", "")), "created_at": now()})
+        elif self.path == "/api/show":
+            try:
+                self._send_json(client.show(body.get("model", "")))
+            except ValueError as e:
+                self._send_json({"error": str(e)}, 404)
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def _chat(self, body):
+        client = self.server.client
+        model = body.get("model", "")
+        if full_name(model) not in {full_name(m) for m in client.models}:
+            self._send_json({"error": f"model '{model}' not found"}, 404)
+            return
+
+        chunks = client.chat(model=model, messages=body.get("messages", []), stream=True, format=body.get("format"))
+        try:
+            # Latency and injected failures happen before the first chunk,
+            # so a failure is still a proper HTTP error, like a real crash
+            first = next(chunks)
+        except ConnectionError as e:
+            self._send_json({"error": str(e)}, 500)
+            return
+
+        if body.get("stream", True) is False:
+            parts = [first] + list(chunks)
+            last = dict(parts[-1])
+            last["message"] = {"role": "assistant", "content": "".join(p["message"]["content"] for p in parts)}
+            self._send_json({**last, "created_at": now()})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for chunk in _prepend(first, chunks):
+                self._send_chunk({**chunk, "created_at": now()})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client hung up mid-answer (cancelled or timed out)
+            chunks.close()
+
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, client):
+        super().__init__(address, FakeOllamaHandler)
+        self.client = client
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_server(host="127.0.0.1", port=0, **options):
+    """
+    Starts a fake server on a background thread and returns it
+    (port=0 picks a free port; see server.url). Options go to FakeOllamaClient.
+    """
+    server = FakeOllamaServer((host, port), FakeOllamaClient(**options))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_server_arguments(parser):
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=30.0, help="0 = as fast as possible")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of chats answered with HTTP 500")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def server_options(args):
+    return {"latency": args.latency, "tokens_per_second": args.tokens_per_second,
+            "failure_rate": args.failure_rate, "seed": args.seed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server with canned answers.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = FakeOllamaServer((args.host, args.port), FakeOllamaClient(**server_options(args)))
+    print(f"Fake Ollama listening on {server.url} (OLLAMA_HOST={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
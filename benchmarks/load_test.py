@@ -0,0 +1,410 @@
+"""
+Load test: N simulated students using Bhala-Smart and Ukufunda-Sci at once.
+Each student marks essays from benchmarks/corpus/essays and asks problems
+from benchmarks/corpus/caps_math.txt, through the same grader, scheduler,
+math engine and tutor code the pages use. By default the LLM is the fake
+Ollama server (benchmarks/fake_ollama_server.py), so the numbers measure
+our code, not the model.
+
+Reported per operation: p50/p95/p99 latency, time to first token (TTFT),
+errors, and overall throughput.
+
+With --workers N the students are split across N processes that share one
+LLM queue, result cache and stats store through SQLite, the way serve.py
+runs N Streamlit workers; --scaling runs the same load at several worker
+counts and compares throughput.
+
+    python benchmarks/load_test.py --students 20 --rounds 3
+    python benchmarks/load_test.py --students 40 --scaling 1,2,4 --tokens-per-second 2000
+    python benchmarks/load_test.py --students 40 --tokens-per-second 15 --failure-rate 0.05 --json load.json
+    python benchmarks/load_test.py --host http://127.0.0.1:11434 --students 4   # a real Ollama server
+"""
+import argparse
+import collections
+import glob
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from fake_ollama_server import add_server_arguments, server_options, start_server  # noqa: E402
+from tutor_ed.metrics import percentile  # noqa: E402
+
+
+def load_essays(corpus=CORPUS):
+    return [open(path, encoding="utf-8").read() for path in sorted(glob.glob(os.path.join(corpus, "essays", "*.txt")))]
+
+
+def load_problems(corpus=CORPUS):
+    with open(os.path.join(corpus, "caps_math.txt"), encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = []
+
+    def add(self, operation, started, first_token=None, error=None):
+        finished = time.perf_counter()
+        record = {
+            "operation": operation,
+            "latency": finished - started,
+            "ttft": (first_token - started) if first_token is not None else None,
+            "error": error,
+        }
+        with self.lock:
+            self.records.append(record)
+
+    def summary(self, wall_time):
+        by_operation = collections.defaultdict(list)
+        for record in self.records:
+            by_operation[record["operation"]].append(record)
+
+        operations = {}
+        for operation, records in sorted(by_operation.items()):
+            ok = [r for r in records if r["error"] is None]
+            latencies = [r["latency"] for r in ok]
+            ttfts = [r["ttft"] for r in ok if r["ttft"] is not None]
+            errors = collections.Counter(r["error"][:80] for r in records if r["error"] is not None)
+            operations[operation] = {
+                "count": len(records),
+                "errors": len(records) - len(ok),
+                "error_kinds": dict(errors.most_common(5)),
+                "throughput_per_s": round(len(ok) / wall_time, 3) if wall_time else None,
+                **{f"latency_p{p}_ms": _ms(percentile(latencies, p)) for p in (50, 95, 99)},
+                **{f"ttft_p{p}_ms": _ms(percentile(ttfts, p)) for p in (50, 95, 99)},
+            }
+        completed = sum(1 for r in self.records if r["error"] is None)
+        return {
+            "wall_time_s": round(wall_time, 3),
+            "completed": completed,
+            "failed": len(self.records) - completed,
+            "throughput_per_s": round(completed / wall_time, 3) if wall_time else None,
+            "operations": operations,
+        }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class Student:
+    """One simulated learner: marks an essay, then asks a science problem, `rounds` times."""
+
+    def __init__(self, number, args, essays, problems, shared, recorder):
+        self.number = number
+        self.args = args
+        self.essays = essays
+        self.problems = problems
+        self.shared = shared
+        self.recorder = recorder
+        self.random = random.Random(args.seed + number if args.seed is not None else None)
+        self.session_id = f"student-{number}"
+
+    def think(self):
+        if self.args.think:
+            time.sleep(self.random.uniform(0, self.args.think))
+
+    def revise(self, essay):
+        # A resubmit: the student reworks one sentence of one paragraph
+        paragraphs = essay.split("\n\n")
+        n = self.random.randrange(len(paragraphs))
+        paragraphs[n] = paragraphs[n].rstrip() + f" I have revised this {self.random.randrange(10**6)} times."
+        return "\n\n".join(paragraphs)
+
+    def mark_essay(self, essay, revision=None, operation="mark_essay"):
+        from tutor_ed.grader import BhalaSmartGrader
+
+        grader = BhalaSmartGrader(timeout=self.args.timeout, cache=self.shared["cache"],
+                                  scheduler=self.shared["scheduler"], session_id=self.session_id,
+                                  client=self.shared["client"], mode=self.args.marking)
+        started = time.perf_counter()
+        first_token = None
+        error = None
+        feedback = None
+        grader.check_rules(essay)
+        for name, delta, state in grader.mark_streaming(essay, revision=revision):
+            if state == "token" and first_token is None:
+                first_token = time.perf_counter()
+            elif state == "error" and error is None:
+                error = f"{name}: {delta}"
+            elif name == "feedback" and state == "result":
+                feedback = delta
+        kept = revision is not None and revision.feedback_kept
+        if feedback is not None and feedback.score is not None and not kept and self.shared["stats"] is not None:
+            # As the page does: every newly marked essay is one write to the shared stats
+            self.shared["stats"].record_essay(feedback.score, word_count=len(essay.split()))
+        self.recorder.add(operation, started, first_token, error)
+
+    def ask_problem(self, problem):
+        from tutor_ed.math_engine import run_inline, solve_with_sympy
+        from tutor_ed.scheduler import ServerBusy
+        from tutor_ed.tutor import ask_tutor_stream, engine_steps
+
+        started = time.perf_counter()
+        banked = self.shared["bank"].lookup(problem, "Pure Mathematics") if self.shared["bank"] else None
+        if banked:
+            math_result = banked["math_context"]
+        else:
+            math_result = solve_with_sympy(problem, memo=self.shared["memo"], pool=self.shared["pool"])
+        # A problem SymPy can't read is a normal outcome (the tutor takes over), not a failure
+        self.recorder.add("sympy", started)
+
+        started = time.perf_counter()
+        first_token = None
+        error = None
+        if banked and banked["steps"]:
+            # Stored steps: shown at once, no model call
+            self.recorder.add("tutor_steps", started, time.perf_counter())
+            return
+        pool = self.shared["pool"]
+        if not banked and engine_steps(problem, math_result, run=pool.run if pool is not None else run_inline):
+            # As on the page: steps SymPy or the formula catalog can write need no model call
+            self.recorder.add("tutor_steps", started, time.perf_counter())
+            return
+        try:
+            stream = ask_tutor_stream("Pure Mathematics", problem, math_context=math_result,
+                                      session_id=self.session_id, cache=self.shared["cache"],
+                                      scheduler=self.shared["scheduler"], client=self.shared["client"])
+            if isinstance(stream, str):
+                error = stream
+            else:
+                for chunk in stream:
+                    if first_token is None and chunk['message']['content']:
+                        first_token = time.perf_counter()
+        except ServerBusy as e:
+            error = f"shed: {e}"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.recorder.add("tutor_steps", started, first_token, error)
+
+    def run(self):
+        from tutor_ed.revisions import Revision
+
+        state = {}
+        essay = self.essays[self.number % len(self.essays)]
+        for round_number in range(self.args.rounds):
+            self.think()
+            if self.args.revise:
+                # Same essay every round, a little edited each time, re-marked as the page does
+                essay = self.revise(essay) if round_number else essay
+                revision = Revision(state)
+                self.mark_essay(essay, revision, "revise_essay" if round_number else "mark_essay")
+                state = revision.state()
+            else:
+                self.mark_essay(self.essays[(self.number + round_number) % len(self.essays)])
+            self.think()
+            self.ask_problem(self.problems[(self.number * 7 + round_number) % len(self.problems)])
+
+
+def shared_state(args, host, workdir, processes=False):
+    """What the pages share: one set per process, backed by files in workdir."""
+    import ollama
+    from tutor_ed.cache import ResultCache
+    from tutor_ed.math_engine import SympyMemo
+    from tutor_ed.problem_bank import ProblemBank
+    from tutor_ed.scheduler import LLMScheduler, SharedScheduler
+    from tutor_ed.solver_pool import SolverPool
+    from tutor_ed.stats import StatsManager
+
+    if processes:
+        # One queue file for every worker process, as under serve.py
+        scheduler = SharedScheduler(os.path.join(workdir, "scheduler.sqlite3"), slots=args.slots,
+                                    max_queue=args.max_queue)
+    else:
+        scheduler = LLMScheduler(slots=args.slots, max_queue=args.max_queue)
+    return {
+        "client": ollama.Client(host=host, timeout=args.timeout),
+        "scheduler": scheduler,
+        # Off by default: the corpus repeats, and replayed answers would flatter the numbers
+        "cache": ResultCache(os.path.join(workdir, "cache.sqlite3")) if args.cache else None,
+        "stats": StatsManager(os.path.join(workdir, "stats.sqlite3"), legacy_json=os.path.join(workdir, "none.json")),
+        "memo": SympyMemo(),
+        "pool": None if args.no_pool else SolverPool(),
+        "bank": ProblemBank(args.bank) if args.bank else None,
+    }
+
+
+def run_students(args, numbers, shared, recorder):
+    essays, problems = load_essays(), load_problems()
+    threads = []
+    for i, number in enumerate(numbers):
+        student = Student(number, args, essays, problems, shared, recorder)
+        thread = threading.Thread(target=student.run, daemon=True)
+        thread.start()
+        threads.append(thread)
+        if args.ramp and i < len(numbers) - 1:
+            # Arrivals spread over the ramp, like a class logging in
+            time.sleep(args.ramp / len(numbers))
+    for thread in threads:
+        thread.join()
+
+
+def _worker_process(number, args, host, workdir, ready, results):
+    # One "Streamlit worker": every args.workers-th student, with its own memo and solver pool
+    os.environ["OLLAMA_HOST"] = host
+    shared = shared_state(args, host, workdir, processes=True)
+    recorder = Recorder()
+    try:
+        ready.wait()
+        run_students(args, range(number, args.students, args.workers), shared, recorder)
+    finally:
+        if shared["pool"] is not None:
+            shared["pool"].close()
+        results.put(recorder.records)
+
+
+def run_processes(args, host, workdir):
+    context = multiprocessing.get_context("spawn")
+    ready = context.Barrier(args.workers + 1)
+    results = context.Queue()
+    processes = [context.Process(target=_worker_process, args=(n, args, host, workdir, ready, results))
+                 for n in range(args.workers)]
+    for process in processes:
+        process.start()
+    # Start the clock once every worker has imported and warmed up
+    ready.wait(timeout=300)
+    started = time.perf_counter()
+    recorder = Recorder()
+    for _ in processes:
+        recorder.records.extend(results.get())
+    wall_time = time.perf_counter() - started
+    for process in processes:
+        process.join()
+    return recorder, wall_time
+
+
+def run_load_test(args):
+    server = None
+    host = args.host
+    if host is None:
+        server = start_server(**server_options(args))
+        host = server.url
+    # Read by every ollama.Client() made after this point (registry probes, prewarm)
+    os.environ["OLLAMA_HOST"] = host
+
+    from tutor_ed.models import BHALA_MODEL, TUTOR_MODEL, registry
+
+    problem = registry.problem(BHALA_MODEL) or registry.problem(TUTOR_MODEL)
+    if problem:
+        raise SystemExit(problem)
+
+    workdir = tempfile.TemporaryDirectory()
+    if args.workers:
+        recorder, wall_time = run_processes(args, host, workdir.name)
+    else:
+        shared = shared_state(args, host, workdir.name)
+        recorder = Recorder()
+        started = time.perf_counter()
+        run_students(args, range(args.students), shared, recorder)
+        wall_time = time.perf_counter() - started
+        if shared["pool"] is not None:
+            shared["pool"].close()
+
+    results = {
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "config": {
+            "students": args.students, "rounds": args.rounds, "slots": args.slots, "max_queue": args.max_queue,
+            "think_s": args.think, "ramp_s": args.ramp, "cache": args.cache, "solver_pool": not args.no_pool,
+            "bank": args.bank, "marking": args.marking,
+            "workers": args.workers, "cpus": os.cpu_count(),
+            "server": "real" if server is None else {**server_options(args)},
+            "essays": len(load_essays()), "problems": len(load_problems()),
+        },
+        **recorder.summary(wall_time),
+    }
+    if server is not None:
+        results["server_stats"] = {"chats": server.client.calls, "max_concurrent": server.client.max_active}
+        server.shutdown()
+    workdir.cleanup()
+    return results
+
+
+def print_report(results):
+    config = results["config"]
+    workers = f"{config['workers']} worker processes" if config["workers"] else "1 process"
+    print(f"{config['students']} students x {config['rounds']} rounds, {workers}, {config['slots']} LLM slots, "
+          f"{results['wall_time_s']:.1f}s wall time, {results['throughput_per_s']} ops/s "
+          f"({results['completed']} ok, {results['failed']} failed)")
+    print(f"{'operation':12} {'count':>6} {'errors':>6} {'p50':>9} {'p95':>9} {'p99':>9} "
+          f"{'ttft p50':>9} {'ttft p95':>9} {'ttft p99':>9}")
+    for operation, row in results["operations"].items():
+        cells = [row[f"latency_p{p}_ms"] for p in (50, 95, 99)] + [row[f"ttft_p{p}_ms"] for p in (50, 95, 99)]
+        print(f"{operation:12} {row['count']:>6} {row['errors']:>6} "
+              + " ".join(f"{c:>7.0f}ms" if c is not None else f"{'-':>9}" for c in cells))
+        for kind, count in row["error_kinds"].items():
+            print(f"    {count} x {kind}")
+    if "server_stats" in results:
+        stats = results["server_stats"]
+        print(f"fake server: {stats['chats']} chats, at most {stats['max_concurrent']} at once")
+
+
+def print_scaling(runs):
+    # Throughput at each worker count, relative to the first
+    base = runs[0]["throughput_per_s"] or None
+    print(f"{'workers':>7} {'ops/s':>8} {'speedup':>8} {'essay p95':>10} {'steps p95':>10} {'failed':>7}")
+    for run in runs:
+        operations = run["operations"]
+        p95 = [operations.get(op, {}).get("latency_p95_ms") for op in ("mark_essay", "tutor_steps")]
+        speedup = f"{run['throughput_per_s'] / base:.2f}x" if base else "-"
+        print(f"{run['config']['workers']:>7} {run['throughput_per_s']:>8} {speedup:>8} "
+              + " ".join(f"{c:>8.0f}ms" if c is not None else f"{'-':>10}" for c in p95)
+              + f" {run['failed']:>7}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate a class of students against the app's LLM and math stack.")
+    parser.add_argument("--students", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=2, help="essay + problem pairs per student")
+    parser.add_argument("--think", type=float, default=0.0, help="max random pause between actions (s)")
+    parser.add_argument("--ramp", type=float, default=0.0, help="spread student arrivals over this many seconds")
+    parser.add_argument("--slots", type=int, default=2, help="concurrent LLM generations (scheduler slots)")
+    parser.add_argument("--max-queue", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--cache", action="store_true", help="use a fresh result cache for the run")
+    parser.add_argument("--no-pool", action="store_true", help="run SymPy in-process instead of the solver pool")
+    parser.add_argument("--revise", action="store_true",
+                        help="each student resubmits one essay, lightly edited, every round (incremental re-marking)")
+    parser.add_argument("--marking", choices=("full", "tiered", "review"), default="full",
+                        help="who marks essays (tutor_ed.grader.MARKING_MODES)")
+    parser.add_argument("--bank", help="look problems up in this pre-computed bank first (python -m tutor_ed.problem_bank)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="split students across this many processes sharing state through SQLite (default: threads in one process)")
+    parser.add_argument("--scaling", help="comma-separated worker counts to compare, e.g. 1,2,4")
+    parser.add_argument("--host", help="a real Ollama server; default starts the fake one")
+    parser.add_argument("--json", help="also write the results to this file")
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.scaling:
+        runs = []
+        for workers in (int(n) for n in args.scaling.split(",")):
+            runs.append(run_load_test(argparse.Namespace(**{**vars(args), "workers": workers})))
+            print_report(runs[-1])
+            print()
+        print_scaling(runs)
+        results = {"scaling": runs}
+        failed = any(run["failed"] for run in runs)
+    else:
+        results = run_load_test(args)
+        print_report(results)
+        failed = results["failed"]
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed and not args.failure_rate else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Marking quality of the tiered modes against llama3.2 alone.
+Every essay in benchmarks/corpus/essays is marked with the "full" mode
+(the reference) and with each mode in --modes, through the same grader the
+page uses. Reported per mode: latency, model calls per essay, how often a
+draft was reviewed or redone, and how far the marking moved from the
+reference: score difference, CAPS level agreement, rubric error per
+criterion and the overlap of the grammar errors found (F1).
+
+By default the models are the fake Ollama server, which answers the same
+whatever the model: that checks the plumbing, but the quality numbers only
+mean something against real models.
+
+    python benchmarks/marking_quality.py --host http://127.0.0.1:11434
+    python benchmarks/marking_quality.py --host http://127.0.0.1:11434 --modes tiered --repeat 3 --json quality.json
+"""
+import argparse
+import collections
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from fake_ollama_server import add_server_arguments, server_options, start_server  # noqa: E402
+from load_test import load_essays  # noqa: E402
+from tutor_ed.metrics import percentile  # noqa: E402
+
+
+class CountingClient:
+    """An ollama client that counts chats per model."""
+
+    def __init__(self, client):
+        self.client = client
+        self.lock = threading.Lock()
+        self.calls = collections.Counter()
+
+    def chat(self, model='', **kwargs):
+        with self.lock:
+            self.calls[model] += 1
+        return self.client.chat(model=model, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def _words(text):
+    return re.sub(r"\W+", " ", text.lower()).strip()
+
+
+def overlap(found, reference):
+    # F1 of the error texts found against the reference's; two empty lists agree fully
+    found, reference = {_words(e.text) for e in found}, {_words(e.text) for e in reference}
+    if not found and not reference:
+        return 1.0
+    hits = len(found & reference)
+    return 2 * hits / (len(found) + len(reference))
+
+
+def mark(essay, mode, client, timeout):
+    from tutor_ed.grader import BhalaSmartGrader
+
+    grader = BhalaSmartGrader(timeout=timeout, client=client, mode=mode)
+    started = time.perf_counter()
+    results = {}
+    for name, delta, state in grader.mark_streaming(essay):
+        if state == "result":
+            results[name] = delta
+        elif state == "error":
+            raise RuntimeError(f"{name}: {delta}")
+    return {"latency": time.perf_counter() - started, "grammar": results["grammar"],
+            "feedback": results["feedback"], "tiers": grader.tiers}
+
+
+def compare(run, reference):
+    from tutor_ed.marks import RUBRIC, level
+
+    feedback, expected = run["feedback"], reference["feedback"]
+    row = {"grammar_f1": overlap(run["grammar"], reference["grammar"])}
+    if feedback.score is not None and expected.score is not None:
+        row["score_delta"] = feedback.score - expected.score
+        row["same_level"] = level(feedback.score) == level(expected.score)
+    row["rubric_error"] = {name: abs(feedback.rubric[name] - expected.rubric[name])
+                           for name in RUBRIC if name in feedback.rubric and name in expected.rubric}
+    return row
+
+
+def mean(values):
+    values = list(values)
+    return sum(values) / len(values) if values else None
+
+
+def run_benchmark(args):
+    server = None
+    host = args.host
+    if host is None:
+        server = start_server(**server_options(args))
+        host = server.url
+    os.environ["OLLAMA_HOST"] = host
+
+    import ollama
+    from tutor_ed.grader import DRAFT_MODEL, LLM_MODEL
+    from tutor_ed.marks import RUBRIC
+    from tutor_ed.models import registry
+
+    modes = ["full"] + [m for m in args.modes.split(",") if m and m != "full"]
+    problem = registry.problem(LLM_MODEL) or (len(modes) > 1 and registry.problem(DRAFT_MODEL))
+    if problem:
+        raise SystemExit(problem)
+
+    essays = load_essays()
+    report = {"timestamp": time.time(), "host": "fake" if server is not None else host,
+              "models": {"full": LLM_MODEL, "draft": DRAFT_MODEL}, "essays": len(essays),
+              "repeat": args.repeat, "modes": {}}
+    references = {}
+    for mode in modes:
+        client = CountingClient(ollama.Client(host=host, timeout=args.timeout))
+        latencies, rows, tiers = [], [], collections.Counter()
+        for _ in range(args.repeat):
+            for number, essay in enumerate(essays):
+                run = mark(essay, mode, client, args.timeout)
+                latencies.append(run["latency"])
+                tiers.update(run["tiers"])
+                # The first full marking of each essay is the reference for every mode; with --repeat,
+                # the full row's own differences are llama3.2's run-to-run spread
+                references.setdefault(number, run)
+                rows.append(compare(run, references[number]))
+        marked = len(latencies)
+        deltas = [abs(r["score_delta"]) for r in rows if "score_delta" in r]
+        report["modes"][mode] = {
+            "marked": marked,
+            "latency_p50_s": round(percentile(latencies, 50), 3),
+            "latency_mean_s": round(mean(latencies), 3),
+            "calls_per_essay": {model: round(count / marked, 2) for model, count in client.calls.items()},
+            "reviewed": round(tiers["feedback_reviewed"] / marked, 3),
+            "redone": round((tiers["feedback_escalated"] + tiers["grammar_escalated"]) / marked, 3),
+            "score_delta_mean": round(mean(deltas), 2) if deltas else None,
+            "score_delta_max": max(deltas) if deltas else None,
+            "same_level": round(mean(r["same_level"] for r in rows if "same_level" in r) or 0, 3),
+            "rubric_mae": {name: round(mean(r["rubric_error"][name] for r in rows
+                                            if name in r["rubric_error"]) or 0, 2) for name in RUBRIC},
+            "grammar_f1": round(mean(r["grammar_f1"] for r in rows), 3),
+        }
+    if server is not None:
+        server.shutdown()
+    return report
+
+
+def print_report(report):
+    print(f"{report['essays']} essays x {report['repeat']}, {report['models']['full']} (full) vs "
+          f"{report['models']['draft']} drafts, server: {report['host']}")
+    print(f"{'mode':8} {'p50':>7} {'mean':>7} {'reviewed':>9} {'redone':>7} {'|Δscore|':>9} {'max':>4} "
+          f"{'level':>6} {'rubric MAE':>18} {'grammar F1':>11}  calls/essay")
+    for mode, row in report["modes"].items():
+        mae = "/".join(f"{value:g}" for value in row["rubric_mae"].values())
+        calls = ", ".join(f"{model} {count}" for model, count in sorted(row["calls_per_essay"].items()))
+        delta = "-" if row["score_delta_mean"] is None else f"{row['score_delta_mean']:g}"
+        print(f"{mode:8} {row['latency_p50_s']:>6.2f}s {row['latency_mean_s']:>6.2f}s {row['reviewed']:>9.0%} "
+              f"{row['redone']:>7.0%} {delta:>9} {row['score_delta_max'] or 0:>4} {row['same_level']:>6.0%} "
+              f"{mae:>18} {row['grammar_f1']:>11.2f}  {calls}")
+    if report["host"] == "fake":
+        print("(fake server: every model gives the same answer, so only latency and call counts are informative)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare tiered marking with llama3.2-only marking.")
+    parser.add_argument("--modes", default="tiered,review", help="comma-separated modes to compare with full")
+    parser.add_argument("--repeat", type=int, default=1, help="mark the corpus this many times per mode")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--host", help="a real Ollama server; default starts the fake one")
+    parser.add_argument("--json", help="also write the results to this file")
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
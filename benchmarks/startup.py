@@ -0,0 +1,97 @@
+"""
+Page start-up benchmark.
+Runs every Streamlit page headless (streamlit.testing AppTest), each in a
+fresh Python process, and reports:
+
+  - first paint: the first script run in a cold process (all page imports included)
+  - rerun: later runs of the same page, i.e. what every click costs
+  - heavy modules the first paint pulled in (sympy, ollama, numpy, pandas)
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --reruns 20 --json startup.json
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("sympy", "ollama", "numpy", "pandas")
+
+
+def pages():
+    return [os.path.join(ROOT, "home.py")] + sorted(glob.glob(os.path.join(ROOT, "[0-9]_*.py")))
+
+
+def measure_page(page, reruns):
+    # Runs inside the child process
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    streamlit_import = time.perf_counter() - started
+
+    app = AppTest.from_file(page, default_timeout=120)
+    started = time.perf_counter()
+    app.run()
+    first_paint = time.perf_counter() - started
+    heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    rerun_times = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app.run()
+        rerun_times.append(time.perf_counter() - started)
+
+    return {
+        "page": os.path.basename(page),
+        "streamlit_import_ms": round(streamlit_import * 1000, 1),
+        "first_paint_ms": round(first_paint * 1000, 1),
+        "rerun_median_ms": round(statistics.median(rerun_times) * 1000, 1) if rerun_times else None,
+        "rerun_max_ms": round(max(rerun_times) * 1000, 1) if rerun_times else None,
+        "heavy_modules": heavy,
+        "errors": [str(e.value) for e in app.exception],
+    }
+
+
+def run_child(page, reruns, workdir):
+    # Fresh interpreter per page, so "first paint" really is a cold start
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", page, "--reruns", str(reruns)],
+        cwd=workdir, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure first-paint and rerun latency of each page.")
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure_page(args.child, args.reruns)))
+        return 0
+
+    # Pages write their SQLite files to the CWD; keep those out of the repo
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [run_child(page, args.reruns, workdir) for page in pages()]
+
+    print(f"{'page':32} {'first paint':>12} {'rerun p50':>10} {'rerun max':>10}  heavy imports")
+    for r in results:
+        print(f"{r['page']:32} {r['first_paint_ms']:>10.1f}ms {r['rerun_median_ms']:>8.1f}ms {r['rerun_max_ms']:>8.1f}ms  "
+              f"{', '.join(r['heavy_modules']) or '-'}")
+        for error in r["errors"]:
+            print(f"    ERROR: {error}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"timestamp": time.time(), "python": sys.version.split()[0], "pages": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
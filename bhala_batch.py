@@ -0,0 +1,222 @@
+"""
+Bhala-Smart batch marker.
+Marks a whole class of essays without the Streamlit page.
+
+    python bhala_batch.py essays/            # folder of .txt/.md files
+    python bhala_batch.py class_12a.zip      # zip of .txt/.md files
+    python bhala_batch.py class_12a.csv --text-column essay --id-column name
+
+Results are appended to a JSONL (or CSV) file as each essay finishes, so
+re-running the same command after a crash skips everything already marked.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tutor_ed.cache import ResultCache
+from tutor_ed.grader import DRAFT_MODEL, MARKING_MODE, MARKING_MODES, BhalaSmartGrader, LLM_MODEL, LLM_TIMEOUT
+from tutor_ed.models import registry
+from tutor_ed.stats import StatsManager
+
+ESSAY_EXTENSIONS = (".txt", ".md")
+OUTPUT_FIELDS = ["id", "score", "rubric", "rules", "grammar", "feedback", "word_count", "latency", "error"]
+
+
+# --- 1. READING ESSAYS ---
+def read_directory(path):
+    for root, _, files in os.walk(path):
+        for name in sorted(files):
+            if name.lower().endswith(ESSAY_EXTENSIONS):
+                full = os.path.join(root, name)
+                with open(full, "r", encoding="utf-8", errors="replace") as f:
+                    yield os.path.relpath(full, path), f.read()
+
+
+def read_zip(path):
+    with zipfile.ZipFile(path) as archive:
+        for name in sorted(archive.namelist()):
+            if name.lower().endswith(ESSAY_EXTENSIONS) and not name.startswith("__MACOSX/"):
+                yield name, archive.read(name).decode("utf-8", errors="replace")
+
+
+def read_csv(path, text_column, id_column):
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for row_number, row in enumerate(csv.DictReader(f), start=1):
+            essay_id = row.get(id_column) if id_column else None
+            yield essay_id or f"row-{row_number}", row.get(text_column, "")
+
+
+def read_essays(path, text_column="essay", id_column=None):
+    if os.path.isdir(path):
+        return read_directory(path)
+    if path.lower().endswith(".zip"):
+        return read_zip(path)
+    if path.lower().endswith(".csv"):
+        return read_csv(path, text_column, id_column)
+    raise ValueError(f"Don't know how to read {path} (expected a folder, .zip or .csv)")
+
+
+# --- 2. WRITING RESULTS ---
+def already_marked(output_path):
+    # Only successful rows count, so failed essays are retried on the next run
+    if not os.path.exists(output_path):
+        return set()
+    done = set()
+    with open(output_path, "r", encoding="utf-8", newline="") as f:
+        if output_path.lower().endswith(".csv"):
+            # A row cut short by a crash has no error column at all (None), unlike a clean "" one
+            rows = [row for row in csv.DictReader(f) if row.get("error") is not None]
+        else:
+            rows = []
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    # Half-written line from a crash: that essay is marked again, the rest still count
+                    continue
+        for row in rows:
+            if isinstance(row, dict) and row.get("id") and not row.get("error"):
+                done.add(row["id"])
+    return done
+
+
+def _row_end(path, is_csv):
+    # What ends a half-written last row, "" when the file ends cleanly.
+    # Quotes in a CSV come in pairs, so an odd count means a row stopped inside a quoted field.
+    with open(path, "rb") as f:
+        data = f.read()
+    quote = '"' if is_csv and data.count(b'"') % 2 else ""
+    if not quote and data.endswith(b"\n"):
+        return ""
+    return quote + ("\r\n" if is_csv else "\n")
+
+
+class ResultWriter:
+    def __init__(self, output_path):
+        self.lock = threading.Lock()
+        self.is_csv = output_path.lower().endswith(".csv")
+        is_new = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+        self.file = open(output_path, "a", encoding="utf-8", newline="")
+        if not is_new:
+            # A crash may have left half a row: end it, so the next row starts on a line of its own
+            self.file.write(_row_end(output_path, self.is_csv))
+        if self.is_csv:
+            self.csv = csv.DictWriter(self.file, fieldnames=OUTPUT_FIELDS)
+            if is_new:
+                self.csv.writeheader()
+
+    def write(self, result):
+        with self.lock:
+            if self.is_csv:
+                row = dict(result, grammar="\n".join(f"{g['text']} ({g['category']}): {g['suggestion']}"
+                                                     for g in result["grammar"]),
+                           rules="\n".join(f"{r['text']} ({r['category']}): {r['suggestion']}" for r in result["rules"]),
+                           rubric="; ".join(f"{name} {mark}" for name, mark in result["rubric"].items()),
+                           feedback="\n".join(result["feedback"]))
+                self.csv.writerow(row)
+            else:
+                self.file.write(json.dumps(result, ensure_ascii=False) + "\n")
+            # Flushed per essay so a crash loses at most the one being written
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+# --- 3. MARKING ---
+def mark_one(grader, essay_id, text):
+    started = time.monotonic()
+    result = {"id": essay_id, "score": None, "rubric": {}, "rules": [], "grammar": [], "feedback": [],
+              "word_count": len(text.split()), "latency": None, "error": ""}
+    try:
+        result["rules"] = [finding._asdict() for finding in grader.check_rules(text)]
+        result["grammar"] = [error._asdict() for error in grader.grammar_issues(text)]
+        feedback = grader.feedback(text)
+        result["feedback"], result["rubric"], result["score"] = list(feedback.comments), feedback.rubric, feedback.score
+        if feedback.score is None:
+            # Not a real mark: left out of the class average and retried on the next run
+            result["error"] = "The model gave no usable score."
+    except Exception as e:
+        result["error"] = str(e)
+    result["latency"] = round(time.monotonic() - started, 2)
+    return result
+
+
+def mark_batch(essays, output_path, workers=2, grader=None, stats=None, log=print):
+    grader = grader or BhalaSmartGrader()
+    done = already_marked(output_path)
+    todo = [(essay_id, text) for essay_id, text in essays if essay_id not in done and text.strip()]
+    if done:
+        log(f"Skipping {len(done)} essays already in {output_path}")
+    log(f"Marking {len(todo)} essays with {workers} at a time...")
+
+    writer = ResultWriter(output_path)
+    marked = []
+    try:
+        # workers is also the number of requests the Ollama server sees at once
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(mark_one, grader, essay_id, text) for essay_id, text in todo]
+            for number, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                writer.write(result)
+                if result["error"]:
+                    log(f"[{number}/{len(todo)}] {result['id']}: ERROR {result['error']}")
+                else:
+                    marked.append((result["score"], result["word_count"], result["latency"]))
+                    log(f"[{number}/{len(todo)}] {result['id']}: {result['score']}/100")
+    finally:
+        writer.close()
+        # One stats write for the whole batch (also on Ctrl-C)
+        if stats is not None and marked:
+            stats.record_many(marked)
+    return marked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mark a folder, zip or CSV of essays with Bhala-Smart.")
+    parser.add_argument("source", help="folder of .txt/.md essays, a .zip of them, or a .csv")
+    parser.add_argument("-o", "--output", help="results file, .jsonl (default) or .csv")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="essays marked at the same time (default: 2)")
+    parser.add_argument("--text-column", default="essay", help="CSV column holding the essay (default: essay)")
+    parser.add_argument("--id-column", help="CSV column used as the essay id (default: row number)")
+    parser.add_argument("--timeout", type=int, default=LLM_TIMEOUT, help="seconds per model call")
+    parser.add_argument("--no-cache", action="store_true", help="always ask the model, even for repeats")
+    parser.add_argument("--no-stats", action="store_true", help="don't add this batch to the Bhala-Smart stats")
+    parser.add_argument("--marking", choices=MARKING_MODES, default=MARKING_MODE,
+                        help=f"full: {LLM_MODEL} marks everything; tiered/review: {DRAFT_MODEL} drafts, "
+                             f"{LLM_MODEL} checks (default: {MARKING_MODE})")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.splitext(args.source.rstrip("/\\"))[0] + ".marked.jsonl"
+    grader = BhalaSmartGrader(timeout=args.timeout, cache=None if args.no_cache else ResultCache(), mode=args.marking)
+    stats = None if args.no_stats else StatsManager()
+
+    print("==========================================")
+    print("      BHALA-SMART: BATCH MARKING          ")
+    print("==========================================\n")
+    problem = registry.problem(LLM_MODEL) or (args.marking != "full" and registry.problem(DRAFT_MODEL))
+    if problem:
+        print(problem)
+        return 1
+    try:
+        essays = read_essays(args.source, args.text_column, args.id_column)
+        marked = mark_batch(essays, output, workers=max(1, args.workers), grader=grader, stats=stats)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        return 1
+    if marked:
+        avg = sum(score for score, _, _ in marked) / len(marked)
+        print(f"\nDone. {len(marked)} essays marked, class average {avg:.0f}%. Results in {output}")
+    else:
+        print(f"\nNothing new to mark. Results in {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import streamlit as st
+from tutor_ed.models import BHALA_MODEL, TUTOR_MODEL, registry
 
 st.set_page_config(
     page_title="Tutor Ed",
@@ -6,6 +7,24 @@ st.set_page_config(
     layout="wide"
 )
 
+# Live model states from the shared registry (one cached probe, no solver imports)
+STATUS_STYLES = {
+    "READY": ("status-online", "● READY"),
+    "STANDBY": ("status-online", "● READY • MODEL LOADS ON FIRST USE"),
+    "LOADING": ("status-soon", "● WARMING UP"),
+    "MISSING": ("status-soon", "● MODEL NOT INSTALLED"),
+    "OFFLINE": ("status-locked", "● OLLAMA OFFLINE"),
+}
+health = registry.health()
+
+# Students usually go straight from here to an app: start loading both models now
+for model, state in health.items():
+    if state == "STANDBY":
+        registry.prewarm(model)
+
+bhala_class, bhala_label = STATUS_STYLES[health[BHALA_MODEL]]
+sci_class, sci_label = STATUS_STYLES[health[TUTOR_MODEL]]
+
 # --- HERO SECTION ---
 st.markdown("""
 <style>
@@ -62,23 +81,23 @@ st.markdown("""
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    st.markdown("""
+    st.markdown(f"""
     <div class="card">
         <div class="icon">📝</div>
         <h3>Bhala-Smart</h3>
         <p>English FAL Essay Assistant</p>
-        <p class="status-online">● READY</p>
+        <p class="{bhala_class}">{bhala_label}</p>
     </div>
     """, unsafe_allow_html=True)
     st.success("👈 Click **Bhala_Smart** in the sidebar to start.")
 
 with col2:
-    st.markdown("""
+    st.markdown(f"""
     <div class="card">
         <div class="icon">🔬</div>
         <h3>Ukufunda-Sci</h3>
         <p>Science Concept Translator</p>
-        <p class="status-soon">● COMING SOON</p>
+        <p class="{sci_class}">{sci_label}</p>
     </div>
     """, unsafe_allow_html=True)
     if st.button("Build Science App Next"):
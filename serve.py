@@ -0,0 +1,231 @@
+"""
+Tutor Ed multi-worker launcher.
+Runs several Streamlit processes behind one local reverse proxy, for a
+whole school on one machine.
+
+    python serve.py                      # 4 workers on http://0.0.0.0:8501
+    python serve.py --workers 8 --port 80 --data-dir /srv/tutor_ed
+
+Every worker uses the same SQLite files in --data-dir: the essay stats,
+the result cache, the metrics log, the saved page sessions and the LLM
+queue. The queue keeps the slot limit for the one Ollama server global,
+whatever the number of workers. The proxy balances connections (HTTP and
+the page websockets) to the least busy healthy worker; no session
+affinity is needed because page state is saved to the shared store and
+the session id is kept in the page URL.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Shared state: environment variable -> file name inside --data-dir
+STATE_FILES = {
+    "TUTOR_ED_STATS": "bhala_stats.sqlite3",
+    "TUTOR_ED_CACHE": "tutor_ed_cache.sqlite3",
+    "TUTOR_ED_METRICS": "tutor_ed_metrics.sqlite3",
+    "TUTOR_ED_SESSIONS": "tutor_ed_sessions.sqlite3",
+    "TUTOR_ED_SCHEDULER": "tutor_ed_scheduler.sqlite3",
+}
+HEALTH_INTERVAL = 2.0
+START_TIMEOUT = 90
+COPY_CHUNK = 64 * 1024
+
+
+# --- 1. THE WORKERS ---
+def worker_env(data_dir, slots=None, solvers=None):
+    env = dict(os.environ)
+    for name, filename in STATE_FILES.items():
+        # An explicit setting (e.g. TUTOR_ED_METRICS=off) wins over the data dir
+        env.setdefault(name, os.path.join(os.path.abspath(data_dir), filename))
+    if slots is not None:
+        env["TUTOR_ED_LLM_SLOTS"] = str(slots)
+    if solvers is not None:
+        env["TUTOR_ED_SOLVERS"] = str(solvers)
+    return env
+
+
+class Worker:
+    """One Streamlit process on a loopback port."""
+
+    def __init__(self, port, env, app="home.py"):
+        self.port = port
+        self.env = env
+        self.app = app
+        self.process = None
+        self.healthy = False
+        self.connections = 0
+        self.restarts = 0
+
+    def start(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", self.app,
+             "--server.port", str(self.port), "--server.address", "127.0.0.1",
+             "--server.headless", "true", "--browser.gatherUsageStats", "false"],
+            cwd=ROOT, env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.healthy = False
+
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def check(self):
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=2) as response:
+                self.healthy = response.status == 200
+        except OSError:
+            self.healthy = False
+        return self.healthy
+
+    def stop(self):
+        if self.running():
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def start_workers(count, first_port, env, log=print):
+    workers = [Worker(first_port + i, env) for i in range(count)]
+    for worker in workers:
+        worker.start()
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline and not all(w.check() for w in workers):
+        if any(not w.running() for w in workers):
+            break
+        time.sleep(0.5)
+    for worker in workers:
+        log(f"worker :{worker.port} {'ready' if worker.healthy else 'NOT READY'}")
+    return workers
+
+
+# --- 2. THE PROXY ---
+class Balancer:
+    """
+    TCP reverse proxy: each browser connection is piped to the healthy
+    worker with the fewest open connections. Working below HTTP means the
+    Streamlit websocket needs no special handling.
+    """
+
+    def __init__(self, workers, log=print):
+        self.workers = workers
+        self.log = log
+        self.turn = itertools.count()
+
+    def pick(self, exclude=()):
+        candidates = [w for w in self.workers if w.healthy and w not in exclude]
+        if not candidates:
+            return None
+        # Ties rotate, so an idle pool still spreads new connections
+        offset = next(self.turn)
+        rotated = candidates[offset % len(candidates):] + candidates[:offset % len(candidates)]
+        return min(rotated, key=lambda w: w.connections)
+
+    async def handle(self, client_reader, client_writer):
+        tried = []
+        while True:
+            worker = self.pick(exclude=tried)
+            if worker is None:
+                client_writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await client_writer.drain()
+                client_writer.close()
+                return
+            try:
+                upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", worker.port)
+                break
+            except OSError:
+                worker.healthy = False
+                tried.append(worker)
+
+        worker.connections += 1
+        try:
+            await asyncio.gather(_pipe(client_reader, upstream_writer), _pipe(upstream_reader, client_writer))
+        finally:
+            worker.connections -= 1
+
+    async def supervise(self, shutting_down):
+        # Health checks, and a restart for any worker that exited
+        loop = asyncio.get_running_loop()
+        while not shutting_down.is_set():
+            for worker in self.workers:
+                if not worker.running():
+                    worker.restarts += 1
+                    self.log(f"worker :{worker.port} exited, restarting ({worker.restarts})")
+                    worker.start()
+                await loop.run_in_executor(None, worker.check)
+            try:
+                await asyncio.wait_for(shutting_down.wait(), HEALTH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def _pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(COPY_CHUNK)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, OSError):
+        pass
+    finally:
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+
+async def serve(workers, host, port, log=print, ready=None):
+    balancer = Balancer(workers, log)
+    shutting_down = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, shutting_down.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows / not the main thread: Ctrl+C still raises KeyboardInterrupt
+
+    server = await asyncio.start_server(balancer.handle, host, port)
+    log(f"Tutor Ed on http://{host}:{port} ({len(workers)} workers)")
+    if ready is not None:
+        ready.set()
+    supervisor = asyncio.create_task(balancer.supervise(shutting_down))
+    async with server:
+        await shutting_down.wait()
+    await supervisor
+
+
+# --- 3. COMMAND LINE ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run several Tutor Ed workers behind one local proxy.")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Streamlit processes (default: 4)")
+    parser.add_argument("--host", default="0.0.0.0", help="address the proxy listens on")
+    parser.add_argument("--port", type=int, default=8501, help="port the proxy listens on (default: 8501)")
+    parser.add_argument("--worker-port", type=int, default=8600, help="first loopback port for the workers")
+    parser.add_argument("--data-dir", default=ROOT, help="where the shared SQLite files live (default: the repo)")
+    parser.add_argument("--slots", type=int, help="generations the Ollama server runs at once, across all workers")
+    parser.add_argument("--solvers", type=int, default=1, help="SymPy processes per worker (default: 1)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    env = worker_env(args.data_dir, slots=args.slots, solvers=args.solvers)
+    workers = start_workers(args.workers, args.worker_port, env)
+    try:
+        asyncio.run(serve(workers, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Metrics stay in memory: recording them must not leave a tutor_ed_metrics.sqlite3 wherever pytest runs
+os.environ["TUTOR_ED_METRICS"] = "off"
+
+# Tests import tutor_ed straight from the checkout, the way the pages do
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
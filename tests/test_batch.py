@@ -0,0 +1,45 @@
+import csv
+import json
+
+from bhala_batch import already_marked, mark_batch
+from tutor_ed.fake_ollama import FakeOllamaClient
+from tutor_ed.grader import BhalaSmartGrader
+
+ESSAYS = [(name, f"Essay {name}: my friend asked me to borrow me his bicycle.") for name in "abcd"]
+
+
+def mark(essays, output):
+    grader = BhalaSmartGrader(client=FakeOllamaClient(latency=0, tokens_per_second=0))
+    return mark_batch(essays, str(output), workers=1, grader=grader, log=lambda message: None)
+
+
+def row(essay_id, error=""):
+    return json.dumps({"id": essay_id, "score": 72, "error": error})
+
+
+def test_resume_after_a_truncated_jsonl(tmp_path):
+    output = tmp_path / "marked.jsonl"
+    # A bad line in the middle (an older crash) and half a row at the end (this one)
+    output.write_text("\n".join([row("a"), '{"id": "x", "sc', row("b"), row("c", "timed out"), '{"id": "d", "sco']),
+                      encoding="utf-8")
+    assert already_marked(str(output)) == {"a", "b"}
+    assert len(mark(ESSAYS, output)) == 2                     # c failed before, d was cut short
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert lines[-3] == '{"id": "d", "sco'                    # the torn row stays on a line of its own
+    assert [json.loads(line)["id"] for line in lines[-2:]] in (["c", "d"], ["d", "c"])
+    assert already_marked(str(output)) == set("abcd")
+    assert mark(ESSAYS, output) == []                         # nothing marked twice
+
+
+def test_resume_after_a_truncated_csv(tmp_path):
+    output = tmp_path / "marked.csv"
+    mark(ESSAYS[:2], output)
+    text = output.read_text(encoding="utf-8")
+    # Cut inside the quoted grammar field of a third row
+    output.write_text(text + 'c,72,"{}","[]","borrow me (word choice', encoding="utf-8")
+    assert already_marked(str(output)) == {"a", "b"}
+    assert len(mark(ESSAYS, output)) == 2
+    with open(output, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["id"] for r in rows if r["error"] is not None and not r["error"]][:2] == ["a", "b"]
+    assert already_marked(str(output)) == set("abcd")
@@ -0,0 +1,51 @@
+from tutor_ed.cache import ResultCache, make_key, replay_stream
+
+
+def test_key_ignores_line_endings_and_spacing():
+    assert make_key("llama3.2", "mark", "My  essay.\r\n\r\nEnd ") == make_key("llama3.2", "mark", "My essay.\n\nEnd")
+
+
+def test_key_changes_with_model_prompt_and_options():
+    key = make_key("llama3.2", "mark", "essay")
+    assert key != make_key("qwen2.5:1.5b", "mark", "essay")
+    assert key != make_key("llama3.2", "mark again", "essay")
+    assert key != make_key("llama3.2", "mark", "essay", {"temperature": 0})
+
+
+def test_get_put_and_stats(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"))
+    assert cache.get("k") is None
+    cache.put("k", "answer")
+    assert cache.get("k") == "answer"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["hit_rate"]) == (1, 1, 1, 0.5)
+
+
+def test_shared_file_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    ResultCache(path).put("k", "answer")
+    assert ResultCache(path).get("k") == "answer"
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+
+
+def test_byte_budget(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), max_bytes=10)
+    cache.put("a", "x" * 6)
+    cache.put("b", "y" * 6)
+    assert cache.stats()["entries"] == 1
+    assert cache.get("b") == "y" * 6
+
+
+def test_replay_stream_rebuilds_the_text():
+    chunks = list(replay_stream("Good work, keep going."))
+    assert "".join(c["message"]["content"] for c in chunks) == "Good work, keep going."
+    assert chunks[-1]["done"] and not any(c["done"] for c in chunks[:-1])
@@ -0,0 +1,59 @@
+from tutor_ed.chunking import (LONG_ESSAY_WORDS, MAX_CHUNK_WORDS, is_long, split_essay, split_paragraphs,
+                               structure_summary, word_count)
+
+
+def sentences(n, word="word"):
+    return " ".join(f"This {word} sentence has exactly seven words." for _ in range(n))
+
+
+TEMPLATE = (f"Title: My holiday\n\nIntroduction: {sentences(8)}\n\nBody Paragraph 1: {sentences(10, 'body')}\n\n"
+            f"Body Paragraph 2: {sentences(10, 'second')}\n\nConclusion: {sentences(3, 'last')}")
+
+
+def covers(chunks, text):
+    # Every chunk's offsets point at its own text in the essay
+    return all(text[c.start:c.end] == c.text for c in chunks)
+
+
+def test_long_threshold():
+    assert not is_long("word " * (LONG_ESSAY_WORDS - 1))
+    assert is_long("word " * LONG_ESSAY_WORDS)
+
+
+def test_sections_split_at_template_headings():
+    chunks = split_essay(TEMPLATE)
+    assert covers(chunks, TEMPLATE)
+    # The one-line title and the short conclusion ride along with their neighbours
+    assert [c.label for c in chunks] == ["Title + Introduction", "Body Paragraph 1", "Body Paragraph 2 + Conclusion"]
+    assert "Body Paragraph 1:" not in chunks[1].text and chunks[1].text.strip().startswith("This body")
+
+
+def test_paragraph_groups_without_headings():
+    text = "\n\n".join(sentences(6, str(n)) for n in range(6))
+    chunks = split_essay(text)
+    assert covers(chunks, text)
+    assert all(word_count(c.text) <= MAX_CHUNK_WORDS for c in chunks)
+    assert [c.label for c in chunks] == ["Paragraphs 1-4", "Paragraphs 5-6"]
+
+
+def test_oversized_paragraph_is_cut_at_sentence_ends():
+    text = sentences(60)
+    chunks = split_essay(text)
+    # 203 words, 203 words and a short tail that joins the piece before it
+    assert covers(chunks, text) and len(chunks) == 2
+    assert all(c.text.rstrip().endswith(".") for c in chunks)
+    assert chunks[0].label == "Paragraph 1 (part 1)"
+
+
+def test_paragraphs_for_re_marking():
+    text = "Title: Heritage Day\n\n" + "\n\n".join(sentences(3, str(n)) for n in range(3))
+    chunks = split_paragraphs(text)
+    assert covers(chunks, text)
+    assert [c.label for c in chunks] == ["Paragraph 1 + Paragraph 2", "Paragraph 3", "Paragraph 4"]
+
+
+def test_structure_summary():
+    summary = structure_summary(TEMPLATE)
+    assert summary.startswith(f"ESSAY OUTLINE ({word_count(TEMPLATE)} words, 5 sections)")
+    assert "[Conclusion] (21 words)" in summary
+    assert "  Opens: This last sentence has exactly seven words." in summary
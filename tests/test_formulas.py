@@ -0,0 +1,24 @@
+from tutor_ed.formulas import FORMULA_RESULT, asked_unit, solve_formula
+
+ACCELERATES = "A car accelerates from rest at 3 m/s^2 for 5 s. Calculate its final velocity"
+
+
+def test_answer_in_si_by_default():
+    answer = solve_formula(ACCELERATES + ".")
+    assert answer.result == f"{FORMULA_RESULT}: final velocity = 15 m·s⁻¹ (equation of motion)"
+
+
+def test_answer_in_the_unit_asked_for():
+    answer = solve_formula(ACCELERATES + " in km/h.")
+    assert answer.result == f"{FORMULA_RESULT}: final velocity = 54 km·h⁻¹ (equation of motion)"
+    assert answer.lines[-1].endswith(r"= 54\ \text{km}\cdot \text{h}^{-1}")
+
+
+def test_prefixed_unit_asked_for():
+    answer = solve_formula("A 2 kg ball moves at 3 m/s. Calculate its kinetic energy in kJ.")
+    assert "kinetic energy = 0.009 kJ" in answer.result
+
+
+def test_in_before_a_given_is_not_the_asked_unit():
+    assert asked_unit("How far does a car at 20 m/s travel in 5 s?", "d") is None
+    assert asked_unit("What is its average speed in km/h?", "vav").text() == "km·h⁻¹"
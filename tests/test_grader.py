@@ -0,0 +1,138 @@
+import json
+
+import pytest
+
+from tutor_ed.fake_ollama import GRAMMAR_JSON, FakeOllamaClient
+from tutor_ed.grader import DRAFT_MODEL, LLM_MODEL, BhalaSmartGrader, _drain
+from tutor_ed.marks import RUBRIC
+from tutor_ed.revisions import Revision
+
+SENTENCES = "My friend asked me to borrow me his bicycle for the weekend trip. "
+ESSAY = "\n\n".join([
+    SENTENCES * 2,
+    "We rode to the river and we swam until the sun went down behind the hills. " * 2,
+    "At home my mother cooked pap and wors, and we ate outside under the stars. " * 2,
+    "The next morning we cleaned the bicycle and took it back to his house. " * 2,
+    "His father thanked us and gave us some peaches from the tree in their yard. " * 2,
+    "It was the best weekend of the holidays and I will remember it for a long time. " * 2,
+])
+
+
+def client():
+    return FakeOllamaClient(latency=0, tokens_per_second=0)
+
+
+def mark(grader, text, revision=None):
+    results = {}
+    for name, delta, state in grader.mark_streaming(text, revision=revision):
+        assert state != "error", delta
+        if state == "result":
+            results[name] = delta
+    return results
+
+
+def test_first_submission_costs_what_plain_marking_does():
+    plain, revised = client(), client()
+    mark(BhalaSmartGrader(client=plain), ESSAY)
+    results = mark(BhalaSmartGrader(client=revised), ESSAY, Revision())
+    assert plain.calls == revised.calls == 2        # one grammar call for a short essay, one feedback call
+    assert [e.text for e in results["grammar"]] == ["borrow me"]
+
+
+def test_resubmission_asks_only_about_the_edited_paragraph():
+    fake = client()
+    revision = Revision()
+    first = mark(BhalaSmartGrader(client=fake), ESSAY, revision)
+    revision = Revision(revision.state())
+    edited = ESSAY.replace("went down", "set")
+    second = mark(BhalaSmartGrader(client=fake), edited, revision)
+    assert fake.calls == 3                           # + the edited paragraph; the feedback is kept
+    assert (revision.rechecked, revision.reused, revision.feedback_kept) == (1, 5, True)
+    assert first["grammar"][0].start == second["grammar"][0].start == ESSAY.index("borrow me")
+
+
+# --- tiered marking ---
+class TwoModels(FakeOllamaClient):
+    """Answers per model; notes which model each chat went to."""
+
+    def __init__(self, **replies):
+        super().__init__(latency=0, tokens_per_second=0)
+        self.replies = replies
+        self.asked = []
+
+    def chat(self, model='', messages=None, stream=False, **kwargs):
+        self.asked.append(model)
+        self.reply = self.replies["draft" if model == DRAFT_MODEL else "full"]
+        return super().chat(model, messages, stream, **kwargs)
+
+
+def feedback(score, rubric=(75, 75, 75)):
+    def reply(messages, format=None):
+        if "errors" in format["properties"]:
+            return json.dumps(GRAMMAR_JSON)
+        return json.dumps({"comments": [f"Marked {score}."], "rubric": dict(zip(RUBRIC, rubric)), "score": score})
+    return reply
+
+
+def unreadable(messages, format=None):
+    return "Sorry, I can't mark this."
+
+
+def test_clean_draft_stands():
+    client = TwoModels(draft=feedback(75), full=feedback(60))
+    grader = BhalaSmartGrader(client=client, mode="tiered")
+    assert grader.feedback(ESSAY).score == 75
+    assert client.asked == [DRAFT_MODEL] and LLM_MODEL not in client.asked
+    assert grader.tiers == {"feedback_draft": 1}
+
+
+def test_borderline_draft_goes_to_review():
+    client = TwoModels(draft=feedback(69, (69, 69, 69)), full=feedback(64, (64, 64, 64)))
+    grader = BhalaSmartGrader(client=client, mode="tiered")
+    text, result = _drain(grader.stream_feedback(ESSAY))
+    assert result.score == 64
+    assert client.asked == [DRAFT_MODEL, LLM_MODEL]
+    assert grader.tiers == {"feedback_reviewed": 1}
+    assert "Marked 69." not in text and "Marked 64." in text   # the reviewed marking replaces the draft
+
+
+def test_draft_contradicting_its_rubric_goes_to_review():
+    client = TwoModels(draft=feedback(90, (50, 50, 50)), full=feedback(52, (50, 55, 60)))
+    grader = BhalaSmartGrader(client=client, mode="tiered")
+    assert grader.feedback(ESSAY).score == 52
+    assert grader.tiers == {"feedback_reviewed": 1}
+
+
+def test_unreadable_draft_is_redone():
+    client = TwoModels(draft=unreadable, full=feedback(60))
+    grader = BhalaSmartGrader(client=client, mode="tiered")
+    assert grader.feedback(ESSAY).score == 60
+    assert client.asked == [DRAFT_MODEL, DRAFT_MODEL, LLM_MODEL]   # the draft, its repair, then afresh
+    assert grader.tiers == {"feedback_escalated": 1}
+
+
+def test_unreadable_grammar_draft_is_redone():
+    client = TwoModels(draft=unreadable, full=feedback(60))
+    grader = BhalaSmartGrader(client=client, mode="tiered")
+    assert [e.text for e in grader.grammar_issues(ESSAY)] == ["borrow me"]
+    assert client.asked[-1] == LLM_MODEL
+    assert grader.tiers == {"grammar_escalated": 1}
+
+
+def test_review_mode_always_reviews():
+    client = TwoModels(draft=feedback(75), full=feedback(77))
+    grader = BhalaSmartGrader(client=client, mode="review")
+    assert grader.feedback(ESSAY).score == 77
+    assert client.asked == [DRAFT_MODEL, LLM_MODEL]
+    assert grader.tiers == {"feedback_reviewed": 1}
+
+
+def test_full_mode_never_drafts():
+    client = TwoModels(draft=unreadable, full=feedback(75))
+    assert BhalaSmartGrader(client=client).feedback(ESSAY).score == 75
+    assert client.asked == [LLM_MODEL]
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError, match="Unknown marking mode"):
+        BhalaSmartGrader(client=client(), mode="cheap")
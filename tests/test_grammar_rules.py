@@ -0,0 +1,73 @@
+import pytest
+
+from tutor_ed.grammar_rules import RuleEngine, default_engine, independent_clause
+
+
+def categories(text):
+    return [(f.text, f.category) for f in default_engine.check(text)]
+
+
+@pytest.mark.parametrize("text", [
+    "However, it is cold today.",
+    "In conclusion, I have learnt a lot.",
+    "Furthermore, they were late.",
+    "Therefore, we can win.",
+    "Consequently, there was no power.",
+    "Yesterday, I walked home.",
+    "When I was young, I played soccer.",
+    "My brother, who is tall, is a teacher.",
+])
+def test_connectors_are_not_comma_splices(text):
+    assert all(category != "comma splice" for _, category in categories(text))
+
+
+@pytest.mark.parametrize("text", [
+    "It was late, we were tired.",
+    "I love my gogo, she is kind.",
+    "The taxi stopped, we climbed out.",
+    "There was no light, we used candles.",
+])
+def test_comma_splices(text):
+    assert "comma splice" in [category for _, category in categories(text)]
+
+
+def test_independent_clause():
+    assert independent_clause("the taxi stopped")
+    assert not independent_clause("However")
+    assert not independent_clause("In my opinion")
+    assert not independent_clause("Because it rained")
+
+
+def test_lowercase_i():
+    assert categories("Yesterday i went home.") == [("i", "capitalisation")]
+    assert categories("Two reasons, i.e. cost and time: (i) cost and (ii) time.") == []
+    assert categories("i'm tired.") == [("i", "capitalisation")]
+
+
+def test_cos_only_as_because():
+    assert categories("I was late cos it rained.") == [("cos", "textspeak")]
+    assert categories("We compared cos and sin, and cos x is periodic.") == []
+
+
+def test_bra_only_as_a_friend():
+    assert ("bra", "slang") in categories("Hey bra, how are you?")
+    assert ("bra", "slang") in categories("Thanks, bra!")
+    assert categories("She bought a new bra.") == []
+
+
+def test_lexicon_offsets():
+    text = "You can borrow me your pen, it is lekker."
+    findings = {f.text.lower(): f for f in default_engine.check(text)}
+    assert text[findings["borrow me"].start:findings["borrow me"].end] == "borrow me"
+    assert findings["lekker"].category == "slang"
+
+
+def test_hyphen_or_space():
+    assert ("sharp sharp", "slang") in categories("It was sharp sharp.")
+
+
+def test_extra_lexicon(tmp_path):
+    path = tmp_path / "extra.json"
+    path.write_text('[["shame", "slang", "Informal", "Leave it out"]]', encoding="utf-8")
+    engine = RuleEngine.from_file(str(path))
+    assert [f.text for f in engine.check("Ag shame.")] == ["shame"]
@@ -0,0 +1,70 @@
+import pytest
+
+from tutor_ed.intent import read_query
+
+
+@pytest.mark.parametrize("query, expression, order", [
+    ("dy/dx of x^3", "x**3", 1),
+    ("d^2y/dx^2 of x^5", "x**5", 2),
+    ("d/dx x^2", "x**2", 1),
+    ("Find the second derivative of x^4", "x**4", 2),
+    ("Differentiate twice x^3", "x**3", 2),
+])
+def test_derivatives(query, expression, order):
+    intent = read_query(query)
+    assert intent.operation == "derive"
+    assert intent.expressions == (expression,)
+    assert intent.order == order
+
+
+def test_leibniz_names_the_variable():
+    assert read_query("dy/dx of x^3").variables == ("x",)
+    assert read_query("d/dt of t^3").variables == ("t",)
+
+
+@pytest.mark.parametrize("query, operation, expression", [
+    ("Find the derivative of f(x) = 3x^2 + 2x", "derive", "3x**2 + 2x"),
+    ("dy/dx of y = x^3", "derive", "x**3"),
+    ("Integrate y = 3x^2 from 0 to 2", "integrate", "3x**2"),
+    ("Factorise f(x) = x^2 - 4", "factor", "x**2 - 4"),
+    ("Expand y = (x+1)^2", "expand", "(x+1)**2"),
+    ("Simplify f(x) = (x^2 - 1)/(x - 1)", "simplify", "(x**2 - 1)/(x - 1)"),
+    ("Calculate y = 2*3 + 1", "evaluate", "2*3 + 1"),
+])
+def test_function_name_is_not_an_equation(query, operation, expression):
+    intent = read_query(query)
+    assert intent.operation == operation
+    assert intent.expressions == (expression,)
+    assert not intent.equation
+
+
+def test_solve_keeps_its_equation():
+    intent = read_query("Solve y = 2x + 1 for x")
+    assert intent.operation == "solve"
+    assert intent.expressions == ("(y) - (2x + 1)",)
+    assert intent.variables == ("x",)
+
+
+def test_simultaneous_equations():
+    intent = read_query("Solve x + y = 3 and x - y = 1")
+    assert intent.expressions == ("(x + y) - (3)", "(x - y) - (1)")
+
+
+def test_definite_integral_bounds():
+    intent = read_query("Integrate 3x^2 dx from 0 to 2")
+    assert intent.bounds == ("0", "2")
+    assert intent.variables == ("x",)
+
+
+@pytest.mark.parametrize("query, expressions", [
+    ("Sketch y = x^3 - 3x", ("x**3 - 3x",)),
+    ("Where does y = x^2 meet y = 2x + 3?", ("x**2", "2x + 3")),
+])
+def test_graphs(query, expressions):
+    intent = read_query(query)
+    assert intent.operation == "graph"
+    assert intent.expressions == expressions
+
+
+def test_science_sentence_is_not_a_graph():
+    assert read_query("A car meets a truck after 5 s, what is its speed?").operation != "graph"
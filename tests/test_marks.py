@@ -0,0 +1,122 @@
+import json
+
+from tutor_ed.chunking import Chunk
+from tutor_ed.fake_ollama import FakeOllamaClient
+from tutor_ed.grader import BhalaSmartGrader
+from tutor_ed.marks import (FEEDBACK_SCHEMA, Feedback, FeedbackView, PartialJson, _mark, loads, locate, merge,
+                            read_errors, read_feedback, repair_schema)
+
+
+def item(text, category="grammar"):
+    return {"text": text, "category": category, "suggestion": ""}
+
+
+def test_same_mistake_twice_is_two_errors():
+    text = "He go to school. Then he go home."
+    errors = locate(Chunk("", 10, 10 + len(text), text), [item("he go"), item("he go")], set())
+    assert [e.start for e in errors] == [10, 10 + text.index("he go")]
+
+
+def test_same_error_reported_twice_is_one():
+    text = "He go to school."
+    errors = locate(Chunk("", 0, len(text), text), [item("He go"), item("he go")], set())
+    assert len(errors) == 1 and errors[0].start == 0
+
+
+def test_words_not_in_the_text():
+    errors = locate(Chunk("", 0, 5, "Hello"), [item("goodbye")], set())
+    assert (errors[0].start, errors[0].end) == (-1, -1)
+
+
+# --- reading replies ---
+def test_mark_clamps_to_a_mark_out_of_100():
+    assert [_mark(v) for v in (72, 72.4, "72", "71.6", 0, 100)] == [72, 72, 72, 72, 0, 100]
+    assert [_mark(v) for v in (-1, 101, "seventy", None, [72])] == [None] * 5
+
+
+def test_read_feedback_names_the_missing_fields():
+    fields, missing = read_feedback({"comments": "Good work.", "rubric": {"content": 70, "language": "high"}})
+    assert fields == {"comments": ["Good work."], "rubric": {"content": 70}}
+    assert missing == ["rubric.language", "rubric.structure", "score"]
+
+
+def test_score_from_a_full_rubric():
+    fields, missing = read_feedback({"comments": ["Ok."], "rubric": {"content": 70, "language": 80, "structure": 50}})
+    assert fields["score"] == 71 and missing == []
+
+
+def test_loads_finds_the_object_in_prose():
+    assert loads('Here it is:\n```json\n{"score": 72}\n```') == {"score": 72}
+    assert loads('{"score": 7') is None and loads("[1, 2]") is None
+
+
+def test_repair_schema_asks_only_for_what_is_missing():
+    schema = repair_schema(FEEDBACK_SCHEMA, ["rubric.language", "score"])
+    assert schema["required"] == ["rubric", "score"]
+    assert list(schema["properties"]["rubric"]["properties"]) == ["language"]
+    assert schema["properties"]["rubric"]["required"] == ["language"]
+
+
+def test_merge_keeps_what_was_already_good():
+    fields = {"comments": ["Good."], "rubric": {"content": 70, "structure": 60}}
+    merged = merge(fields, {"rubric": {"language": 65}, "score": 66})
+    assert merged == {"comments": ["Good."], "rubric": {"content": 70, "structure": 60, "language": 65}, "score": 66}
+    assert merge({"score": 1}, None) == {"score": 1}
+
+
+def test_read_errors_drops_unusable_items():
+    items, missing = read_errors({"errors": [{"text": " he go ", "category": "Agreement"}, {"text": ""}, "x",
+                                             {"text": "teh", "category": "typo", "suggestion": "the"}]})
+    assert missing == []
+    assert items == [{"text": "he go", "category": "agreement", "suggestion": ""},
+                     {"text": "teh", "category": "grammar", "suggestion": "the"}]
+    assert read_errors({"mistakes": []}) == ([], ["errors"])
+
+
+# --- while it streams ---
+def stream(text, size=3):
+    reading, seen = PartialJson(), []
+    for i in range(0, len(text), size):
+        data = reading.feed(text[i:i + size])
+        if data is not None:
+            seen.append(data)
+    return seen
+
+
+def test_partial_json_hands_back_finished_values():
+    reply = json.dumps({"comments": ["Clear, well argued.", "Check tenses."], "rubric": {"content": 70},
+                        "score": 72})
+    seen = stream(reply)
+    assert {"comments": ["Clear, well argued."]} in seen   # the comma inside the string didn't cut it
+    assert seen[-1] == json.loads(reply)
+
+
+def test_partial_json_truncated_reply():
+    seen = stream('{"comments": ["One.", "Two."], "rubric": {"content": 70, "langu')
+    assert seen[-1] == {"comments": ["One.", "Two."], "rubric": {"content": 70}}
+    assert PartialJson().feed('{"comments": ["Half a comm') is None
+
+
+def test_feedback_view_only_appends():
+    view = FeedbackView()
+    assert view.update({"comments": ["One."]}) == "- One.\n"
+    assert view.update({"comments": ["One."], "rubric": {"content": 70}}) == ""    # rubric not finished yet
+    shown = view.update({"comments": ["One.", "Two."], "rubric": {"content": 70, "language": 60, "structure": 50}})
+    assert shown.startswith("- Two.\n") and "**Content** 70/100" in shown
+    assert view.update({"comments": ["One.", "Two."], "rubric": {"content": 70}}, final=True) == ""
+
+
+# --- repair through the grader ---
+def test_missing_fields_are_repaired():
+    asked = []
+
+    def reply(messages, format=None):
+        asked.append(sorted(format["properties"]))
+        if "comments" in format["properties"]:
+            return json.dumps({"comments": ["Good."], "rubric": {"content": 70, "structure": 60}})
+        return json.dumps({"rubric": {"language": 80}, "score": 68})
+
+    grader = BhalaSmartGrader(client=FakeOllamaClient(latency=0, tokens_per_second=0, reply=reply))
+    feedback = grader.feedback("My essay.")
+    assert asked == [["comments", "rubric", "score"], ["rubric", "score"]]
+    assert feedback == Feedback(("Good.",), {"content": 70, "structure": 60, "language": 80}, 68)
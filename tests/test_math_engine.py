@@ -0,0 +1,14 @@
+import pytest
+
+from tutor_ed.math_engine import solve_with_sympy
+
+
+@pytest.mark.parametrize("query, answer", [
+    ("dy/dx of x^3", "Calculated Derivative: 3*x**2"),
+    ("d^2y/dx^2 of x^5", "Calculated Second Derivative: 20*x**3"),
+    ("Find the derivative of f(x) = 3x^2 + 2x", "Calculated Derivative: 6*x + 2"),
+    ("Factorise f(x) = x^2 - 4", "Factorised: (x - 2)*(x + 2)"),
+    ("Integrate 3x^2 from 0 to 2", "Calculated Integral: 8"),
+])
+def test_verified_answers(query, answer):
+    assert solve_with_sympy(query) == answer
@@ -0,0 +1,99 @@
+import threading
+import time
+
+from tutor_ed.fake_ollama import FakeOllamaClient
+from tutor_ed.models import BHALA_MODEL, TUTOR_MODEL, ModelRegistry, full_name
+
+
+class CountingClient(FakeOllamaClient):
+    def __init__(self, delay=0.0):
+        super().__init__(latency=0, tokens_per_second=0)
+        self.delay = delay
+        self.warms = []
+        self.timeouts = []
+
+    def generate(self, model='', prompt='', **kwargs):
+        time.sleep(self.delay)
+        self.warms.append(model)
+        return super().generate(model, prompt, **kwargs)
+
+
+class FakeRegistry(ModelRegistry):
+    def __init__(self, client, **options):
+        super().__init__(**options)
+        self.client = client
+
+    def _client(self, timeout=None):
+        self.client.timeouts.append(timeout)
+        return self.client
+
+
+def settle(registry):
+    deadline = time.monotonic() + 5
+    while registry.warming and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_full_name():
+    assert full_name("llama3.2") == "llama3.2:latest"
+    assert full_name("qwen2.5:1.5b") == "qwen2.5:1.5b"
+
+
+def test_prewarm_once_per_ttl():
+    client = CountingClient()
+    registry = FakeRegistry(client)
+    for _ in range(20):   # one call per Streamlit rerun
+        registry.prewarm(BHALA_MODEL)
+        settle(registry)
+    assert client.warms == [BHALA_MODEL]
+
+
+def test_prewarm_in_flight_is_not_repeated():
+    client = CountingClient(delay=0.2)
+    registry = FakeRegistry(client, ttl=0)
+    threads = [threading.Thread(target=registry.prewarm, args=(TUTOR_MODEL,)) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.status(TUTOR_MODEL) == "LOADING"
+    settle(registry)
+    assert client.warms == [TUTOR_MODEL]
+
+
+def test_loaded_model_is_not_warmed():
+    client = CountingClient()
+    registry = FakeRegistry(client, ttl=0)
+    registry.loaded.add(full_name(BHALA_MODEL))
+    registry.prewarm(BHALA_MODEL)
+    settle(registry)
+    assert client.warms == []
+
+
+def test_prewarm_again_after_ttl_once_unloaded():
+    client = CountingClient()
+    registry = FakeRegistry(client, ttl=0.05)
+    registry.prewarm(BHALA_MODEL)
+    settle(registry)
+    registry.loaded.clear()        # a probe found Ollama had unloaded it
+    registry.prewarm(BHALA_MODEL)  # still inside the ttl
+    time.sleep(0.06)
+    registry.prewarm(BHALA_MODEL)
+    settle(registry)
+    assert client.warms == [BHALA_MODEL, BHALA_MODEL]
+
+
+def test_warm_client_has_a_timeout():
+    client = CountingClient()
+    registry = FakeRegistry(client)
+    registry.prewarm(BHALA_MODEL)
+    settle(registry)
+    assert client.timeouts and all(t for t in client.timeouts)
+
+
+def test_status():
+    registry = FakeRegistry(CountingClient(), ttl=0)
+    assert registry.status(BHALA_MODEL) == "STANDBY"
+    assert registry.status("phi3") == "MISSING"
+    assert registry.problem(BHALA_MODEL) is None
+    assert "ollama pull phi3" in registry.problem("phi3")
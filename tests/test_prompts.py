@@ -0,0 +1,52 @@
+from tutor_ed.fake_ollama import FakeOllamaClient
+from tutor_ed.prompts import FEEDBACK, GRAMMAR, TEMPLATES, PromptTemplate, compact, estimate_tokens, measured
+
+
+def test_compact():
+    assert compact("""
+        ROLE: Marker.
+
+            1.  Mark   the essay.
+        \t2. Be kind.
+        """) == "ROLE: Marker.\n1. Mark the essay.\n2. Be kind."
+
+
+def test_template_system_turn_is_compact_and_fixed():
+    template = PromptTemplate("test_compact", "m", """
+        Mark this.
+
+          Carefully.
+        """, user="""
+        Essay: {text}
+        """)
+    try:
+        assert template.system == "Mark this.\nCarefully."
+        assert template.messages(text="One.")[1] == {"role": "user", "content": "Essay: One."}
+        assert template.messages(text="Two.")[0] == template.messages(text="One.")[0]
+        report = template.report()
+        assert report["compacting_saved_chars"] > 0 and report["compacting_saved_tokens_est"] > 0
+    finally:
+        del TEMPLATES["test_compact"]
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Mark the essay") == 3
+    assert estimate_tokens("internationalisation") == 4       # long words cost more than one
+    assert estimate_tokens("x^2 = 12345") == 6                # x ^ 2 = 123 45
+    assert estimate_tokens("a\n\nb") == 3                     # a newline run is a token of its own
+    assert estimate_tokens(FEEDBACK.system) < len(FEEDBACK.system) / 3
+
+
+class CachedPrompt(FakeOllamaClient):
+    def chat(self, model='', messages=None, stream=False, **kwargs):
+        response = super().chat(model, messages, stream, **kwargs)
+        del response["prompt_eval_count"]
+        return response
+
+
+def test_measured_column():
+    fake = FakeOllamaClient(latency=0, tokens_per_second=0)
+    assert measured(GRAMMAR, fake).strip().isdigit()
+    assert measured(GRAMMAR, CachedPrompt(latency=0, tokens_per_second=0)) == f" {'-':>9}"
+    assert measured(GRAMMAR, FakeOllamaClient(latency=0, failure_rate=1)) == "  (fake ollama: injected failure)"
@@ -0,0 +1,68 @@
+import json
+
+from tutor_ed.chunking import Chunk
+from tutor_ed.revisions import REMARK_THRESHOLD, Revision, paragraph_key
+
+WORDS = "the quick brown fox jumps over the lazy dog again "
+
+
+def paragraphs(*texts):
+    return [Chunk(f"Paragraph {n}", 0, 0, text) for n, text in enumerate(texts, start=1)]
+
+
+def essay(edited=None):
+    texts = [WORDS * 2 + str(n) for n in range(5)]
+    if edited is not None:
+        texts[edited] = "An entirely new paragraph about something else."
+    return paragraphs(*texts)
+
+
+def test_paragraph_key_ignores_wrapping():
+    assert paragraph_key("one two\n  three ") == paragraph_key("one two three")
+    assert paragraph_key("one two three") != paragraph_key("one two four")
+
+
+def test_only_edited_paragraphs_are_rechecked():
+    revision = Revision()
+    units = essay()
+    revision.keep_grammar([(unit, [{"text": str(n)}]) for n, unit in enumerate(units)])
+    kept = revision.kept_grammar(essay(edited=2))
+    assert kept[2] is None and kept[0] == [{"text": "0"}]
+    assert (revision.rechecked, revision.reused) == (1, 4)
+
+
+def test_feedback_needed_first_time_and_after_structure_changes():
+    revision = Revision()
+    units = essay()
+    assert revision.needs_feedback(units)
+    revision.keep_feedback(units, {"score": 30})
+    assert not revision.needs_feedback(units)
+    assert revision.needs_feedback(units[:-1])
+
+
+def test_feedback_kept_for_a_small_edit_only():
+    revision = Revision()
+    units = essay()
+    revision.keep_feedback(units, {"score": 30})
+    small = essay(edited=0)
+    assert revision.change(small) <= REMARK_THRESHOLD
+    assert not revision.needs_feedback(small)
+    large = paragraphs(*[unit.text for unit in essay(edited=0)[:2]], *["Rewritten %d." % n for n in range(3)])
+    assert revision.change(large) > REMARK_THRESHOLD
+    assert revision.needs_feedback(large)
+
+
+def test_state_round_trips_through_json():
+    revision = Revision()
+    units = essay()
+    revision.keep_grammar([(unit, []) for unit in units])
+    revision.keep_feedback(units, {"score": 30})
+    restored = Revision(json.loads(json.dumps(revision.state())))
+    assert restored.state() == revision.state()
+    assert not restored.needs_feedback(units)
+    assert restored.kept_grammar(units) == [[]] * 5
+
+
+def test_bad_state_is_dropped():
+    revision = Revision({"grammar": {"k": "not a list"}, "feedback": "old format"})
+    assert revision.grammar == {} and revision.feedback is None
@@ -0,0 +1,159 @@
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+import pytest
+
+from tutor_ed.fake_ollama import FakeOllamaClient
+from tutor_ed.grader import BhalaSmartGrader
+from tutor_ed.prompts import GRAMMAR
+from tutor_ed.scheduler import FIRST_GUESS_SERVICE, LLMScheduler, ServerBusy, SharedScheduler, _Ticket
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def queue_up(scheduler, session, served):
+    # A thread that takes a slot, notes its name and gives the slot back; returns once it is queued
+    before = scheduler.waiting
+
+    def run():
+        with scheduler.slot(session[0]):
+            served.append(session)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    wait_for(lambda: scheduler.waiting > before)
+    return thread
+
+
+def test_at_most_slots_generations_at_once():
+    scheduler = LLMScheduler(slots=2)
+    client = FakeOllamaClient(latency=0.01, tokens_per_second=0)
+
+    def chat(n):
+        with scheduler.slot(f"session {n % 3}"):
+            list(client.chat(model="m", messages=[], stream=True))
+
+    threads = [threading.Thread(target=chat, args=(n,)) for n in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert client.calls == 12
+    assert client.max_active == 2
+    assert scheduler.snapshot()["running"] == 0
+
+
+def test_round_robin_across_sessions():
+    scheduler = LLMScheduler(slots=1)
+    held = scheduler.acquire("teacher")
+    served = []
+    threads = [queue_up(scheduler, name, served) for name in ("A1", "A2", "A3", "B1", "C1")]
+    scheduler.release(held)
+    for thread in threads:
+        thread.join()
+    assert served == ["A1", "B1", "C1", "A2", "A3"]
+
+
+def test_queue_limit_sheds_new_requests():
+    scheduler = LLMScheduler(slots=1, max_queue=1)
+    held = scheduler.acquire("teacher")
+    thread = queue_up(scheduler, "A1", [])
+    with pytest.raises(ServerBusy):
+        scheduler.acquire("B")
+    scheduler.release(held)
+    thread.join()
+
+
+def test_position_follows_round_robin_order():
+    scheduler = LLMScheduler(slots=2)
+    a1, a2, b1 = _Ticket("A"), _Ticket("A"), _Ticket("B")
+    scheduler.sessions.update(A=deque([a1, a2]), B=deque([b1]))
+    assert [scheduler._position(t) for t in (a1, b1, a2)] == [0, 1, 2]
+    scheduler.avg_service = 10
+    assert [scheduler.estimate_wait(p) for p in (0, 1, 2)] == [10, 10, 20]
+
+
+def test_waiting_request_is_told_its_place():
+    scheduler = LLMScheduler(slots=1)
+    held = scheduler.acquire("teacher")
+    places = []
+    thread = threading.Thread(target=lambda: scheduler.release(scheduler.acquire("A", lambda *p: places.append(p))))
+    thread.start()
+    wait_for(lambda: places)
+    scheduler.release(held)
+    thread.join()
+    assert places[0] == (1, FIRST_GUESS_SERVICE)
+
+
+def grader(scheduler, **options):
+    client = FakeOllamaClient(latency=0, tokens_per_second=0, **options)
+    return BhalaSmartGrader(client=client, scheduler=scheduler)
+
+
+def test_stream_closed_early_gives_the_slot_back():
+    scheduler = LLMScheduler(slots=1)
+    stream = grader(scheduler)._stream(GRAMMAR, "My essay.")
+    next(stream)
+    assert scheduler.snapshot()["running"] == 1
+    stream.close()
+    assert scheduler.snapshot()["running"] == 0
+
+
+def test_cancelled_stream_gives_the_slot_back():
+    scheduler = LLMScheduler(slots=1)
+    marker = grader(scheduler)
+    stream = marker._stream(GRAMMAR, "My essay.")
+    next(stream)
+    marker.cancel()
+    with pytest.raises(RuntimeError):
+        list(stream)
+    assert scheduler.snapshot()["running"] == 0
+
+
+def test_cancelled_while_queued_leaves_the_queue():
+    scheduler = LLMScheduler(slots=1)
+    held = scheduler.acquire("teacher")
+    marker = grader(scheduler)
+    marker.cancel()
+    with pytest.raises(RuntimeError):
+        next(marker._stream(GRAMMAR, "My essay."))
+    assert scheduler.snapshot()["waiting"] == 0
+    scheduler.release(held)
+    assert scheduler.snapshot()["running"] == 0
+
+
+def test_shared_scheduler_reaps_a_dead_worker(tmp_path):
+    scheduler = SharedScheduler(str(tmp_path / "queue.sqlite3"), slots=1, max_wait=2)
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    with scheduler._transaction() as conn:
+        conn.execute("INSERT INTO tickets(session, pid, queued, granted) VALUES ('crashed', ?, ?, ?)",
+                     (dead.pid, time.time(), time.time()))
+    ticket = scheduler.acquire("A")
+    assert scheduler.snapshot()["running"] == 1
+    scheduler.release(ticket)
+    assert (scheduler.snapshot()["running"], scheduler.snapshot()["waiting"]) == (0, 0)
+
+
+def test_shared_scheduler_caps_slots_across_instances(tmp_path):
+    # Two instances on one file stand in for two worker processes
+    path = str(tmp_path / "queue.sqlite3")
+    first, second = SharedScheduler(path, slots=1), SharedScheduler(path, slots=1)
+    held = first.acquire("A")
+    granted = []
+    thread = threading.Thread(target=lambda: granted.append(second.acquire("B")))
+    thread.start()
+    time.sleep(0.2)
+    assert not granted
+    first.release(held)
+    thread.join()
+    second.release(granted[0])
+    assert second.snapshot()["running"] == 0
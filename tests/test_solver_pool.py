@@ -0,0 +1,39 @@
+import pytest
+
+from tutor_ed import math_engine
+from tutor_ed.intent import read_query
+from tutor_ed.math_engine import SympyMemo, solve_with_sympy
+from tutor_ed.solver_pool import SolverPool
+
+SLOW = read_query("Expand (x + y + z + 1)^40")   # several seconds of SymPy
+
+
+@pytest.fixture
+def pool():
+    pool = SolverPool(workers=1)
+    yield pool
+    pool.close()
+
+
+def test_overrun_job_has_its_worker_replaced(pool):
+    worker = pool.idle.queue[0]
+    with pytest.raises(TimeoutError):
+        pool.run("exact", (SLOW,), 0.5)
+    assert worker.process.poll() is not None                 # killed, not left running
+    assert pool.idle.queue[0] is not worker
+    result, _ = pool.run("exact", (read_query("Solve x^2 - 4 = 0"),), 30)
+    assert result == "Exact Roots: [-2, 2]"
+
+
+def test_numeric_answer_when_the_exact_solve_overruns(pool, monkeypatch):
+    monkeypatch.setattr(math_engine, "EXACT_BUDGET", 0)     # no exact solve fits
+    memo = SympyMemo()
+    result = solve_with_sympy("Solve x^3 - 2x - 5 = 0", memo=memo, pool=pool)
+    assert result == "Approximate Roots: [2.09455] (numeric, exact solve timed out)"
+    assert set(memo.metrics()["timings"]) == {"parse", "solve (timed out)", "numeric"}
+
+
+def test_error_in_a_job_keeps_the_worker(pool):
+    worker = pool.idle.queue[0]
+    assert solve_with_sympy("Solve x^2 + = 0", memo=SympyMemo(), pool=pool).startswith("ERROR")
+    assert pool.idle.queue[0] is worker
@@ -0,0 +1,58 @@
+import json
+import threading
+
+from tutor_ed.stats import StatsManager, bucket_for
+
+
+def manager(tmp_path, legacy=None):
+    legacy_json = tmp_path / "bhala_stats.json"
+    if legacy is not None:
+        legacy_json.write_text(json.dumps(legacy))
+    return StatsManager(str(tmp_path / "stats.sqlite3"), str(legacy_json))
+
+
+def test_buckets():
+    assert [bucket_for(s) for s in (0, 9, 10, 72, 99, 100)] == [0, 0, 10, 70, 90, 90]
+
+
+def test_legacy_json_is_imported_once(tmp_path):
+    stats = manager(tmp_path, {"essays_marked": 4, "total_score": 240}).load_stats()
+    assert (stats["essays_marked"], stats["total_score"], stats["average"]) == (4, 240, 60)
+    assert sum(stats["histogram"].values()) == 0            # old data has no per-essay scores
+    # A second start (and a changed JSON file) doesn't add it again
+    stats = manager(tmp_path, {"essays_marked": 9, "total_score": 900}).load_stats()
+    assert stats["essays_marked"] == 4
+
+
+def test_no_legacy_file(tmp_path):
+    assert manager(tmp_path).load_stats()["essays_marked"] == 0
+
+
+def test_record_essay_and_many(tmp_path):
+    stats = manager(tmp_path)
+    stats.record_essay(72, 300, 4.5)
+    stats.record_many([(45, 200, 3.0), (100, 250, 3.5), (78, 310, None)])
+    result = stats.load_stats()
+    assert (result["essays_marked"], result["total_score"], result["average"]) == (4, 295, 73)
+    assert result["histogram"][70] == 2 and result["histogram"][40] == 1 and result["histogram"][90] == 1
+    assert set(result["histogram"]) == set(range(0, 100, 10))
+    stats.record_many([])
+    assert stats.load_stats() == result
+
+
+def test_writers_in_parallel_lose_nothing(tmp_path):
+    stats = manager(tmp_path)
+
+    def write(n):
+        other = StatsManager(stats.path, stats.legacy_json)
+        for _ in range(25):
+            other.record_essay(50 + n)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = stats.load_stats()
+    assert (result["essays_marked"], result["total_score"]) == (50, 25 * 50 + 25 * 51)
+    assert result["histogram"][50] == 50
@@ -0,0 +1,94 @@
+import pytest
+
+from tutor_ed.intent import read_query
+from tutor_ed.step_check import INVALID, UNCHECKED, VALID, check_step, latex_to_text, statements
+
+
+# --- reading LaTeX ---
+@pytest.mark.parametrize("latex, text", [
+    (r"\frac{1}{2}x", "((1)/(2))x"),
+    (r"\frac12", "((1)/(2))"),
+    (r"\sqrt{16}", "sqrt(16)"),
+    (r"\sqrt[3]{x}", "root(x, 3)"),
+    (r"x^{2} + x_1", "x**(2) + x"),
+    (r"2 \cdot 3", "2  *  3"),
+])
+def test_latex_to_text(latex, text):
+    assert latex_to_text(latex) == text
+
+
+def test_unsupported_command():
+    with pytest.raises(ValueError):
+        latex_to_text(r"\binom{4}{2}")
+
+
+def test_plus_minus_is_two_statements():
+    assert statements(r"x = \frac{-5 \pm 7}{4}") == [["x", r"\frac{-5 + 7}{4}"], ["x", r"\frac{-5 - 7}{4}"]]
+
+
+def test_bare_value_reuses_the_left_side():
+    assert statements(r"x = 1, 2") == [["x", "1"], ["x", "2"]]
+    assert statements(r"x = 1 \quad \text{or} \quad x = -3") == [["x", "1"], ["x", "-3"]]
+    assert statements(r"2x = 6 \Rightarrow x = 3") == [["2x", "6"], ["x", "3"]]
+
+
+# --- verdicts ---
+QUADRATIC = read_query("Solve x^2 - 5x + 6 = 0")
+
+
+@pytest.mark.parametrize("line, verdict", [
+    (r"(x - 2)(x - 3) = 0", VALID),
+    (r"x = \frac{5 \pm 1}{2}", VALID),
+    (r"x = 2", VALID),                           # one root so far
+    (r"x = 4", INVALID),
+    (r"(x - 2)(x + 3) = 0", INVALID),
+    (r"\Delta = 25 - 24 = 1", VALID),
+    (r"25 - 24 = 2", INVALID),
+    (r"x^2 - 5x + k = 0", UNCHECKED),            # another symbol
+    (r"\text{Factorise the trinomial}", UNCHECKED),
+])
+def test_quadratic(line, verdict):
+    assert check_step(QUADRATIC, line)[0] == verdict
+
+
+def test_final_line_needs_every_root():
+    assert check_step(QUADRATIC, "x = 2", final=True) == (INVALID, "the final line should give every solution")
+    assert check_step(QUADRATIC, r"x = 2 \text{ or } x = 3", final=True) == (VALID, "")
+
+
+@pytest.mark.parametrize("line, verdict", [
+    (r"3x^2 + 2x", VALID),
+    (r"6x + 2", VALID),
+    (r"6x + 3", INVALID),
+    (r"\frac{dy}{dx} = 6x + 2", VALID),
+    (r"a x^2", UNCHECKED),
+])
+def test_derivative(line, verdict):
+    assert check_step(read_query("Differentiate 3x^2 + 2x"), line)[0] == verdict
+
+
+def test_derivative_final_line():
+    intent = read_query("Differentiate 3x^2 + 2x")
+    assert check_step(intent, "3x^2 + 2x", final=True)[0] == INVALID
+    assert check_step(intent, "6x + 2", final=True)[0] == VALID
+
+
+@pytest.mark.parametrize("line, verdict", [
+    (r"x^3", VALID),
+    (r"x^4", INVALID),
+    (r"2^3 - 0^3 = 8", VALID),
+    (r"= 8", VALID),
+    (r"= 9", INVALID),
+])
+def test_bounded_integral(line, verdict):
+    assert check_step(read_query("Integrate 3x^2 from 0 to 2"), line)[0] == verdict
+
+
+@pytest.mark.parametrize("line, verdict", [
+    (r"2x = 4", VALID),
+    (r"x = 2, y = 1", VALID),
+    (r"x = 3", INVALID),
+    (r"x + z = 3", UNCHECKED),
+])
+def test_system(line, verdict):
+    assert check_step(read_query("Solve x + y = 3 and x - y = 1"), line)[0] == verdict
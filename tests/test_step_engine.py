@@ -0,0 +1,69 @@
+import pytest
+
+from tutor_ed.intent import read_query
+from tutor_ed.math_engine import solve_with_sympy
+from tutor_ed.step_check import INVALID, VALID, check_step
+from tutor_ed.step_engine import derive_steps, solve_steps
+
+
+def steps(query):
+    return solve_steps(read_query(query))
+
+
+def test_power_of_x_alone():
+    assert steps("Solve x^3 = 0") == ["x^{3} = 0", "x = 0"]
+
+
+def test_common_power_comes_out_before_the_factor_theorem():
+    lines = steps("Solve x^3 - 4x = 0")
+    assert lines[1] == r"x \left(x^{2} - 4\right) = 0"
+    assert not any("array" in line for line in lines)   # no synthetic division by 0
+    assert lines[-1] == r"x = 0 \quad \text{or} \quad x = 2 \quad \text{or} \quad x = -2"
+
+
+def test_no_real_roots():
+    lines = steps("Solve x^2 + 1 = 0")
+    assert lines[-1].endswith(r"\text{no real roots}")
+    assert "I" not in " ".join(lines)
+    assert solve_with_sympy("Solve x^2 + 1 = 0") == "Exact Roots: [] (no real roots)"
+
+
+def test_only_real_roots_of_a_cubic():
+    lines = steps("Solve x^3 - 2x^2 + x - 2 = 0")
+    assert lines[-1] == "x = 2"
+    assert solve_with_sympy("Solve x^3 - 2x^2 + x - 2 = 0") == "Exact Roots: [2]"
+
+
+def test_factor_theorem():
+    lines = steps("Solve 2x^3 - 3x^2 - 11x + 6 = 0")
+    assert lines[1].startswith("f(-2) =")
+    assert lines[-1] == r"x = -2 \quad \text{or} \quad x = 3 \quad \text{or} \quad x = \frac{1}{2}"
+
+
+@pytest.mark.parametrize("query", ["Solve x^3 + x = 0", "Solve x^4 - 6x^3 + 11x^2 - 6x = 0",
+                                   "Solve 2x^2 + 5x - 3 = 0", "Solve x^2 - 2 = 0"])
+def test_final_line_checks_out(query):
+    intent = read_query(query)
+    assert check_step(intent, solve_steps(intent)[-1], final=True)[0] == VALID
+
+
+def test_first_line_is_the_equation_as_typed():
+    assert steps("Solve 2y + 3 = 7") == ["2 y + 3 = 7", "2 y - 4 = 0", "2 y = 4", "y = 2"]
+    assert steps("Solve x^3 = 4x")[:2] == ["x^{3} = 4 x", "x^{3} - 4 x = 0"]
+    assert steps("Solve x = (2) - (x)")[0] == "x = 2 - x"
+
+
+@pytest.mark.parametrize("query", ["Solve 2y + 3 = 7", "Solve 2x^2 = 8 - x"])
+def test_every_line_checks_out(query):
+    intent = read_query(query)
+    # The quadratic formula itself (a, b, c) is the one line left unchecked
+    assert all(check_step(intent, line)[0] != INVALID for line in solve_steps(intent))
+
+
+def test_negative_power_in_brackets():
+    assert derive_steps(read_query("Differentiate -4/x + 3x^2")) == [
+        r"f(x) = 3 x^{2} - \frac{4}{x}",
+        r"f'(x) = 3 \cdot 2 x + (-4 \cdot (-1)) x^{-2}",
+        r"f'(x) = 6 x + \frac{4}{x^{2}}",
+    ]
+    assert derive_steps(read_query("Differentiate 1/x"))[1] == "f'(x) = (-1) x^{-2}"
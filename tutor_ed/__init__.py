@@ -0,0 +1,5 @@
+"""
+Tutor Ed shared engine.
+Code used by more than one page (or by the command-line tools) lives here,
+so the Streamlit pages stay focused on layout.
+"""
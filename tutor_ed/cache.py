@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from contextlib import closing
+
+# Lives next to bhala_stats.json (relative to where Streamlit is started)
+CACHE_PATH = os.environ.get("TUTOR_ED_CACHE", "tutor_ed_cache.sqlite3")
+MAX_ENTRIES = 5000
+MAX_BYTES = 50 * 1024 * 1024
+
+
+def normalize_text(text):
+    # Same essay pasted from Word vs. typed in the box should hash the same
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def make_key(model, system_prompt, text, options=None):
+    # The prompt and model tag are part of the key, so editing a prompt or
+    # switching models invalidates old answers without any manual step.
+    payload = json.dumps({
+        "model": model,
+        "system": system_prompt,
+        "input": normalize_text(text),
+        "options": options or {},
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def replay_stream(text):
+    # Hands a cached answer back in the same chunk shape as ollama.chat(stream=True)
+    for piece in re.findall(r"\S+\s*|\s+", text):
+        yield {"message": {"role": "assistant", "content": piece}, "done": False}
+    yield {"message": {"role": "assistant", "content": ""}, "done": True}
+
+
+class ResultCache:
+    """
+    Persistent, content-addressed store for model answers.
+    SQLite does the locking, so several Streamlit sessions can share one file.
+    Oldest-used entries are evicted once the entry or byte budget is exceeded.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_lru ON results(last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _count(self, conn, name):
+        conn.execute(
+            "INSERT INTO counters(name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+    def get(self, key):
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                self._count(conn, "misses")
+                return None
+            conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            self._count(conn, "hits")
+            return row[0]
+
+    def put(self, key, value):
+        size = len(value.encode("utf-8"))
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results(key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()))
+            self._evict(conn)
+
+    def _evict(self, conn):
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk from least recently used until both budgets fit again
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY last_access"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+
+    def stats(self):
+        with closing(self._connect()) as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": entries,
+            "bytes": total,
+        }
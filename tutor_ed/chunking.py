@@ -0,0 +1,145 @@
+import re
+from typing import NamedTuple
+
+LONG_ESSAY_WORDS = 350  # below this the whole essay goes to the model in one piece
+MAX_CHUNK_WORDS = 200
+MIN_CHUNK_WORDS = 40    # a title or one-line section rides along with the next chunk
+MIN_PARAGRAPH_WORDS = 12  # same for paragraphs, when they are the unit (a heading, a title)
+CHUNK_WORKERS = 3
+
+# Same headings as the page's "Load Template" button
+HEADING = re.compile(r"^[ \t]*(Title|Introduction|Body(?: Paragraph)?(?: \d+)?|Conclusion)[ \t]*:[ \t]*",
+                     re.I | re.M)
+PARAGRAPH = re.compile(r"\S[\s\S]*?(?=\n[ \t]*\n|\Z)")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+class Chunk(NamedTuple):
+    label: str
+    start: int   # character offsets into the full essay
+    end: int
+    text: str
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def is_long(text):
+    return word_count(text) >= LONG_ESSAY_WORDS
+
+
+# --- 1. SPLITTING ---
+def _sections(text):
+    headings = list(HEADING.finditer(text))
+    if len(headings) < 2:
+        return None
+    chunks = []
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        body = text[heading.end():end]
+        if body.strip():
+            chunks.append(Chunk(heading.group(1).title(), heading.end(), end, body))
+    return chunks
+
+
+def _paragraph_groups(text):
+    # Neighbouring paragraphs share a chunk until it would pass MAX_CHUNK_WORDS
+    chunks = []
+    group = []
+    for para in PARAGRAPH.finditer(text):
+        if group and sum(word_count(p.group()) for p in group) + word_count(para.group()) > MAX_CHUNK_WORDS:
+            chunks.append(group)
+            group = []
+        group.append(para)
+    if group:
+        chunks.append(group)
+    out = []
+    first = 1
+    for group in chunks:
+        start, end = group[0].start(), group[-1].end()
+        last = first + len(group) - 1
+        label = f"Paragraph {first}" if first == last else f"Paragraphs {first}-{last}"
+        out.append(Chunk(label, start, end, text[start:end]))
+        first = last + 1
+    return out
+
+
+def _split_oversized(chunk):
+    # One giant paragraph: cut at sentence ends
+    if word_count(chunk.text) <= MAX_CHUNK_WORDS:
+        return [chunk]
+    pieces, piece_start, cursor, words = [], 0, 0, 0
+    for boundary in SENTENCE_END.finditer(chunk.text):
+        words += word_count(chunk.text[cursor:boundary.start()])
+        cursor = boundary.end()
+        if words >= MAX_CHUNK_WORDS:
+            pieces.append((piece_start, boundary.end()))
+            piece_start, words = boundary.end(), 0
+    pieces.append((piece_start, len(chunk.text)))
+    return [
+        Chunk(f"{chunk.label} (part {n})", chunk.start + a, chunk.start + b, chunk.text[a:b])
+        for n, (a, b) in enumerate(pieces, start=1) if chunk.text[a:b].strip()
+    ]
+
+
+def _join(a, b, text):
+    return Chunk(f"{a.label} + {b.label}", a.start, b.end, text[a.start:b.end])
+
+
+def _merge_small(chunks, text, min_words=MIN_CHUNK_WORDS):
+    merged = []
+    for chunk in chunks:
+        if merged and word_count(merged[-1].text) < min_words:
+            chunk = _join(merged.pop(), chunk, text)
+        merged.append(chunk)
+    # A short conclusion has nothing after it, so it joins the chunk before
+    if len(merged) > 1 and word_count(merged[-1].text) < min_words:
+        last = merged.pop()
+        merged.append(_join(merged.pop(), last, text))
+    return merged
+
+
+def outline(text):
+    # The essay's own sections (template headings) or paragraph groups
+    return _sections(text) or _paragraph_groups(text)
+
+
+def split_essay(text):
+    # Model-sized pieces: small sections merged, oversized ones cut at sentence ends
+    pieces = [piece for chunk in outline(text) for piece in _split_oversized(chunk)]
+    return _merge_small(pieces, text)
+
+
+def split_paragraphs(text):
+    # One piece per paragraph, so an edit only touches the pieces it falls in (re-marking)
+    paragraphs = [Chunk(f"Paragraph {n}", para.start(), para.end(), para.group())
+                  for n, para in enumerate(PARAGRAPH.finditer(text), start=1)]
+    pieces = [piece for chunk in paragraphs for piece in _split_oversized(chunk)]
+    return _merge_small(pieces, text, MIN_PARAGRAPH_WORDS)
+
+
+# --- 2. OUTLINE FOR FEEDBACK ---
+def _first_and_last_sentence(text):
+    sentences = [s.strip() for s in SENTENCE_END.split(text.strip()) if s.strip()]
+    if not sentences:
+        return "", ""
+    return sentences[0], sentences[-1]
+
+
+def structure_summary(text, chunks=None):
+    """
+    Compact stand-in for a long essay in the feedback prompt: every section's
+    size plus its opening and closing sentence, which is what the structure
+    and tone marks depend on.
+    """
+    chunks = chunks or outline(text)
+    lines = [f"ESSAY OUTLINE ({word_count(text)} words, {len(chunks)} sections). "
+             f"The full essay is too long to include, so judge structure and tone from this outline."]
+    for chunk in chunks:
+        first, last = _first_and_last_sentence(chunk.text)
+        lines.append(f"[{chunk.label}] ({word_count(chunk.text)} words)")
+        lines.append(f"  Opens: {first}")
+        if last and last != first:
+            lines.append(f"  Closes: {last}")
+    return "\n".join(lines)
@@ -0,0 +1,109 @@
+import json
+import random
+import threading
+import time
+
+from tutor_ed.models import BHALA_MODEL, TUTOR_MODEL
+
+GRAMMAR_REPLY = "- \"Borrow me\" should be \"Lend me\".\n- Comma splice in paragraph 2.\n"
+FEEDBACK_REPLY = "- Clear introduction.\n- Body paragraphs need stronger topic sentences.\n- Well done, keep going!\nSCORE: 72"
+STEPS_REPLY = "$$ 2x - 6 = 0 $$\n$$ 2x = 6 $$\n$$ x = 3 $$"
+# Answers when a JSON schema is asked for (format=); a repair gets only the fields its schema names
+GRAMMAR_JSON = {"errors": [{"text": "borrow me", "category": "word choice", "suggestion": "lend me"}]}
+FEEDBACK_JSON = {"comments": ["Clear introduction.", "Body paragraphs need stronger topic sentences.",
+                              "Well done, keep going!"],
+                 "rubric": {"content": 70, "language": 74, "structure": 76}, "score": 72}
+
+
+def default_reply(messages, format=None):
+    system = messages[0]["content"] if messages else ""
+    if isinstance(format, dict):
+        answer = GRAMMAR_JSON if "errors" in format["properties"] else FEEDBACK_JSON
+        return json.dumps({name: answer[name] for name in format["properties"]})
+    if "SCORE" in system:
+        return FEEDBACK_REPLY
+    if "grammar" in system.lower():
+        return GRAMMAR_REPLY
+    return STEPS_REPLY
+
+
+class FakeOllamaClient:
+    """
+    Drop-in stand-in for ollama.Client: canned answers, a configurable
+    first-token latency and token rate, optional random failures. It also
+    counts how many chats are running at once, which is what the scheduler
+    is meant to cap.
+    """
+
+    def __init__(self, latency=0.2, tokens_per_second=20.0, failure_rate=0.0,
+                 reply=default_reply, models=(BHALA_MODEL, TUTOR_MODEL), seed=None):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.reply = reply
+        self.models = list(models)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+
+    def _tokens(self, text):
+        pieces = text.split(" ")
+        return [p + (" " if i < len(pieces) - 1 else "") for i, p in enumerate(pieces)]
+
+    def _run(self, messages, format=None):
+        with self.lock:
+            self.active += 1
+            self.calls += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.latency)
+            if self.random.random() < self.failure_rate:
+                raise ConnectionError("fake ollama: injected failure")
+            text = self.reply(messages, format)
+            for token in self._tokens(text):
+                if self.tokens_per_second:
+                    time.sleep(1.0 / self.tokens_per_second)
+                yield token
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def _counts(self, messages, eval_count, started):
+        # The usage fields a real server reports on its last chunk (durations in nanoseconds)
+        elapsed = int((time.perf_counter() - started) * 1e9)
+        return {"prompt_eval_count": sum(len(m.get("content", "").split()) for m in messages),
+                "eval_count": eval_count, "eval_duration": elapsed, "total_duration": elapsed}
+
+    def chat(self, model='', messages=None, stream=False, **kwargs):
+        messages = messages or []
+        started = time.perf_counter()
+        tokens = self._run(messages, kwargs.get("format"))
+        if stream:
+            return self._chunks(model, messages, tokens, started)
+        text = "".join(tokens)
+        return {"model": model, "message": {"role": "assistant", "content": text}, "done": True,
+                **self._counts(messages, len(self._tokens(text)), started)}
+
+    def _chunks(self, model, messages, tokens, started):
+        count = 0
+        for token in tokens:
+            count += 1
+            yield {"model": model, "message": {"role": "assistant", "content": token}, "done": False}
+        yield {"model": model, "message": {"role": "assistant", "content": ""}, "done": True,
+               **self._counts(messages, count, started)}
+
+    def generate(self, model='', prompt='', **kwargs):
+        return {"model": model, "response": "", "done": True}
+
+    def list(self):
+        return {"models": [{"model": m if ":" in m else f"{m}:latest"} for m in self.models]}
+
+    def ps(self):
+        return {"models": []}
+
+    def show(self, model):
+        if model not in self.models:
+            raise ValueError(f"model '{model}' not found")
+        return {"model": model}
@@ -0,0 +1,538 @@
+"""
+Formula catalog for Physical Sciences and Chemistry word problems.
+
+"A car accelerates from rest at 3 m/s^2 for 5 s. Calculate its final
+velocity." is read without a model: the quantities and their units are
+pulled out of the text, the asked-for quantity is named, and the catalog
+formula that connects them is solved with SymPy and sympy.physics.units.
+The memo (formula, substitution, answer) comes straight from the catalog;
+only problems no formula fits go to the tutor model.
+"""
+import math
+import re
+from itertools import permutations
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+FORMULA_RESULT = "Formula Result"
+
+# --- 1. UNITS ---
+# symbol -> (scale, sympy.physics.units name, LaTeX); scale converts to that unit
+UNITS = {
+    "m": (1, "meter", "m"), "cm": (1e-2, "meter", "cm"), "mm": (1e-3, "meter", "mm"), "km": (1e3, "meter", "km"),
+    "nm": (1e-9, "meter", "nm"), "dm": (1e-1, "meter", "dm"),
+    "s": (1, "second", "s"), "min": (60, "second", "min"), "h": (3600, "second", "h"),
+    "kg": (1, "kilogram", "kg"), "g": (1, "gram", "g"), "mg": (1e-3, "gram", "mg"),
+    "N": (1, "newton", "N"), "kN": (1e3, "newton", "kN"),
+    "J": (1, "joule", "J"), "kJ": (1e3, "joule", "kJ"), "MJ": (1e6, "joule", "MJ"),
+    "W": (1, "watt", "W"), "kW": (1e3, "watt", "kW"),
+    "V": (1, "volt", "V"), "A": (1, "ampere", "A"), "mA": (1e-3, "ampere", "mA"),
+    "Ω": (1, "ohm", r"\Omega"), "kΩ": (1e3, "ohm", r"k\Omega"),
+    "C": (1, "coulomb", "C"), "µC": (1e-6, "coulomb", r"\mu C"), "μC": (1e-6, "coulomb", r"\mu C"),
+    "Pa": (1, "pascal", "Pa"), "kPa": (1e3, "pascal", "kPa"), "atm": (1, "atmosphere", "atm"),
+    "K": (1, "kelvin", "K"), "mol": (1, "mole", "mol"),
+    "L": (1, "liter", "L"), "ℓ": (1, "liter", "L"), "mL": (1e-3, "liter", "mL"), "ml": (1e-3, "liter", "mL"),
+    "Hz": (1, "hertz", "Hz"), "kHz": (1e3, "hertz", "kHz"), "MHz": (1e6, "hertz", "MHz"),
+}
+# Units written out in words (matched lower-case, plural or not)
+UNIT_WORDS = {
+    "metre": "m", "meter": "m", "centimetre": "cm", "centimeter": "cm", "kilometre": "km", "kilometer": "km",
+    "second": "s", "minute": "min", "hour": "h", "kilogram": "kg", "gram": "g", "newton": "N", "joule": "J",
+    "watt": "W", "volt": "V", "ampere": "A", "amp": "A", "ohm": "Ω", "coulomb": "C", "pascal": "Pa",
+    "kelvin": "K", "mole": "mol", "litre": "L", "liter": "L", "hertz": "Hz",
+}
+# Things counted rather than measured: "3.01 x 10^23 molecules"
+COUNT_WORDS = {"molecule", "atom", "particle", "ion", "electron"}
+# SA data sheet: T = θ + 273
+CELSIUS = re.compile(r"\s*(?:°\s*C|℃|degrees?\s+celsius)\b", re.IGNORECASE)
+
+NUMBER = re.compile(r"(?<![\w.,^])(?P<mantissa>[-−]?\d+(?:[.,]\d+)?)"
+                    r"(?:\s*[x×*]\s*10\s*\^?\s*(?P<exponent>[-−⁻]?\s*[\d¹²³⁴⁵⁶⁷⁸⁹⁰]+)|[eE](?P<e>[-+]?\d+))?")
+UNIT_TOKEN = re.compile(r"(?P<name>[A-Za-zΩµμℓ]+)(?P<power>\^?\s?[-−⁻]?[\d¹²³]+(?![\d.,]))?")
+SUPERSCRIPTS = str.maketrans("⁻¹²³⁴⁵⁶⁷⁸⁹⁰−", "-1234567890-")
+
+
+@lru_cache(maxsize=None)
+def units():
+    # sympy.physics.units costs half a second to import: only solver workers pay it, once
+    from sympy.physics import units as module
+    return module
+
+
+class Unit(NamedTuple):
+    factors: Tuple[Tuple[str, int], ...]      # (symbol, power): "m/s^2" -> (("m", 1), ("s", -2))
+
+    def quantity(self):
+        u = units()
+        value = 1
+        for symbol, power in self.factors:
+            scale, name, _ = UNITS[symbol]
+            value *= (scale * getattr(u, name)) ** power
+        return value
+
+    def dimension(self):
+        return _dimension_of(self)
+
+    def latex(self):
+        parts = []
+        for symbol, power in self.factors:
+            name = rf"\text{{{UNITS[symbol][2]}}}" if "\\" not in UNITS[symbol][2] else UNITS[symbol][2]
+            parts.append(name if power == 1 else f"{name}^{{{power}}}")
+        return r"\cdot ".join(parts)
+
+    def text(self):
+        return "·".join(s if p == 1 else f"{s}{p}".replace("-", "⁻").translate(str.maketrans("0123456789", "⁰¹²³⁴⁵⁶⁷⁸⁹"))
+                        for s, p in self.factors)
+
+
+@lru_cache(maxsize=None)
+def _dimension_of(found_unit):
+    # What kind of quantity a unit measures, e.g. {"length": 1, "time": -1}: the same for m/s and km/h
+    from sympy.physics.units.systems.si import SI, dimsys_SI
+    dependencies = dimsys_SI.get_dimensional_dependencies(SI.get_dimensional_expr(found_unit.quantity()))
+    return frozenset((str(d.name), power) for d, power in dependencies.items())
+
+
+@lru_cache(maxsize=None)
+def unit(spec):
+    """Unit("m/s^2") for the catalog's own units: symbols, / and ^ only."""
+    factors = []
+    for i, part in enumerate(re.split(r"\s*/\s*", spec)):
+        for token in filter(None, part.split("*")):
+            symbol, _, power = token.strip().partition("^")
+            factors.append((symbol, int(power or 1) * (-1 if i else 1)))
+    return Unit(tuple(factors))
+
+
+def _power(text):
+    text = (text or "").replace("^", "").replace(" ", "").translate(SUPERSCRIPTS)
+    return int(text) if text else 1
+
+
+def read_unit(text, position):
+    """(Unit, end) for the unit written at text[position:], or (None, position). "m/s^2", "m·s⁻²", "kJ", "ohms"."""
+    factors, end, divide = [], position, False
+    while True:
+        gap = re.match(r"\s?" if not factors else r"\s*(?P<sep>/|·|⋅|\.(?=\S)|\*)\s*|(?P<space> )(?=\S+?[-−⁻^\d])",
+                       text[end:])
+        if gap is None:
+            break
+        match = UNIT_TOKEN.match(text, end + gap.end())
+        if match is None:
+            break
+        name, power = match.group("name"), match.group("power")
+        symbol = name if name in UNITS else UNIT_WORDS.get(name.lower().rstrip("s")) or UNIT_WORDS.get(name.lower())
+        if symbol is None or (symbol != name and power):
+            break
+        if factors and symbol != name:
+            break                                  # "4 m in 2 seconds": "in" ends the unit, words don't chain
+        if gap.groupdict().get("sep") == "/":
+            divide = True
+        factors.append((symbol, _power(power) * (-1 if divide else 1)))
+        end = match.end()
+    return (Unit(tuple(factors)), end) if factors else (None, position)
+
+
+# --- 2. THE CATALOG ---
+class Quantity(NamedTuple):
+    name: str
+    latex: str
+    unit: str                     # SI unit the formulas work in
+    words: Tuple[str, ...] = ()   # how a question names it, most specific first
+    value: Optional[float] = None  # constants: used when the problem doesn't give one
+
+
+QUANTITIES = {
+    "vi": Quantity("initial velocity", "v_i", "m/s", ("initial velocity", "initial speed", "initially")),
+    "vf": Quantity("final velocity", "v_f", "m/s", ("final velocity", "final speed", "velocity", "speed")),
+    "v": Quantity("velocity", "v", "m/s", ("velocity", "speed", "moving at", "travels at", "travelling at")),
+    "vav": Quantity("average speed", r"v_{av}", "m/s", ("average speed", "average velocity", "speed")),
+    "a": Quantity("acceleration", "a", "m/s^2", ("acceleration", "decelerat")),
+    "t": Quantity("time", r"\Delta t", "s", ("time", "how long")),
+    "d": Quantity("displacement", r"\Delta x", "m", ("displacement", "distance", "how far")),
+    "h": Quantity("height", "h", "m", ("height", "how high", "high")),
+    "m": Quantity("mass", "m", "kg", ("mass", "what mass", "how many grams")),
+    "F": Quantity("force", r"F_{net}", "N", ("net force", "force")),
+    "w": Quantity("weight", "w", "N", ("weight",)),
+    "p": Quantity("momentum", "p", "kg*m/s", ("momentum",)),
+    "Ek": Quantity("kinetic energy", r"E_k", "J", ("kinetic energy",)),
+    "Ep": Quantity("potential energy", r"E_p", "J", ("potential energy",)),
+    "Wd": Quantity("work done", "W", "J", ("work done", "work")),
+    "P": Quantity("power", "P", "W", ("power",)),
+    "V": Quantity("potential difference", "V", "V", ("potential difference", "voltage", "emf")),
+    "I": Quantity("current", "I", "A", ("current",)),
+    "R": Quantity("resistance", "R", "Ω", ("resistance",)),
+    "Q": Quantity("charge", "Q", "C", ("charge",)),
+    "f": Quantity("frequency", "f", "Hz", ("frequency",)),
+    "T": Quantity("period", "T", "s", ("period",)),
+    "lam": Quantity("wavelength", r"\lambda", "m", ("wavelength",)),
+    "rho": Quantity("density", r"\rho", "kg/m^3", ("density",)),
+    "n": Quantity("amount of substance", "n", "mol", ("number of moles", "amount of substance", "moles", "mol")),
+    "M": Quantity("molar mass", "M", "kg/mol", ("molar mass",)),
+    "N": Quantity("number of particles", "N", "", ("number of particles", "number of molecules",
+                                                   "number of atoms", "how many molecules", "how many atoms",
+                                                   "how many particles")),
+    "c": Quantity("concentration", "c", "mol/m^3", ("concentration", "molarity")),
+    "vol": Quantity("volume", "V", "m^3", ("volume",)),
+    "pr": Quantity("pressure", "p", "Pa", ("pressure",)),
+    "temp": Quantity("temperature", "T", "K", ("temperature",)),
+    "p1": Quantity("initial pressure", "p_1", "Pa", ("initial pressure",)),
+    "p2": Quantity("final pressure", "p_2", "Pa", ("new pressure", "final pressure", "pressure")),
+    "v1": Quantity("initial volume", "V_1", "m^3", ("initial volume",)),
+    "v2": Quantity("final volume", "V_2", "m^3", ("new volume", "final volume", "volume")),
+    "t1": Quantity("initial temperature", "T_1", "K", ("initial temperature",)),
+    "t2": Quantity("final temperature", "T_2", "K", ("new temperature", "final temperature", "temperature")),
+    # Constants, from the CAPS data sheet
+    "g": Quantity("gravitational acceleration", "g", "m/s^2", value=9.8),
+    "NA": Quantity("Avogadro's number", r"N_A", "/mol", value=6.02e23),
+    "Rgas": Quantity("gas constant", "R", "J/mol/K", value=8.31),
+    "Vm": Quantity("molar gas volume at STP", r"V_m", "m^3/mol", value=22.4e-3),
+}
+
+# Known values stated in words
+FACTS = [
+    (re.compile(r"\bfrom rest\b|\b(?:is|was) dropped\b|\breleased\b"), "vi", 0.0),
+    (re.compile(r"\bcomes? to (?:a )?(?:rest|stop|standstill)\b|\b(?:stops|brought to rest)\b"), "vf", 0.0),
+]
+
+
+class Formula(NamedTuple):
+    name: str
+    equation: str                 # SymPy syntax over the QUANTITIES keys
+    latex: str                    # <key> is replaced by the quantity's symbol, then by its value
+    units: dict = {}              # key -> unit shown in the memo, when not the SI one
+    when: Optional[str] = None    # only for problems that mention this (regex)
+
+
+DM3 = {"vol": "dm^3", "c": "mol/dm^3"}
+GAS = {"p1": "kPa", "p2": "kPa", "v1": "dm^3", "v2": "dm^3"}
+
+# Tried in order; among formulas that fit, the one using the most given values wins
+FORMULAS = [
+    Formula("equation of motion", "vf = vi + a*t", "<vf> = <vi> + <a><t>"),
+    Formula("equation of motion", "d = vi*t + a*t**2/2", r"<d> = <vi><t> + \frac{1}{2}<a><t>^2"),
+    Formula("equation of motion", "vf**2 = vi**2 + 2*a*d", "<vf>^2 = <vi>^2 + 2<a><d>"),
+    Formula("equation of motion", "d = (vi + vf)/2*t", r"<d> = \left(\frac{<vi> + <vf>}{2}\right)<t>"),
+    Formula("average speed", "vav = d/t", r"<vav> = \frac{<d>}{<t>}"),
+    Formula("Newton's second law", "F = m*a", "<F> = <m><a>"),
+    Formula("weight", "w = m*g", "<w> = <m><g>"),
+    Formula("momentum", "p = m*v", "<p> = <m><v>"),
+    Formula("kinetic energy", "Ek = m*v**2/2", r"<Ek> = \frac{1}{2}<m><v>^2"),
+    Formula("gravitational potential energy", "Ep = m*g*h", "<Ep> = <m><g><h>"),
+    Formula("work", "Wd = F*d", "<Wd> = <F><d>"),
+    Formula("power", "P = Wd/t", r"<P> = \frac{<Wd>}{<t>}"),
+    Formula("Ohm's law", "V = I*R", "<V> = <I><R>"),
+    Formula("electrical power", "P = V*I", "<P> = <V><I>"),
+    Formula("electrical power", "P = I**2*R", "<P> = <I>^2<R>"),
+    Formula("electrical power", "P = V**2/R", r"<P> = \frac{<V>^2}{<R>}"),
+    Formula("charge", "Q = I*t", "<Q> = <I><t>"),
+    Formula("wave equation", "v = f*lam", r"<v> = <f><lam>"),
+    Formula("period", "T = 1/f", r"<T> = \frac{1}{<f>}"),
+    Formula("density", "rho = m/vol", r"<rho> = \frac{<m>}{<vol>}"),
+    Formula("moles from mass", "n = m/M", r"<n> = \frac{<m>}{<M>}", {"m": "g", "M": "g/mol"}),
+    Formula("moles from particles", "n = N/NA", r"<n> = \frac{<N>}{<NA>}"),
+    Formula("concentration", "c = n/vol", r"<c> = \frac{<n>}{<vol>}", DM3),
+    Formula("concentration", "c = m/(M*vol)", r"<c> = \frac{<m>}{<M><vol>}",
+            {**DM3, "m": "g", "M": "g/mol"}),
+    Formula("molar gas volume", "n = vol/Vm", r"<n> = \frac{<vol>}{<Vm>}",
+            {"vol": "dm^3", "Vm": "dm^3/mol"}, when=r"\bstp\b"),
+    Formula("ideal gas law", "pr*vol = n*Rgas*temp", "<pr><vol> = <n><Rgas><temp>"),
+    Formula("Boyle's law", "p1*v1 = p2*v2", "<p1><v1> = <p2><v2>", GAS),
+    Formula("Charles's law", "v1/t1 = v2/t2", r"\frac{<v1>}{<t1>} = \frac{<v2>}{<t2>}", GAS),
+    Formula("pressure-temperature law", "p1/t1 = p2/t2", r"\frac{<p1>}{<t1>} = \frac{<p2>}{<t2>}", GAS),
+    Formula("general gas equation", "p1*v1/t1 = p2*v2/t2",
+            r"\frac{<p1><v1>}{<t1>} = \frac{<p2><v2>}{<t2>}", GAS),
+]
+
+# Relative atomic masses (g/mol), as on the CAPS periodic table
+ATOMIC_MASS = {
+    "H": 1, "He": 4, "Li": 7, "Be": 9, "B": 11, "C": 12, "N": 14, "O": 16, "F": 19, "Ne": 20, "Na": 23, "Mg": 24,
+    "Al": 27, "Si": 28, "P": 31, "S": 32, "Cl": 35.5, "Ar": 40, "K": 39, "Ca": 40, "Mn": 55, "Fe": 56, "Cu": 63.5,
+    "Zn": 65, "Br": 80, "Ag": 108, "I": 127, "Ba": 137, "Pb": 207,
+}
+SUBSTANCES = {
+    "water": "H2O", "carbon dioxide": "CO2", "sodium chloride": "NaCl", "sodium hydroxide": "NaOH",
+    "hydrochloric acid": "HCl", "sulphuric acid": "H2SO4", "sulfuric acid": "H2SO4", "nitric acid": "HNO3",
+    "calcium carbonate": "CaCO3", "ammonia": "NH3", "methane": "CH4", "glucose": "C6H12O6", "oxygen": "O2",
+    "hydrogen": "H2", "nitrogen": "N2", "chlorine": "Cl2", "magnesium": "Mg", "copper": "Cu", "iron": "Fe",
+    "zinc": "Zn", "sodium": "Na", "carbon": "C", "potassium permanganate": "KMnO4",
+}
+CHEMICAL = re.compile(r"\b(?:[A-Z][a-z]?\d*|\((?:[A-Z][a-z]?\d*)+\)\d*)+\b")
+
+
+# --- 3. READING THE PROBLEM ---
+class Given(NamedTuple):
+    value: float
+    unit: Unit
+    start: int
+    context: str        # the words just before the number: "with an initial velocity of"
+
+
+def _number(match):
+    mantissa = float(match.group("mantissa").replace("−", "-").replace(",", "."))
+    exponent = match.group("exponent") or match.group("e")
+    if exponent:
+        mantissa *= 10 ** int(exponent.replace(" ", "").translate(SUPERSCRIPTS))
+    return mantissa
+
+
+def givens(text):
+    """Every number in the problem that carries a unit (or counts particles)."""
+    found, previous = [], 0
+    for match in NUMBER.finditer(text):
+        value, end = _number(match), match.end()
+        celsius = CELSIUS.match(text, end)
+        if celsius:
+            found_unit, value = unit("K"), value + 273
+        else:
+            found_unit, end = read_unit(text, end)
+            if found_unit is None:
+                count = re.match(r"\s*(\w+)", text[end:])
+                if not count or count.group(1).lower().rstrip("s") not in COUNT_WORDS:
+                    continue
+                found_unit = Unit(())
+        # Back to the previous quantity or the start of the sentence, whichever is nearer
+        before = re.split(r"[.;:!?]\s", text[max(previous, match.start() - 60):match.start()])[-1]
+        found.append(Given(value, found_unit, match.start(), before.lower()))
+        previous = end
+    return found
+
+
+def _question(text):
+    # The sentence that asks: named quantities there are what to find, not what is given
+    sentences = [s for s in re.split(r"(?<=[.?!])\s+", text) if s.strip()]
+    for sentence in reversed(sentences):
+        if re.search(r"\b(?:calculate|determine|find|what|how|work out|show)\b", sentence, re.IGNORECASE):
+            return sentence
+    return sentences[-1] if sentences else ""
+
+
+def targets(text):
+    """Keys of the quantities the question asks for, best match first."""
+    question = _question(text).lower()
+    found = []
+    for key, quantity in QUANTITIES.items():
+        matches = [(m.start(), -len(word)) for word in quantity.words
+                   for m in [re.search(rf"\b{re.escape(word)}", question)] if m]
+        if matches:
+            # The first quantity named after "calculate" is the one asked for; at the same place,
+            # the longer name is the more specific ("final velocity" over "velocity")
+            found.append((*min(matches), key))
+    return [key for _, _, key in sorted(found)]
+
+
+def asked_unit(text, key):
+    """The unit the question wants the answer in ("... in km/h"), or None. Only a unit for this quantity counts."""
+    question = _question(text)
+    for match in re.finditer(r"\b(?:in|to)\s+(?:units\s+of\s+)?", question, re.IGNORECASE):
+        found, _ = read_unit(question, match.end() - 1)
+        if found is not None and found.dimension() == _dimension(key):
+            return found
+    return None
+
+
+def molar_mass(formula):
+    """(M in g/mol, LaTeX working) for a chemical formula such as "H2SO4" or "Ca(OH)2", else None."""
+    counts = {}
+
+    def add(part, times):
+        for element, count in re.findall(r"([A-Z][a-z]?)(\d*)", part):
+            if element not in ATOMIC_MASS:
+                raise KeyError(element)
+            counts[element] = counts.get(element, 0) + int(count or 1) * times
+
+    try:
+        rest = formula
+        for group, times in re.findall(r"\(([^)]*)\)(\d*)", formula):
+            add(group, int(times or 1))
+        rest = re.sub(r"\([^)]*\)\d*", "", rest)
+        add(rest, 1)
+    except KeyError:
+        return None
+    mass = sum(ATOMIC_MASS[e] * n for e, n in counts.items())
+    terms = " + ".join(f"{n}({_latex_number(ATOMIC_MASS[e])})" if n > 1 else _latex_number(ATOMIC_MASS[e])
+                       for e, n in counts.items())
+    name = re.sub(r"(\d+)", r"_{\1}", formula)
+    working = rf"M(\mathrm{{{name}}}) = {terms} = {_latex_number(mass)}\ \text{{g}}\cdot \text{{mol}}^{{-1}}"
+    return mass, working
+
+
+def substance(text):
+    # The chemical the problem is about: a formula as written ("H2SO4"), else a name ("water")
+    for match in CHEMICAL.finditer(text):
+        written = match.group(0)
+        if (re.search(r"\d", written) or len(re.findall(r"[A-Z]", written)) > 1) and molar_mass(written):
+            return written
+    lowered = text.lower()
+    for name in sorted(SUBSTANCES, key=len, reverse=True):
+        if re.search(rf"\b{name}\b", lowered):
+            return SUBSTANCES[name]
+    return None
+
+
+# --- 4. SOLVING ---
+class FormulaAnswer(NamedTuple):
+    result: str                   # "Formula Result: final velocity = 15 m·s⁻¹ (equation of motion)"
+    lines: Tuple[str, ...]        # the memo, one LaTeX line each (without $$)
+    formula: str                  # catalog name: "equation of motion"
+
+
+def _number_parts(value):
+    # 4 significant figures; written out between 0.001 and a million, else as (mantissa, exponent)
+    if value == 0 or 1e-3 <= abs(value) < 1e6:
+        decimals = max(0, 3 - math.floor(math.log10(abs(value)))) if value else 0
+        text = f"{round(value, decimals):.{decimals}f}"
+        return (text.rstrip("0").rstrip(".") if "." in text else text), None
+    mantissa, exponent = format(value, ".3e").split("e")
+    return mantissa.rstrip("0").rstrip("."), int(exponent)
+
+
+def _latex_number(value):
+    mantissa, exponent = _number_parts(value)
+    return mantissa if exponent is None else rf"{mantissa} \times 10^{{{exponent}}}"
+
+
+def _text_number(value):
+    mantissa, exponent = _number_parts(value)
+    return mantissa if exponent is None else f"{mantissa} × 10^{exponent}"
+
+
+def _convert(value, source, target):
+    # value in `source` units -> the same amount in `target` units
+    from sympy.physics.units import convert_to
+    if source.factors == target.factors:
+        return value
+    converted = convert_to(source.quantity(), target.quantity() if target.factors else [])
+    return value * float(converted / target.quantity()) if target.factors else value * float(converted)
+
+
+def _dimension(key):
+    spec = QUANTITIES[key].unit
+    return unit(spec).dimension() if spec else frozenset()
+
+
+def _score(given, key):
+    # How clearly the words before a number name this quantity: the length of the longest name found
+    return max((len(word) for word in QUANTITIES[key].words if word in given.context), default=0)
+
+
+def _match(keys, candidates):
+    """
+    Given values for quantities of the same kind (vi and vf, p1 and p2): as many as possible,
+    each where the words before it name it best, else in the order they were written.
+    """
+    pool = candidates + [None] * len(keys)
+
+    def rank(choice):
+        picked = [(key, g) for key, g in zip(keys, choice) if g is not None]
+        in_order = all(a[1].start < b[1].start for a, b in zip(picked, picked[1:]))
+        return len(picked), sum(_score(g, key) for key, g in picked), in_order
+
+    return dict(zip(keys, max(permutations(pool, len(keys)), key=rank)))
+
+
+def _assign(formula, target, found, text):
+    """(equation, {key: (value in SI units, source)}, values used) for a formula, or None if it doesn't fit."""
+    from sympy import Symbol, sympify
+    symbols = {key: Symbol(key) for key in QUANTITIES}
+    equation = tuple(sympify(side, locals=symbols) for side in formula.equation.split("="))
+    needed = sorted((str(s) for s in equation[0].free_symbols | equation[1].free_symbols),
+                    key=lambda key: re.search(rf"\b{key}\b", formula.equation).start())
+    if target not in needed:
+        return None
+    assigned = {}
+    lowered = text.lower()
+    for pattern, key, value in FACTS:
+        if key in needed and key != target and pattern.search(lowered):
+            assigned[key] = (value, "fact")
+    unknown = [key for key in needed if key != target and key not in assigned]
+    picks = {}
+    for dimension in dict.fromkeys(_dimension(key) for key in unknown):
+        keys = [key for key in unknown if _dimension(key) == dimension]
+        picks.update(_match(keys, [g for g in found if g.unit.dimension() == dimension]))
+    for key in unknown:
+        quantity, pick = QUANTITIES[key], picks.get(key)
+        if pick is not None:
+            assigned[key] = (_convert(pick.value, pick.unit, _si(key)), "given")
+        elif key == "M" and substance(text):
+            mass, working = molar_mass(substance(text))
+            assigned[key] = (mass / 1000, working)
+        elif quantity.value is not None:
+            assigned[key] = (quantity.value, "constant")
+        else:
+            return None
+    used = sum(pick is not None for pick in picks.values())
+    if not used:
+        return None
+    return equation, assigned, used
+
+
+def _solve(equation, target, assigned):
+    from sympy import Eq, Symbol, solve
+    values = {Symbol(key): value for key, (value, _) in assigned.items()}
+    roots = []
+    for root in solve(Eq(*equation), Symbol(target)):
+        value = root.subs(values)
+        if value.is_real:
+            roots.append(float(value))
+    # The physical root: not a negative time, or the negative side of a square root
+    roots.sort(key=lambda r: r < 0)
+    return roots[0] if roots else None
+
+
+def _shown(formula, key):
+    # The unit a quantity is written in on this formula's memo
+    spec = formula.units.get(key, QUANTITIES[key].unit)
+    return unit(spec) if spec else Unit(())
+
+
+def _si(key):
+    return unit(QUANTITIES[key].unit) if QUANTITIES[key].unit else Unit(())
+
+
+def _memo(formula, target, assigned, answer, asked=None):
+    """
+    The memo lines: molar mass working if needed, the formula, the substitution, the answer.
+    asked: the unit the question wants the answer in, converted to on the last line
+    """
+    def fill(values):
+        return re.sub(r"<(\w+)>", lambda m: values[m.group(1)], formula.latex)
+
+    lines = [source for _, source in assigned.values() if source.startswith("M(")]
+    lines.append(fill({key: QUANTITIES[key].latex for key in [target, *assigned]}))
+    substituted = {key: f"({_latex_number(_convert(value, _si(key), _shown(formula, key)))})"
+                   for key, (value, _) in assigned.items()}
+    lines.append(fill({target: QUANTITIES[target].latex, **substituted}))
+    shown = _shown(formula, target)
+    value = _convert(answer, _si(target), shown)
+    last = f"{QUANTITIES[target].latex} = {_latex_number(value)}" + (rf"\ {shown.latex()}" if shown.factors else "")
+    if asked is not None and asked.factors != shown.factors:
+        value, shown = _convert(value, shown, asked), asked
+        last += rf" = {_latex_number(value)}\ {shown.latex()}"
+    lines.append(last)
+    result = (f"{FORMULA_RESULT}: {QUANTITIES[target].name} = {_text_number(value)}"
+              + (f" {shown.text()}" if shown.factors else "") + f" ({formula.name})")
+    return FormulaAnswer(result, tuple(lines), formula.name)
+
+
+@lru_cache(maxsize=2048)
+def solve_formula(text):
+    """FormulaAnswer for a word problem the catalog covers, else None."""
+    found = givens(text)
+    lowered = text.lower()
+    for target in targets(text):
+        best = None
+        for formula in FORMULAS:
+            if formula.when and not re.search(formula.when, lowered):
+                continue
+            fitted = _assign(formula, target, found, text)
+            # Among formulas that fit, the one that uses the most of the given values
+            if fitted is not None and (best is None or fitted[2] > best[1][2]):
+                best = (formula, fitted)
+        if best is None:
+            continue
+        formula, (equation, assigned, _) = best
+        answer = _solve(equation, target, assigned)
+        if answer is not None:
+            return _memo(formula, target, assigned, answer, asked_unit(text, target))
+    return None
@@ -0,0 +1,391 @@
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from contextlib import nullcontext
+
+from tutor_ed.cache import make_key
+from tutor_ed.chunking import CHUNK_WORKERS, Chunk, is_long, split_essay, split_paragraphs, structure_summary
+from tutor_ed.grammar_rules import default_engine
+from tutor_ed.marks import (Feedback, FeedbackView, PartialJson, format_errors, loads, locate, merge,
+                            read_errors, read_feedback, repair_schema, review_reason)
+from tutor_ed.metrics import metrics
+from tutor_ed.models import BHALA_MODEL, KEEP_ALIVE, TUTOR_MODEL
+from tutor_ed.prompts import FEEDBACK, GRAMMAR, REPAIR, REVIEW
+from tutor_ed.scheduler import ServerBusy
+
+LLM_MODEL = BHALA_MODEL
+LLM_TIMEOUT = 120  # seconds each generation may take before we give up on it
+MAX_REPAIRS = 1    # follow-ups asking for fields missing from a JSON reply
+
+# Who marks (TUTOR_ED_MARKING), per deployment:
+#   full   - LLM_MODEL does everything
+#   tiered - DRAFT_MODEL drafts the grammar and feedback; LLM_MODEL only redoes a draft that can't
+#            be read and reviews feedback whose score is borderline (tutor_ed.marks.review_reason)
+#   review - as tiered, but LLM_MODEL reviews every feedback draft
+MARKING_MODES = ("full", "tiered", "review")
+MARKING_MODE = os.environ.get("TUTOR_ED_MARKING", "full")
+DRAFT_MODEL = os.environ.get("TUTOR_ED_DRAFT_MODEL", TUTOR_MODEL)
+
+
+class Reset(str):
+    """Markdown that replaces everything the stream has shown so far (a reviewed draft)."""
+
+
+class BhalaSmartGrader:
+    def __init__(self, timeout=LLM_TIMEOUT, cache=None, scheduler=None, session_id="default", client=None,
+                 mode=MARKING_MODE):
+        if mode not in MARKING_MODES:
+            raise ValueError(f"Unknown marking mode {mode!r} (expected one of {', '.join(MARKING_MODES)}).")
+        self.mode = mode
+        # What happened to the drafts ("grammar_draft", "feedback_reviewed", ...), for the quality benchmark
+        self.tiers = Counter()
+        self.timeout = timeout
+        self.cache = cache
+        # Shared queue in front of Ollama; None = call the server directly (batch marker)
+        self.scheduler = scheduler
+        self.session_id = session_id
+        if client is None:
+            # The client timeout aborts a connection that stops sending tokens
+            import ollama  # deferred: only pay for httpx/pydantic when marking actually starts
+            client = ollama.Client(timeout=timeout)
+        self.client = client
+        self.cancel_event = threading.Event()
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        # Any generation still running stops at its next token
+        self.cancel_event.set()
+
+    def _slot(self, on_wait):
+        if self.scheduler is None:
+            return nullcontext()
+
+        def waiting(position, eta):
+            # Leave the queue straight away if the student has moved on
+            if self.cancel_event.is_set():
+                raise RuntimeError("Marking was cancelled.")
+            if on_wait is not None:
+                on_wait(position, eta)
+
+        return self.scheduler.slot(self.session_id, waiting)
+
+    def _count(self, event):
+        with self.lock:
+            self.tiers[event] += 1
+
+    def _stream(self, template, text, on_wait=None, missing=None, reply=None, model=LLM_MODEL, fields=None):
+        """
+        The model's raw reply, as it streams. With missing/reply set, this is a
+        repair: the first reply goes back to the model, which is asked for the
+        missing fields only (the prompt up to there is unchanged, so Ollama
+        reuses what it has already evaluated).
+        fields: the template's user-turn fields besides the text (REVIEW's draft)
+        """
+        schema = template.schema
+        messages = template.messages(text=text, **(fields or {}))
+        options = dict(fields) if fields else None
+        if missing:
+            schema = repair_schema(schema, missing)
+            messages += [{'role': 'assistant', 'content': reply},
+                         {'role': 'user', 'content': REPAIR.format(fields=", ".join(missing))}]
+            options = {**(options or {}), "repair": missing, "reply": reply}
+        operation = template.name if model == LLM_MODEL else f"{template.name}_draft"
+
+        # Same essay + same prompt + same model = same answer, straight from disk
+        key = make_key(model, template.system, text, options)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        parts = []
+        with self._slot(on_wait) as ticket:
+            # Deadline and cancel are checked per token, so a stuck generation can be dropped mid-way.
+            # The clock starts once we have a slot: time spent in the queue doesn't count.
+            deadline = time.monotonic() + self.timeout
+            stream = metrics.chat(
+                self.client,
+                f"{operation}_repair" if missing else operation,
+                queue_wait=ticket.waited if ticket is not None else None,
+                model=model,
+                messages=messages,
+                format=schema,
+                stream=True,
+                keep_alive=KEEP_ALIVE
+            )
+            try:
+                for chunk in stream:
+                    if self.cancel_event.is_set():
+                        raise RuntimeError("Marking was cancelled.")
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"No result after {self.timeout}s.")
+                    delta = chunk['message']['content']
+                    parts.append(delta)
+                    yield delta
+            finally:
+                stream.close()
+        # Only a complete answer is worth keeping
+        if self.cache is not None:
+            self.cache.put(key, "".join(parts))
+
+    def _repaired(self, template, text, reply, read, on_wait, model=LLM_MODEL, extra=None):
+        # (fields, missing) after at most MAX_REPAIRS follow-ups for the missing fields
+        data = loads(reply) or {}
+        fields, missing = read(data)
+        for _ in range(MAX_REPAIRS):
+            if not missing:
+                break
+            data = merge(dict(data), loads("".join(self._stream(template, text, on_wait, missing, reply, model, extra))))
+            fields, missing = read(data)
+        return fields, missing
+
+    def check_rules(self, text):
+        # Deterministic pre-pass: milliseconds, no model call, character offsets included
+        return default_engine.check(text)
+
+    # --- GRAMMAR ---
+    def _grammar_items(self, chunk, on_wait):
+        if self.mode != "full":
+            # The draft stands unless it can't be read even after a repair: then LLM_MODEL checks the chunk
+            reply = "".join(self._stream(GRAMMAR, chunk.text, on_wait, model=DRAFT_MODEL))
+            items, missing = self._repaired(GRAMMAR, chunk.text, reply, read_errors, on_wait, DRAFT_MODEL)
+            self._count("grammar_escalated" if missing else "grammar_draft")
+            if not missing:
+                return items
+        reply = "".join(self._stream(GRAMMAR, chunk.text, on_wait))
+        items, missing = self._repaired(GRAMMAR, chunk.text, reply, read_errors, on_wait)
+        if missing:
+            raise ValueError(f"The grammar check for {chunk.label or 'the essay'} could not be read.")
+        return items
+
+    def _chunk_items(self, chunks, on_wait, kept=None):
+        # One grammar request per chunk, all in flight together (the scheduler still caps the server).
+        # kept: the errors per chunk from an earlier marking, None where the model must be asked
+        kept = kept or [None] * len(chunks)
+        pool = ThreadPoolExecutor(max_workers=CHUNK_WORKERS)
+        futures = [
+            pool.submit(self._grammar_items, chunk, on_wait) if items is None else None
+            for chunk, items in zip(chunks, kept)
+        ]
+        try:
+            for chunk, items, future in zip(chunks, kept, futures):
+                yield chunk, items if future is None else future.result()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _stream_chunked_grammar(self, chunks, on_wait, kept=None, replies=None):
+        """
+        Markdown per section, in essay order, each as soon as it (and those
+        before it) are done. Returns the GrammarErrors.
+        replies: collects (chunk, items) for the caller
+        """
+        seen = set()
+        errors = []
+        for chunk, items in self._chunk_items(chunks, on_wait, kept):
+            if replies is not None:
+                replies.append((chunk, items))
+            found = locate(chunk, items, seen)
+            errors += found
+            if found:
+                yield format_errors(chunk.label, found)
+        if not errors:
+            yield "✅ No mechanical errors found."
+        return errors
+
+    def _grammar_chunks(self, text):
+        # Long essays are checked section by section so each prompt stays small
+        chunks = split_essay(text)
+        if is_long(text) and len(chunks) > 1:
+            return chunks
+        return [Chunk("", 0, len(text), text)]
+
+    def stream_grammar(self, text, on_wait=None):
+        return self._stream_chunked_grammar(self._grammar_chunks(text), on_wait)
+
+    def stream_revised_grammar(self, text, revision, on_wait=None):
+        # Paragraphs unchanged since the last marking reuse their errors; only edited ones go to the model
+        units = split_paragraphs(text)
+        if len(units) == 1:
+            units = [units[0]._replace(label="")]  # one paragraph: no heading needed
+        kept = revision.kept_grammar(units)
+        if all(items is None for items in kept):
+            # Nothing to reuse (a first marking): the usual check, one call for a short essay,
+            # with its errors filed under the paragraphs they fall in for next time
+            errors = yield from self.stream_grammar(text, on_wait)
+            revision.keep_grammar(_by_paragraph(units, errors))
+            return errors
+        replies = []
+        errors = yield from self._stream_chunked_grammar(units, on_wait, kept, replies)
+        revision.keep_grammar(replies)
+        return errors
+
+    # --- FEEDBACK ---
+    def _feedback_fields(self, template, prompt_text, on_wait, model=LLM_MODEL, extra=None, reset=False):
+        """
+        Markdown for the comments and rubric as they arrive. Returns (fields, missing).
+        reset: the first markdown replaces what was shown before (a Reset)
+        """
+        view = FeedbackView()
+        reading = PartialJson()
+        parts = []
+        for delta in self._stream(template, prompt_text, on_wait, model=model, fields=extra):
+            parts.append(delta)
+            shown = view.update(reading.feed(delta))
+            if shown:
+                yield Reset(shown) if reset else shown
+                reset = False
+        fields, missing = self._repaired(template, prompt_text, "".join(parts), read_feedback, on_wait, model, extra)
+        if "comments" in missing and not fields["rubric"]:
+            return fields, missing
+        rest = view.update(fields, final=True)
+        if rest:
+            yield Reset(rest) if reset else rest
+        return fields, missing
+
+    def _reviewed(self, prompt_text, on_wait):
+        """
+        Tiered feedback: DRAFT_MODEL's draft streams first. It stands when it
+        reads cleanly and its score isn't borderline; otherwise LLM_MODEL
+        takes over, reviewing a readable draft or marking afresh.
+        """
+        fields, missing = yield from self._feedback_fields(FEEDBACK, prompt_text, on_wait, DRAFT_MODEL)
+        unreadable = "comments" in missing and not fields["rubric"]
+        if unreadable or "score" in missing:
+            self._count("feedback_escalated")
+            yield f"\n_🔁 The quick draft could not be read, so {LLM_MODEL} is marking this essay..._\n"
+            return (yield from self._feedback_fields(FEEDBACK, prompt_text, on_wait, reset=True))
+        reason = review_reason(fields) or ("" if self.mode == "tiered" else "goes to review")
+        if not reason:
+            self._count("feedback_draft")
+            return fields, missing
+        self._count("feedback_reviewed")
+        yield f"\n_🔎 The quick draft {reason}: {LLM_MODEL} is checking it..._\n"
+        draft = json.dumps({name: fields[name] for name in ("comments", "rubric", "score") if name in fields})
+        reviewed, still = yield from self._feedback_fields(REVIEW, prompt_text, on_wait, extra={"draft": draft},
+                                                           reset=True)
+        if "score" in still:
+            # A review that can't be read doesn't undo a readable draft
+            yield Reset(FeedbackView().update(fields, final=True))
+            return fields, missing
+        return reviewed, still
+
+    def stream_feedback(self, text, on_wait=None):
+        """Markdown for the comments and rubric as they arrive. Returns the Feedback."""
+        # Long essays get an outline instead of the full text; the score stays essay-level
+        prompt_text = structure_summary(text) if is_long(text) else text
+        if self.mode == "full":
+            fields, missing = yield from self._feedback_fields(FEEDBACK, prompt_text, on_wait)
+        else:
+            fields, missing = yield from self._reviewed(prompt_text, on_wait)
+        if "comments" in missing and not fields["rubric"]:
+            raise ValueError("The feedback could not be read. Please try again.")
+        return Feedback(tuple(fields.get("comments", ())), fields["rubric"], fields.get("score"))
+
+    def stream_revised_feedback(self, text, revision, on_wait=None):
+        # Small edits keep the feedback (and score) written for the earlier version
+        units = split_paragraphs(text)
+        if not revision.needs_feedback(units):
+            revision.feedback_kept = True
+            feedback = Feedback(tuple(revision.feedback["comments"]), revision.feedback["rubric"],
+                                revision.feedback["score"])
+            yield FeedbackView().update(feedback._asdict(), final=True)
+            return feedback
+        feedback = yield from self.stream_feedback(text, on_wait)
+        revision.keep_feedback(units, feedback._asdict())
+        return feedback
+
+    # --- WHOLE RESULTS (batch marker) ---
+    def grammar_issues(self, text):
+        # Structured grammar findings (section + essay offsets)
+        return _drain(self.stream_grammar(text))[1]
+
+    def feedback(self, text):
+        return _drain(self.stream_feedback(text))[1]
+
+    def check_grammar(self, text):
+        return _drain(self.stream_grammar(text))[0]
+
+    def check_feedback(self, text):
+        return _drain(self.stream_feedback(text))[0]
+
+    def mark_streaming(self, text, revision=None):
+        """
+        Runs the grammar and feedback streams side by side.
+        Yields (name, delta, state) as output arrives. state is "queued" (delta
+        is a "you are #N in line" note) while waiting for the scheduler,
+        "token" while streaming (delta is markdown), "reset" when the markdown
+        so far is replaced (a reviewed draft, delta is the new start), "result" once finished
+        (delta is the list of GrammarErrors, or the Feedback), then "done",
+        or "error" with the message in delta.
+        revision: a tutor_ed.revisions.Revision, to re-mark only what was edited.
+        """
+        events = queue.Queue()
+
+        def pump(name, start_stream):
+            def waiting(position, eta):
+                events.put((name, f"⏳ You are #{position} in line (about {eta:.0f}s)...", "queued"))
+            try:
+                stream = start_stream(text, on_wait=waiting)
+                while True:
+                    try:
+                        delta = next(stream)
+                        events.put((name, delta, "reset" if isinstance(delta, Reset) else "token"))
+                    except StopIteration as finished:
+                        events.put((name, finished.value, "result"))
+                        break
+                events.put((name, "", "done"))
+            except ServerBusy as e:
+                events.put((name, str(e), "error"))
+            except Exception as e:
+                events.put((name, f"⚠️ Error: {str(e)}", "error"))
+
+        pool = ThreadPoolExecutor(max_workers=2)
+        if revision is not None:
+            pool.submit(pump, "grammar", lambda t, on_wait: self.stream_revised_grammar(t, revision, on_wait))
+            pool.submit(pump, "feedback", lambda t, on_wait: self.stream_revised_feedback(t, revision, on_wait))
+        else:
+            pool.submit(pump, "grammar", self.stream_grammar)
+            pool.submit(pump, "feedback", self.stream_feedback)
+        remaining = {"grammar", "feedback"}
+        try:
+            while remaining:
+                try:
+                    name, delta, state = events.get(timeout=self.timeout)
+                except queue.Empty:
+                    for name in remaining:
+                        yield name, f"⚠️ Error: No result after {self.timeout}s. Please try again.", "error"
+                    return
+                if state in ("done", "error"):
+                    remaining.discard(name)
+                yield name, delta, state
+        finally:
+            # Also runs when Streamlit stops the script (new click, page change)
+            self.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _by_paragraph(units, errors):
+    # (paragraph, items) for errors found by a whole-essay check. An error that couldn't be
+    # placed belongs to no paragraph for sure, so then nothing is kept and every paragraph is asked again
+    if any(e.start < 0 for e in errors):
+        return []
+    return [(unit, [{"text": e.text, "category": e.category, "suggestion": e.suggestion}
+                    for e in errors if unit.start <= e.start < unit.end]) for unit in units]
+
+
+def _drain(stream):
+    # (all the markdown, the result) of a grader stream
+    parts = []
+    while True:
+        try:
+            delta = next(stream)
+            if isinstance(delta, Reset):
+                parts = []
+            parts.append(delta)
+        except StopIteration as finished:
+            return "".join(parts), finished.value
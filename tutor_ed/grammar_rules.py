@@ -0,0 +1,172 @@
+import json
+import re
+from typing import NamedTuple
+
+
+class Finding(NamedTuple):
+    start: int          # character offsets into the essay
+    end: int
+    text: str
+    category: str
+    message: str
+    suggestion: str
+
+
+# --- 1. THE LEXICON ---
+# (phrase, category, message, suggestion). Spaces and hyphens inside a phrase
+# match any run of spaces/hyphens, so "sharp-sharp" also catches "sharp sharp".
+# Accepted SA English words (braai, bakkie, gogo, ubuntu...) are NOT here on purpose.
+DEFAULT_LEXICON = [
+    ("eish", "slang", "Informal South Africanism", "Leave it out, or describe the feeling formally"),
+    ("bru", "slang", "Informal South Africanism", "friend"),
+    ("yebo", "slang", "Informal South Africanism", "yes"),
+    ("sharp-sharp", "slang", "Informal South Africanism", "Leave it out in formal writing"),
+    ("mzansi", "slang", "Informal South Africanism", "South Africa"),
+    ("lekker", "slang", "Informal South Africanism", "good / enjoyable"),
+    ("laaitie", "slang", "Informal South Africanism", "child / young person"),
+    ("howzit", "slang", "Informal South Africanism", "Hello"),
+    ("jol", "slang", "Informal South Africanism", "party / celebration"),
+    ("now-now", "slang", "Informal South Africanism", "soon / in a moment"),
+    ("ja", "slang", "Informal South Africanism", "yes"),
+    ("nee", "slang", "Informal South Africanism", "no"),
+    ("gonna", "textspeak", "Informal contraction", "going to"),
+    ("wanna", "textspeak", "Informal contraction", "want to"),
+    ("gotta", "textspeak", "Informal contraction", "have to"),
+    ("coz", "textspeak", "Textspeak", "because"),
+    ("cuz", "textspeak", "Textspeak", "because"),
+    ("ain't", "textspeak", "Informal contraction", "is not / are not"),
+    ("ur", "textspeak", "Textspeak", "your / you are"),
+    ("lol", "textspeak", "Textspeak", "Leave it out"),
+    ("tbh", "textspeak", "Textspeak", "to be honest"),
+    ("borrow me", "grammar", "\"Borrow\" means to take; you lend to someone", "lend me"),
+    ("can able to", "grammar", "Double modal", "can / am able to"),
+    ("could able to", "grammar", "Double modal", "could / was able to"),
+    ("more better", "grammar", "Double comparative", "better"),
+    ("should of", "grammar", "\"of\" instead of \"have\"", "should have"),
+    ("could of", "grammar", "\"of\" instead of \"have\"", "could have"),
+    ("would of", "grammar", "\"of\" instead of \"have\"", "would have"),
+    ("discuss about", "grammar", "\"Discuss\" takes no preposition", "discuss"),
+    ("cope up with", "grammar", "Extra word", "cope with"),
+    ("emphasise on", "grammar", "\"Emphasise\" takes no preposition", "emphasise"),
+    ("irregardless", "spelling", "Not a standard word", "regardless"),
+    ("alot", "spelling", "Spelling", "a lot"),
+]
+
+# Entries that need a custom pattern instead of a plain phrase
+DEFAULT_PATTERNS = [
+    # "u" for "you", but not the U in "U.S." or "U-turn"
+    (r"u(?![.\-]\w)", "textspeak", "Textspeak", "you"),
+    # "bra" for a friend ("my bra", "hey bra", "thanks, bra!"), not the garment
+    (r"(?:(?<=my )|(?<=hey )|(?<=yo )|(?<=thanks )|(?<=, ))bra|bra(?=\s*!)", "slang",
+     "Informal South Africanism", "friend"),
+    # "cos" for "because" ("cos it was late"), not the cosine ("cos x", "cos and sin")
+    (r"cos(?=\s+(?:i|you|he|she|it|we|they|my|there|this|that)\b)", "textspeak", "Textspeak", "because"),
+]
+
+SUBORDINATORS = {"when", "if", "because", "although", "though", "after", "before", "while",
+                 "since", "as", "unless", "once", "whenever", "whereas", "even", "until",
+                 "who", "which", "whose", "where"}
+COMMA_SPLICE = re.compile(
+    r",\s+(?:i|you|he|she|it|we|they|this|that|there)\s+"
+    r"(?:am|is|are|was|were|have|has|had|will|would|can|could|do|does|did|\w+ed)\b", re.I)
+# A splice needs a complete sentence BEFORE the comma too: a subject and its
+# finite verb. "However, it is..." or "Yesterday, I walked..." have neither.
+ADVERB = r"(?:(?:\w+ly|also|always|never|often|still|just|even)\s+)?"
+SUBJECT_VERB = re.compile(
+    # "I love", "she really cooks" - whatever follows a subject pronoun is its verb...
+    r"\b(?:i|you|he|she|we|they|it)\s+" + ADVERB +
+    # ...unless the pronoun is an object ("for you and me", "thank you very much", "believe it or not")
+    r"(?!(?:and|or|but|nor|to|of|in|on|at|for|with|too|very|so|all|both|alone|again|now|here|there)\b)[a-z']+"
+    # "this is", "there was"
+    r"|\b(?:this|that|there)\s+(?:is|was|are|were|will|has|have|had)\b"
+    # "the car stopped", "my gogo cooks", "our team is"
+    r"|\b(?:the|a|an|my|our|his|her|their|your|its|this|that|these|those)\s+\w+\s+" + ADVERB +
+    r"(?:am|is|are|was|were|have|has|had|will|would|shall|should|can|could|may|might|must|do|does|did|\w+ed|\w+s)\b",
+    re.I)
+SENTENCE = re.compile(r"[^.!?\n]+[.!?]*")
+# Not the "i" of "i.e." or a list marker "(i)"
+LOWERCASE_I = re.compile(r"(?<![\w'])i(?![\w'])(?!\.\w)(?!(?<=\(i)\))|(?<![\w'])i(?='(?:m|ve|ll|d)\b)")
+RUN_ON_WORDS = 40
+
+
+def independent_clause(clause):
+    """True when the words could stand as a sentence: a subject, a finite verb, no subordinator in front."""
+    words = clause.split()
+    if not words or words[0].lower() in SUBORDINATORS:
+        return False
+    return SUBJECT_VERB.search(clause) is not None
+
+
+def _phrase_pattern(phrase):
+    parts = [re.escape(p) for p in re.split(r"[\s-]+", phrase)]
+    return r"[\s-]+".join(parts)
+
+
+# --- 2. THE ENGINE ---
+class RuleEngine:
+    """
+    Millisecond pre-pass for the grammar check.
+    The whole lexicon is one compiled alternation (longest phrase first), so
+    an essay is scanned once no matter how many entries the lexicon has.
+    """
+
+    def __init__(self, lexicon=DEFAULT_LEXICON, patterns=DEFAULT_PATTERNS):
+        self.rules = []
+        alternatives = []
+        entries = [(_phrase_pattern(p), c, m, s) for p, c, m, s in lexicon] + list(patterns)
+        # Longest first, so "can able to" wins over anything shorter it contains
+        for index, (pattern, category, message, suggestion) in enumerate(
+                sorted(entries, key=lambda e: len(e[0]), reverse=True)):
+            self.rules.append((category, message, suggestion))
+            alternatives.append(f"(?P<r{index}>{pattern})")
+        self.matcher = re.compile(r"(?<![\w'])(?:" + "|".join(alternatives) + r")(?![\w'])", re.I)
+
+    @classmethod
+    def from_file(cls, path):
+        # Teachers can extend the lexicon with a JSON list of [phrase, category, message, suggestion]
+        with open(path, "r", encoding="utf-8") as f:
+            extra = [tuple(entry) for entry in json.load(f)]
+        return cls(lexicon=DEFAULT_LEXICON + extra)
+
+    def lexicon_hits(self, text):
+        for match in self.matcher.finditer(text):
+            category, message, suggestion = self.rules[int(match.lastgroup[1:])]
+            yield Finding(match.start(), match.end(), match.group(), category, message, suggestion)
+
+    def sentence_hits(self, text):
+        for sentence in SENTENCE.finditer(text):
+            body = sentence.group()
+            words = body.split()
+            if not words:
+                continue
+            for splice in COMMA_SPLICE.finditer(body):
+                # The clause in front: back to the previous comma, semicolon or colon
+                clause = re.split(r"[,;:]", body[:splice.start()])[-1]
+                if independent_clause(clause):
+                    start = sentence.start() + splice.start()
+                    yield Finding(start, start + len(splice.group()), splice.group(), "comma splice",
+                                  "Two complete sentences joined by only a comma",
+                                  "Use a full stop, a semicolon, or a conjunction (and, but, so)")
+            if len(words) > RUN_ON_WORDS and not re.search(r"[;:]", body):
+                yield Finding(sentence.start(), sentence.end(), body.strip()[:60] + "...", "run-on",
+                              f"Very long sentence ({len(words)} words)",
+                              "Split it into two or three sentences")
+        for match in LOWERCASE_I.finditer(text):
+            yield Finding(match.start(), match.end(), "i", "capitalisation",
+                          "The pronoun \"I\" is always a capital letter", "I")
+
+    def check(self, text):
+        return sorted(list(self.lexicon_hits(text)) + list(self.sentence_hits(text)))
+
+
+def format_findings(findings):
+    if not findings:
+        return "✅ No slang or common errors found."
+    lines = []
+    for f in findings:
+        lines.append(f"- **\"{f.text}\"** ({f.category}): {f.message} → *{f.suggestion}*")
+    return "\n".join(lines)
+
+
+# Compiled once per process
+default_engine = RuleEngine()
@@ -0,0 +1,60 @@
+"""
+The plain-Python side of a graph: the default x range, and the key points
+and summary line of a tutor_ed.numeric view. No NumPy here, so the
+Ukufunda-Sci page can import it on first paint; NumPy only loads in the
+solver worker that draws the graph.
+"""
+DOMAIN = (-10.0, 10.0)       # x range when the question gives none
+
+
+def number(value):
+    # Whole numbers as whole numbers, the rest to 6 significant figures
+    if abs(value - round(value)) < 1e-9:
+        return str(int(round(value)) or 0)
+    return format(value, ".6g")
+
+
+def default_domain(intent):
+    # The range asked for ("from -3 to 3"), else DOMAIN. Plain floats only, so the page needs no SymPy.
+    if intent.bounds:
+        try:
+            low, high = sorted(float(b) for b in intent.bounds)
+            if low < high:
+                return low, high
+        except ValueError:
+            pass
+    return DOMAIN
+
+
+def key_points(view):
+    """(kind, function, x, y) rows for the page's table of key points."""
+    rows = []
+    for label, xs in view["roots"]:
+        rows += [("root", label, number(x), "0") for x in xs]
+    for label, points in view["extrema"]:
+        rows += [(f"turning point ({kind})", label, number(x), number(y)) for kind, x, y in points]
+    for label, y in view["y_intercepts"]:
+        rows.append(("y-intercept", label, "0", number(y)))
+    rows += [("intersection", "both", number(x), number(y)) for x, y in view["intersections"]]
+    return rows
+
+
+def summary(view):
+    # One line for the result box and the tutor's "verified answer"
+    parts = []
+    many = len(view["curves"]) > 1
+    for label, xs in view["roots"]:
+        name = f" of {label}" if many else ""
+        parts.append(f"roots{name} x ≈ {', '.join(map(number, xs))}" if xs else f"no roots{name}")
+    for label, points in view["extrema"]:
+        if points:
+            name = f" of {label}" if many else ""
+            parts.append(f"turning points{name}: " + ", ".join(f"{kind} ({number(x)}, {number(y)})"
+                                                                for kind, x, y in points))
+    for label, y in view["y_intercepts"]:
+        parts.append(f"y-intercept{f' of {label}' if many else ''} (0, {number(y)})")
+    if len(view["curves"]) == 2:
+        crossings = view["intersections"]
+        parts.append("intersections " + ", ".join(f"({number(x)}, {number(y)})" for x, y in crossings)
+                     if crossings else "the graphs don't meet in this range")
+    return f"Numeric Analysis (x from {number(view['low'])} to {number(view['high'])}): " + "; ".join(parts)
@@ -0,0 +1,148 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+# Reads a typed problem ("Solve for y: 2y + 3 = 7", "Find the second derivative
+# of x^4", "Integrate 3x^2 from 0 to 2", "Solve x + y = 3 and x - y = 1") in
+# one pass, without SymPy. The math engine turns the result into expressions.
+
+ORDINALS = {"first": 1, "second": 2, "third": 3, "fourth": 4, "1st": 1, "2nd": 2, "3rd": 3, "4th": 4}
+REPEATS = {"twice": 2, "thrice": 3}
+
+OPERATIONS = [
+    # (operation, pattern) - first match wins
+    ("derive", re.compile(r"\b(?:(?P<ordinal>first|second|third|fourth|[1-4](?:st|nd|rd|th))\s+)?derivative\s+of\b"
+                          r"|\bdifferentiate\b(?:\s+(?P<repeat>twice|thrice)\b)?|\bderive\b")),
+    # d/dx, dy/dx, d^2y/dx^2 (CAPS writes the Leibniz form with the y)
+    ("derive", re.compile(r"\bd\s*(?:\^\s*(?P<power>\d))?\s*(?:[a-z](?![a-z])\s*)?/\s*d\s*(?P<variable>[a-z])"
+                          r"(?:\s*\^\s*\d)?")),
+    ("integrate", re.compile(r"\bintegrate\b|\b(?:anti-?derivative|integral)\s+of\b")),
+    ("solve", re.compile(r"\bsolve\b")),
+    ("simplify", re.compile(r"\bsimplify\b")),
+    ("factor", re.compile(r"\bfactori[sz]e\b|\bfactor\b")),
+    ("expand", re.compile(r"\bexpand\b")),
+    ("graph", re.compile(r"\b(?:plot|sketch|graph|draw)\b|\b(?:turning|stationary|critical)\s+points?\b"
+                         r"|\b(?:[xy]-?)?intercepts?\b|\btable\s+of\s+values\b|\bintersect(?:ion|ions|s)?\b"
+                         r"|\bwhere\s+do(?:es)?\b.*\b(?:meet|cross)\b")),
+    ("evaluate", re.compile(r"\b(?:calculate|evaluate|compute|work out|what is)\b")),
+]
+# Once a graph is asked for, these words only separate the functions ("where does x^2 meet 2x + 3")
+GRAPH_WORDS = re.compile(r"\b(?:plot|sketch|graph|draw|and|the|of|find|turning|stationary|critical|points?|where|"
+                         r"do(?:es)?|meets?|cross(?:es)?|intersect(?:ion|ions|s)?|(?:[xy]-?)?intercepts?|table|values|"
+                         r"for|with|at|what|is|are|sketch|calculate)\b")
+# "y = ..." / "f(x) = ..." names the function to graph, differentiate, factor...; it isn't an equation
+FUNCTION_NAME = re.compile(r"^\s*(?:y|[a-z]\s*\(\s*[a-z]\s*\))\s*=\s*")
+RESPECT_TO = re.compile(r"\b(?:with respect to|w\.?r\.?t\.?)\s+(?P<variable>[a-z])\b")
+SOLVE_FOR = re.compile(r"\bfor\s+(?P<variable>[a-z](?:\s*(?:,|and)\s*[a-z])*)\s*(?=$|[:,;]|\s)")
+BOUNDS = re.compile(r"\b(?:from|between)\s+(?P<low>.+?)\s+(?:to|and)\s+(?P<high>.+?)\s*(?=$|[,;]|\bd[a-z]\b|\bwith\b)")
+DIFFERENTIAL = re.compile(r"(?<![a-z])d(?P<variable>[a-z])\b")
+FILLER = re.compile(r"\b(?:please|find|determine|the|value|of|following|system|simultaneous|equations?|expression)\b|^\s*[:,]|[?!]+$")
+STATEMENT_SPLIT = re.compile(r"\s*(?:[,;\n]|\band\b)\s*")
+# Words allowed in an expression; any other word means a sentence was typed
+FUNCTIONS = {"sin", "cos", "tan", "sec", "csc", "cot", "asin", "acos", "atan", "sinh", "cosh", "tanh",
+             "sqrt", "root", "log", "ln", "exp", "abs", "pi"}
+# Operations on one named function: a leading "y =" / "f(x) =" is dropped (graph does it per function)
+NAMED_FUNCTION = ("derive", "integrate", "factor", "expand", "simplify", "evaluate")
+
+
+class Intent(NamedTuple):
+    """
+    What the student asked for. expressions are in SymPy's parser syntax,
+    equations already moved to one side ("(lhs) - (rhs)"). variables is
+    empty when it should be inferred from the expressions.
+    """
+    operation: str                       # derive / integrate / solve / simplify / factor / expand / graph / evaluate / answer
+    expressions: Tuple[str, ...]
+    variables: Tuple[str, ...] = ()
+    order: int = 1                       # derivatives: 2 = second derivative
+    bounds: Optional[Tuple[str, str]] = None  # definite integrals, the domain of a graph
+    equation: bool = False               # an "=" was typed
+
+
+def _one_side(statement):
+    left, _, right = statement.partition("=")
+    left, right = left.strip(), right.strip()
+    if not right or right == "0":
+        return left
+    return f"({left}) - ({right})"
+
+
+def wordy(text):
+    """True for a sentence ("the kinetic energy of a 2 kg ball") rather than an expression."""
+    return any(word not in FUNCTIONS for word in re.findall(r"[a-z]{3,}", text))
+
+
+def _uses(text, variable):
+    # "2y", "y**2", "(y" count; "my" doesn't
+    return re.search(rf"(?<![a-z]){variable}(?![a-z])|(?<=\d){variable}", text) is not None
+
+
+@lru_cache(maxsize=2048)
+def read_query(query):
+    text = query.strip().lower()
+    operation, order, variables, bounds = "answer", 1, (), None
+
+    for name, pattern in OPERATIONS:
+        match = pattern.search(text)
+        if not match:
+            continue
+        operation = name
+        groups = match.groupdict()
+        if groups.get("ordinal"):
+            order = ORDINALS[groups["ordinal"]]
+        elif groups.get("repeat"):
+            order = REPEATS[groups["repeat"]]
+        elif groups.get("power"):
+            order = int(groups["power"])
+        if groups.get("variable"):
+            variables = (groups["variable"],)
+        if name != "graph":
+            text = text[:match.start()] + " " + text[match.end():]
+        break
+
+    match = RESPECT_TO.search(text)
+    if match:
+        variables = (match.group("variable"),)
+        text = text[:match.start()] + " " + text[match.end():]
+
+    if operation in ("integrate", "graph"):
+        match = BOUNDS.search(text)
+        if match:
+            bounds = tuple(b.strip().replace("^", "**") for b in (match.group("low"), match.group("high")))
+            text = text[:match.start()] + " " + text[match.end():]
+    if operation == "graph":
+        # What's left between the graph words are the functions
+        text = GRAPH_WORDS.sub(",", text)
+    if operation == "integrate":
+        match = DIFFERENTIAL.search(text)
+        if match:
+            variables = variables or (match.group("variable"),)
+            text = text[:match.start()] + " " + text[match.end():]
+
+    if operation in ("solve", "answer"):
+        match = SOLVE_FOR.search(text)
+        if match:
+            named = tuple(v for v in re.split(r"\s*(?:,|and)\s*", match.group("variable")) if v)
+            rest = text[:match.start()] + " " + text[match.end():]
+            if all(_uses(rest, v) for v in named):
+                variables = named
+                text = rest
+
+    text = FILLER.sub(" ", text).replace("^", "**")
+    text = re.sub(r"\s+", " ", text).strip(" :,;.")
+    if operation in NAMED_FUNCTION:
+        text = FUNCTION_NAME.sub("", text)
+
+    equation = "=" in text
+    if operation == "evaluate" and equation:
+        operation = "solve"
+    if operation == "graph":
+        # One expression per function: "y = x^2, y = 2x + 3" -> "x**2", "2x + 3"
+        statements = [FUNCTION_NAME.sub("", s) for s in STATEMENT_SPLIT.split(text) if s.strip()]
+        equation = any("=" in s for s in statements)
+    elif equation and text.count("=") > 1 and operation in ("solve", "answer"):
+        statements = [s for s in STATEMENT_SPLIT.split(text) if s.strip()]
+    else:
+        statements = [text]
+    expressions = tuple(_one_side(s) if "=" in s else s.strip() for s in statements)
+    return Intent(operation, expressions, variables, order, bounds, equation)
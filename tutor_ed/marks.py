@@ -0,0 +1,289 @@
+"""
+Structured marking results. Both grader calls ask Ollama for JSON that
+follows a schema (the format= option), so the score and the grammar
+errors are read as data instead of being fished out of free text. A
+reply that is missing fields is repaired by asking for those fields only.
+"""
+import json
+import re
+from typing import NamedTuple, Optional, Tuple
+
+CATEGORIES = ("spelling", "punctuation", "grammar", "tense", "agreement", "word choice", "capitalisation")
+# CAPS FAL essay rubric: each criterion's share of the mark
+RUBRIC = {"content": 0.6, "language": 0.3, "structure": 0.1}
+MAX_COMMENTS = 5
+MAX_ERRORS = 15
+# CAPS achievement levels 2-7 start at these marks
+LEVEL_BOUNDARIES = (30, 40, 50, 60, 70, 80)
+BORDERLINE = 2      # marks either side of a level boundary
+RUBRIC_GAP = 10     # a score this far from its own rubric contradicts itself
+
+GRAMMAR_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "errors": {
+            "type": "array",
+            "maxItems": MAX_ERRORS,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "text": {"type": "string"},
+                    "category": {"type": "string", "enum": list(CATEGORIES)},
+                    "suggestion": {"type": "string"},
+                },
+                "required": ["text", "category", "suggestion"],
+            },
+        },
+    },
+    "required": ["errors"],
+}
+
+# Comments come before the marks, so the model has written its critique before it scores
+FEEDBACK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "comments": {"type": "array", "items": {"type": "string"}, "minItems": 1, "maxItems": MAX_COMMENTS},
+        "rubric": {
+            "type": "object",
+            "properties": {name: {"type": "integer", "minimum": 0, "maximum": 100} for name in RUBRIC},
+            "required": list(RUBRIC),
+        },
+        "score": {"type": "integer", "minimum": 0, "maximum": 100},
+    },
+    "required": ["comments", "rubric", "score"],
+}
+
+
+class GrammarError(NamedTuple):
+    section: str
+    start: int          # character offsets into the essay; -1 when the words weren't found
+    end: int
+    text: str           # the wrong words, as the student wrote them
+    category: str
+    suggestion: str
+
+
+class Feedback(NamedTuple):
+    comments: Tuple[str, ...]
+    rubric: dict                 # criterion -> mark out of 100
+    score: Optional[int]         # None: no usable score, so it isn't counted in the stats
+
+
+# --- 1. READING A REPLY ---
+def loads(raw):
+    # The JSON object in a reply; a model without format= support may wrap it in prose or a code fence
+    start, end = raw.find("{"), raw.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        value = json.loads(raw[start:end + 1])
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _mark(value):
+    # 72, 72.0 and "72" are all a mark; anything outside 0-100 is not
+    try:
+        number = round(float(value))
+    except (TypeError, ValueError):
+        return None
+    return number if 0 <= number <= 100 else None
+
+
+def read_feedback(data):
+    """(fields, missing): the valid fields of a feedback reply and the names still needed."""
+    fields, missing = {}, []
+    comments = data.get("comments") if isinstance(data, dict) else None
+    if isinstance(comments, str):
+        comments = [comments]
+    comments = [c.strip() for c in comments or [] if isinstance(c, str) and c.strip()][:MAX_COMMENTS]
+    if comments:
+        fields["comments"] = comments
+    else:
+        missing.append("comments")
+
+    rubric = data.get("rubric") if isinstance(data, dict) else None
+    rubric = rubric if isinstance(rubric, dict) else {}
+    fields["rubric"] = {name: _mark(rubric.get(name)) for name in RUBRIC if _mark(rubric.get(name)) is not None}
+    missing += [f"rubric.{name}" for name in RUBRIC if name not in fields["rubric"]]
+
+    score = _mark(data.get("score")) if isinstance(data, dict) else None
+    if score is None and len(fields["rubric"]) == len(RUBRIC):
+        # No overall mark, but every criterion: the rubric weights give it
+        score = rubric_score(fields["rubric"])
+    if score is None:
+        missing.append("score")
+    else:
+        fields["score"] = score
+    return fields, missing
+
+
+def rubric_score(rubric):
+    return round(sum(RUBRIC[name] * mark for name, mark in rubric.items()))
+
+
+def level(score):
+    # CAPS achievement level, 1 (0-29) to 7 (80-100)
+    return 1 + sum(score >= boundary for boundary in LEVEL_BOUNDARIES)
+
+
+def review_reason(fields):
+    """Why a draft marking should go to the bigger model for review, or None when it can stand."""
+    score, rubric = fields.get("score"), fields.get("rubric", {})
+    if score is None:
+        return "has no score"
+    if len(rubric) == len(RUBRIC) and abs(score - rubric_score(rubric)) > RUBRIC_GAP:
+        return f"gives {score}, which its own rubric doesn't support"
+    near = [b for b in LEVEL_BOUNDARIES if abs(score - b) <= BORDERLINE]
+    if near:
+        return f"gives {score}, on the level {level(near[0])} boundary"
+    return None
+
+
+def read_errors(data):
+    """(items, missing): the usable grammar errors in a reply, or missing == ["errors"]."""
+    errors = data.get("errors") if isinstance(data, dict) else None
+    if not isinstance(errors, list):
+        return [], ["errors"]
+    items = []
+    for error in errors[:MAX_ERRORS]:
+        if not isinstance(error, dict) or not isinstance(error.get("text"), str) or not error["text"].strip():
+            continue
+        category = str(error.get("category", "")).strip().lower()
+        items.append({"text": error["text"].strip(),
+                      "category": category if category in CATEGORIES else "grammar",
+                      "suggestion": str(error.get("suggestion") or "").strip()})
+    return items, []
+
+
+def repair_schema(schema, missing):
+    """The part of a schema covering only the missing fields ("rubric.language" keeps one criterion)."""
+    properties, required = {}, []
+    for name in missing:
+        top, _, sub = name.partition(".")
+        if sub:
+            part = properties.setdefault(top, {**schema["properties"][top], "properties": {}, "required": []})
+            part["properties"][sub] = schema["properties"][top]["properties"][sub]
+            part["required"].append(sub)
+        else:
+            properties[top] = schema["properties"][top]
+        if top not in required:
+            required.append(top)
+    return {"type": "object", "properties": properties, "required": required}
+
+
+def merge(fields, data):
+    # A repair reply only holds the fields that were asked for
+    if isinstance(data, dict):
+        for name, value in data.items():
+            if isinstance(value, dict) and isinstance(fields.get(name), dict):
+                fields[name] = {**fields[name], **value}
+            else:
+                fields[name] = value
+    return fields
+
+
+def locate(chunk, items, seen):
+    """GrammarErrors with essay offsets. `seen` is shared across chunks so the same error is reported once."""
+    errors = []
+    lowered = chunk.text.lower()
+    after = {}  # (words, category) -> where the next report of them is looked for
+    for item in items:
+        words = item["text"].lower()
+        found = lowered.find(words, after.get((words, item["category"]), 0))
+        if found < 0:
+            found = lowered.find(words)   # no later occurrence: a repeat of one already reported
+        if found >= 0:
+            after[words, item["category"]] = found + len(words)
+        start = chunk.start + found if found >= 0 else -1
+        # The same complaint about the same words is one error; the same mistake made elsewhere is another
+        key = (re.sub(r"\W+", " ", item["text"].lower()).strip(), item["category"], start)
+        if key in seen:
+            continue
+        seen.add(key)
+        errors.append(GrammarError(chunk.label, start, start + len(item["text"]) if start >= 0 else -1,
+                                   item["text"], item["category"], item["suggestion"]))
+    return errors
+
+
+# --- 2. WHILE IT STREAMS ---
+class PartialJson:
+    """
+    Reads a JSON reply as it streams. Wherever a value has just finished
+    (before a comma, after a closing bracket), the text so far plus the
+    brackets still open is valid JSON, so feed() can hand back the object
+    up to there: finished comments can be shown before the reply ends.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+        self.cut = None
+
+    def feed(self, delta):
+        cut = None
+        for char in delta:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.stack.append("}" if char == "{" else "]")
+            elif char in "}]" and self.stack:
+                self.stack.pop()
+                self.text += char
+                cut = (len(self.text), "".join(reversed(self.stack)))
+                continue
+            elif char == "," and self.stack:
+                cut = (len(self.text), "".join(reversed(self.stack)))
+            self.text += char
+        if cut is None or cut == self.cut:
+            return None
+        self.cut = cut
+        try:
+            return json.loads(self.text[:cut[0]] + cut[1])
+        except ValueError:
+            return None
+
+
+# --- 3. SHOWING IT ---
+def format_errors(label, errors):
+    if not errors:
+        return ""
+    heading = f"**{label}**\n" if label else ""
+    lines = [f"- **\"{e.text}\"** ({e.category})" + (f" → *{e.suggestion}*" if e.suggestion else "") for e in errors]
+    return heading + "\n".join(lines) + "\n\n"
+
+
+def format_rubric(rubric):
+    return " · ".join(f"**{name.title()}** {rubric[name]}/100" for name in RUBRIC if name in rubric)
+
+
+class FeedbackView:
+    """Markdown for the feedback as the JSON arrives. It only ever appends, so it can be streamed."""
+
+    def __init__(self):
+        self.comments = 0
+        self.rubric = False
+
+    def update(self, data, final=False):
+        if not isinstance(data, dict):
+            return ""
+        out = ""
+        comments = [c for c in data.get("comments") or [] if isinstance(c, str) and c.strip()]
+        for comment in comments[self.comments:]:
+            out += f"- {comment.strip()}\n"
+        self.comments = max(self.comments, len(comments))
+        rubric = data.get("rubric") if isinstance(data.get("rubric"), dict) else {}
+        if not self.rubric and rubric and (final or all(name in rubric for name in RUBRIC)):
+            self.rubric = True
+            out += "\n" + format_rubric({name: rubric[name] for name in RUBRIC if name in rubric}) + "\n"
+        return out
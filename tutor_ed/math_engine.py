@@ -0,0 +1,317 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from tutor_ed.intent import read_query, wordy
+from tutor_ed.metrics import metrics
+
+# SymPy itself is imported on first use (inside the functions below), so the
+# page and the memo can load without paying for it. With a SolverPool only
+# the worker processes ever import it.
+MEMO_SIZE = 2048
+
+# Wall-clock budgets (seconds) when running in a SolverPool
+PARSE_BUDGET = 2
+EXACT_BUDGET = 5
+NUMERIC_BUDGET = 3
+
+
+# --- 1. READING THE QUESTION ---
+# read_query (tutor_ed.intent) finds the operation, target variables, order,
+# bounds and equations; the functions below turn that into SymPy objects.
+@lru_cache(maxsize=None)
+def transformations():
+    # DEFINING RULES: Allow "2x" to be read as "2*x" (built once, on first use)
+    # CRITICAL IMPORT: This allows Python to understand "2x" as "2*x"
+    from sympy.parsing.sympy_parser import standard_transformations, implicit_multiplication_application
+    return standard_transformations + (implicit_multiplication_application,)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def parse(text):
+    # SymPy expressions are immutable, so one parsed copy can be shared by everyone
+    from sympy.parsing.sympy_parser import parse_expr
+    return parse_expr(text, transformations=transformations())
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def compile_intent(intent):
+    """
+    (expressions, variables, bounds) as SymPy objects, parsed once per intent.
+    Without named variables: x if it appears, else the first symbol; every
+    symbol for a system of equations.
+    """
+    from sympy import Symbol
+    if any(wordy(text) for text in intent.expressions):
+        raise ValueError("This reads as a word problem, not an expression.")
+    exprs = tuple(parse(text) for text in intent.expressions)
+    if intent.variables:
+        names = [Symbol(v) for v in intent.variables]
+    else:
+        free = sorted(set().union(*(e.free_symbols for e in exprs)), key=str)
+        x = Symbol('x')
+        if len(exprs) > 1:
+            names = free
+        else:
+            names = [x] if x in free else free[:1]
+    bounds = tuple(parse(b) for b in intent.bounds) if intent.bounds else None
+    return exprs, tuple(names), bounds
+
+
+def _ordinal(n):
+    return {2: "Second", 3: "Third", 4: "Fourth"}.get(n, f"Order-{n}")
+
+
+def _solution(solutions):
+    # [{x: 2, y: 1}] -> "x = 2, y = 1"
+    if not solutions:
+        return "no solution"
+    return " or ".join(", ".join(f"{v} = {value}" for v, value in sorted(s.items(), key=lambda i: str(i[0])))
+                       for s in solutions)
+
+
+def real_roots(roots):
+    # Grade 12 works in the reals: x^2 + 1 = 0 has no roots. Roots that may be real (y/2 - 1/2) stay.
+    return [r for r in roots if r.is_real is not False]
+
+
+def compute(intent):
+    from sympy import solve, diff, integrate, simplify, factor, expand, nsimplify, Symbol
+    exprs, names, bounds = compile_intent(intent)
+    expr = exprs[0]
+    x = names[0] if names else Symbol('x')
+    operation = intent.operation
+    if operation == "derive":
+        label = "Derivative" if intent.order == 1 else f"{_ordinal(intent.order)} Derivative"
+        return f"Calculated {label}: {diff(expr, x, intent.order)}"
+    if operation == "integrate":
+        if bounds:
+            return f"Calculated Integral: {integrate(expr, (x, *bounds))}"
+        return f"Calculated Integral: {integrate(expr, x)} + C"
+    if operation == "graph":
+        from tutor_ed.graphs import summary
+        from tutor_ed.numeric import view
+        return summary(view(intent))
+    if operation == "simplify":
+        return f"Simplified: {simplify(expr)}"
+    if operation == "factor":
+        return f"Factorised: {factor(expr)}"
+    if operation == "expand":
+        return f"Expanded: {expand(expr)}"
+    if not intent.equation and (operation == "evaluate" or not names):
+        # Plain arithmetic: "3/4 + 5/6"
+        return f"Exact Value: {nsimplify(simplify(expr))}"
+    if len(exprs) > 1 or len(names) > 1:
+        return f"Exact Solution: {_solution(solve(list(exprs), list(names), dict=True))}"
+    label = "Exact Roots" if operation == "solve" else "Exact Answer"
+    if x != Symbol('x'):
+        label += f" for {x}"
+    roots = solve(expr, x)
+    real = real_roots(roots)
+    if roots and not real:
+        return f"{label}: [] (no real roots)"
+    return f"{label}: {real}"
+
+
+def approximate(intent):
+    # Plan B when the exact solve runs out of time: numeric roots, clearly labelled
+    exprs, names, _ = compile_intent(intent)
+    if intent.operation not in ("solve", "answer") or len(exprs) > 1 or len(names) != 1:
+        raise ValueError(f"No exact {intent.operation} result within the time limit.")
+    from sympy import nsolve, lambdify, Poly
+    expr, x = exprs[0], names[0]
+
+    if expr.free_symbols <= {x} and expr.is_polynomial(x):
+        roots = [complex(r) for r in Poly(expr, x).nroots(n=15, maxsteps=200)]
+        real = sorted(r.real for r in roots if abs(r.imag) < 1e-9)
+    else:
+        # Scan for sign changes on [-20, 20], then polish each bracket
+        f = lambdify(x, expr, "mpmath")
+        real = []
+        prev_a, prev_fa = None, None
+        for i in range(401):
+            a = -20 + i * 0.1
+            try:
+                fa = float(f(a))
+            except Exception:
+                prev_a, prev_fa = None, None
+                continue
+            if fa == 0:
+                real.append(a)
+            elif prev_fa is not None and prev_fa * fa < 0:
+                real.append(float(nsolve(expr, x, (prev_a, a), solver="bisect", verify=False)))
+            prev_a, prev_fa = a, fa
+
+    roots = ", ".join(format(r, ".6g") for r in real)
+    return f"Approximate Roots: [{roots}] (numeric, exact solve timed out)"
+
+
+# Work units a SolverPool worker can run; each returns (value, seconds)
+def job_key(intent):
+    from sympy import srepr
+    started = time.perf_counter()
+    exprs, names, bounds = compile_intent(intent)
+    key = (intent.operation, tuple(srepr(e) for e in exprs), tuple(map(str, names)), intent.order,
+           tuple(map(srepr, bounds)) if bounds else None, intent.equation)
+    return key, time.perf_counter() - started
+
+
+def job_exact(intent):
+    started = time.perf_counter()
+    result = compute(intent)
+    return result, time.perf_counter() - started
+
+
+def job_approx(intent):
+    started = time.perf_counter()
+    result = approximate(intent)
+    return result, time.perf_counter() - started
+
+
+def job_check(intent, latex, final=False):
+    from tutor_ed.step_check import check_step
+    started = time.perf_counter()
+    result = check_step(intent, latex, final)
+    return result, time.perf_counter() - started
+
+
+def job_formula(query):
+    # Word problems: the physics / chemistry formula catalog (a FormulaAnswer, or None)
+    from tutor_ed.formulas import solve_formula
+    started = time.perf_counter()
+    result = solve_formula(query)
+    return result, time.perf_counter() - started
+
+
+def job_steps(intent):
+    from tutor_ed.step_engine import worked_steps
+    started = time.perf_counter()
+    result = worked_steps(intent)
+    return result, time.perf_counter() - started
+
+
+def job_plot(intent, low, high):
+    # Slider moves re-run only this: the compiled functions are cached in the worker
+    from tutor_ed.numeric import view
+    started = time.perf_counter()
+    result = view(intent, low, high)
+    return result, time.perf_counter() - started
+
+
+JOBS = {"key": job_key, "exact": job_exact, "approx": job_approx, "check": job_check, "steps": job_steps,
+        "plot": job_plot, "formula": job_formula}
+
+
+def run_inline(job, args, budget):
+    # No isolation: used when there is no pool (command line, quick checks)
+    return JOBS[job](*args)
+
+
+# --- 2. THE MEMO ---
+class SympyMemo:
+    """
+    Bounded LRU of finished answers, keyed on the operation and srepr of each expression.
+    "2x - 6" and "2*x-6" canonicalise to the same srepr, so a class typing
+    the same exercise in slightly different ways still shares one solve.
+    """
+
+    def __init__(self, maxsize=MEMO_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.timings = {}  # stage -> [count, total_seconds, max_seconds]
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, result):
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def record(self, stage, seconds):
+        with self.lock:
+            count, total, worst = self.timings.get(stage, (0, 0.0, 0.0))
+            self.timings[stage] = (count + 1, total + seconds, max(worst, seconds))
+        # Same timing, per request, for the performance page
+        metrics.record("sympy", stage, seconds, ok="timed out" not in stage)
+
+    def metrics(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self.entries),
+                "timings": {
+                    stage: {"count": count, "mean_ms": total / count * 1000, "max_ms": worst * 1000}
+                    for stage, (count, total, worst) in self.timings.items()
+                },
+            }
+
+
+# Module-level memo survives Streamlit reruns (imported modules are not re-executed)
+default_memo = SympyMemo()
+
+
+# --- 3. THE PERFECT MATH ENGINE (SymPy) ---
+def solve_with_sympy(query, memo=None, pool=None):
+    started = time.perf_counter()
+    result = _solve(query, memo or default_memo, pool)
+    metrics.record("sympy", "total", time.perf_counter() - started, ok=not result.startswith("ERROR"))
+    return result
+
+def _solve(query, memo, pool):
+    run = pool.run if pool is not None else run_inline
+    try:
+        intent = read_query(query)
+        operation = intent.operation
+        if any(wordy(text) for text in intent.expressions):
+            return _word_problem(query, memo, run)
+
+        key, seconds = run("key", (intent,), PARSE_BUDGET)
+        memo.record("parse", seconds)
+
+        cached = memo.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            result, seconds = run("exact", (intent,), EXACT_BUDGET)
+            memo.record(operation, seconds)
+        except TimeoutError:
+            memo.record(f"{operation} (timed out)", EXACT_BUDGET)
+            result, seconds = run("approx", (intent,), NUMERIC_BUDGET)
+            memo.record("numeric", seconds)
+        memo.put(key, result)
+        return result
+
+    except TimeoutError as e:
+        return f"ERROR: The math engine gave up on this problem. {e}"
+    except Exception as e:
+        return f"ERROR: {str(e)}"
+
+
+def _word_problem(query, memo, run):
+    # "Calculate the kinetic energy of a 2 kg ball moving at 4 m/s": a catalog formula, or the tutor alone
+    key = ("formula", " ".join(query.lower().split()))
+    cached = memo.get(key)
+    if cached is not None:
+        return cached
+    answer, seconds = run("formula", (query,), EXACT_BUDGET)
+    memo.record("formula", seconds)
+    result = answer.result if answer is not None else "ERROR: This reads as a word problem, not an expression."
+    memo.put(key, result)
+    return result
@@ -0,0 +1,227 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import closing, contextmanager
+
+# Persistent log shared by every process (web workers, batch marker); "off" keeps samples in memory only
+METRICS_PATH = os.environ.get("TUTOR_ED_METRICS", "tutor_ed_metrics.sqlite3")
+RING_SIZE = 2000       # samples kept in memory per process for the live view
+LOG_ROWS = 100_000     # oldest rows are pruned past this
+FLUSH_INTERVAL = 1.0   # seconds between batched writes to the log
+
+FIELDS = ("ts", "kind", "name", "model", "latency", "queue_wait", "ttft",
+          "prompt_tokens", "eval_tokens", "tokens_per_s", "ok", "pid")
+
+
+def percentile(values, p):
+    # Nearest-rank: always a value that was actually observed
+    ordered = sorted(v for v in values if v is not None)
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+class Metrics:
+    """
+    Where the time goes, per request. Every sample lands in an in-memory ring
+    (this process, instant) and is written in batches by a background thread
+    to a SQLite log, so the dashboard can also see the other processes.
+    Recording never blocks a request on disk.
+    """
+
+    def __init__(self, path=METRICS_PATH, ring_size=RING_SIZE):
+        self.path = None if path in (None, "", "off") else path
+        self.ring = deque(maxlen=ring_size)
+        self.lock = threading.Lock()
+        self.pending = queue.Queue()
+        self.writer = None
+        self.ready = False
+
+    # --- recording ---
+    def record(self, kind, name, latency, model=None, queue_wait=None, ttft=None,
+               prompt_tokens=None, eval_tokens=None, tokens_per_s=None, ok=True):
+        sample = {"ts": time.time(), "kind": kind, "name": name, "model": model, "latency": latency,
+                  "queue_wait": queue_wait, "ttft": ttft, "prompt_tokens": prompt_tokens,
+                  "eval_tokens": eval_tokens, "tokens_per_s": tokens_per_s, "ok": ok, "pid": os.getpid()}
+        with self.lock:
+            self.ring.append(sample)
+        if self.path is not None:
+            self._start_writer()
+            self.pending.put(sample)
+        return sample
+
+    @contextmanager
+    def timed(self, kind, name, model=None):
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(kind, name, time.perf_counter() - started, model=model, ok=ok)
+
+    def chat(self, client, operation, queue_wait=None, **kwargs):
+        """
+        client.chat(**kwargs), timed. Streams are passed through chunk by chunk;
+        token counts and tokens/s come from the final chunk Ollama sends.
+        """
+        started = time.perf_counter()
+        model = kwargs.get("model")
+        if not kwargs.get("stream"):
+            try:
+                response = client.chat(**kwargs)
+            except Exception:
+                self.record("llm", operation, time.perf_counter() - started, model=model,
+                            queue_wait=queue_wait, ok=False)
+                raise
+            self._record_chat(operation, model, started, None, queue_wait, response, True)
+            return response
+        try:
+            stream = client.chat(**kwargs)
+        except Exception:
+            self.record("llm", operation, time.perf_counter() - started, model=model,
+                        queue_wait=queue_wait, ok=False)
+            raise
+        return self._watch(stream, operation, model, started, queue_wait)
+
+    def _watch(self, stream, operation, model, started, queue_wait):
+        first_token = None
+        last = None
+        ok = False
+        try:
+            for chunk in stream:
+                if first_token is None and chunk['message']['content']:
+                    first_token = time.perf_counter()
+                last = chunk
+                yield chunk
+            ok = True
+        finally:
+            # Also runs when the consumer stops early (cancel, timeout)
+            self._record_chat(operation, model, started, first_token, queue_wait, last, ok)
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+    def _record_chat(self, operation, model, started, first_token, queue_wait, final, ok):
+        def field(name):
+            if final is None:
+                return None
+            try:
+                return final[name]
+            except (KeyError, TypeError):
+                return None
+
+        eval_tokens, eval_duration = field("eval_count"), field("eval_duration")
+        tokens_per_s = eval_tokens / (eval_duration / 1e9) if eval_tokens and eval_duration else None
+        self.record("llm", operation, time.perf_counter() - started, model=model, queue_wait=queue_wait,
+                    ttft=first_token - started if first_token is not None else None,
+                    prompt_tokens=field("prompt_eval_count"), eval_tokens=eval_tokens,
+                    tokens_per_s=tokens_per_s, ok=ok)
+
+    # --- the persistent log ---
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _start_writer(self):
+        if self.writer is not None:
+            return
+        with self.lock:
+            if self.writer is not None:
+                return
+            self.writer = threading.Thread(target=self._write_loop, daemon=True)
+            self.writer.start()
+            atexit.register(self.flush)
+
+    def _ensure_table(self, conn):
+        if self.ready:
+            return
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"""CREATE TABLE IF NOT EXISTS samples (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL, kind TEXT, name TEXT, model TEXT,
+            latency REAL, queue_wait REAL, ttft REAL, prompt_tokens INTEGER, eval_tokens INTEGER,
+            tokens_per_s REAL, ok INTEGER, pid INTEGER)""")
+        conn.execute("CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts)")
+        self.ready = True
+
+    def flush(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.pending.get_nowait())
+            except queue.Empty:
+                break
+        if not batch or self.path is None:
+            return
+        try:
+            with closing(self._connect()) as conn, conn:
+                self._ensure_table(conn)
+                conn.executemany(
+                    f"INSERT INTO samples ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})",
+                    [tuple(s[f] for f in FIELDS) for s in batch])
+                conn.execute("DELETE FROM samples WHERE id <= (SELECT MAX(id) FROM samples) - ?", (LOG_ROWS,))
+        except sqlite3.Error:
+            # Metrics must never break marking; a lost batch is acceptable
+            pass
+
+    def _write_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            self.flush()
+
+    # --- reading ---
+    def recent(self, since=None):
+        with self.lock:
+            samples = list(self.ring)
+        return [s for s in samples if since is None or s["ts"] >= since]
+
+    def load(self, since=None):
+        """Samples from every process, read back from the log."""
+        if self.path is None or not os.path.exists(self.path):
+            return self.recent(since)
+        self.flush()
+        with closing(self._connect()) as conn:
+            self._ensure_table(conn)
+            rows = conn.execute(f"SELECT {', '.join(FIELDS)} FROM samples WHERE ts >= ? ORDER BY ts",
+                                (since or 0,)).fetchall()
+        return [dict(zip(FIELDS, row)) for row in rows]
+
+
+def summarize(samples, by=("kind", "name", "model")):
+    """Rolling percentiles per group: one row per (kind, name, model)."""
+    groups = {}
+    for sample in samples:
+        groups.setdefault(tuple(sample[k] for k in by), []).append(sample)
+
+    rows = []
+    for key, group in sorted(groups.items(), key=lambda item: tuple(str(k) for k in item[0])):
+        ok = [s for s in group if s["ok"]]
+        row = dict(zip(by, key))
+        row.update({
+            "count": len(group),
+            "errors": len(group) - len(ok),
+            **{f"p{p}_ms": _ms(percentile([s["latency"] for s in ok], p)) for p in (50, 95, 99)},
+            "ttft_p50_ms": _ms(percentile([s["ttft"] for s in ok], 50)),
+            "queue_p50_ms": _ms(percentile([s["queue_wait"] for s in ok], 50)),
+            "queue_p95_ms": _ms(percentile([s["queue_wait"] for s in ok], 95)),
+            "tokens_per_s": _round(percentile([s["tokens_per_s"] for s in ok], 50)),
+            "prompt_tokens_p50": percentile([s["prompt_tokens"] for s in ok], 50),
+        })
+        rows.append(row)
+    return rows
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def _round(value):
+    return round(value, 1) if value is not None else None
+
+
+# One recorder per process, shared by the grader, the math engine and the stats store
+metrics = Metrics()
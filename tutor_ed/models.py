@@ -0,0 +1,116 @@
+import threading
+import time
+
+BHALA_MODEL = 'llama3.2'
+TUTOR_MODEL = 'qwen2.5:1.5b'
+KEEP_ALIVE = '30m'   # how long Ollama keeps a model in memory after the last request
+PROBE_TTL = 30       # seconds a model list / health probe is trusted
+PROBE_TIMEOUT = 3    # a dead server must not hang the home page
+WARM_TIMEOUT = 120   # seconds a prewarm may take to load a model from disk
+
+
+def full_name(model):
+    # "llama3.2" and "llama3.2:latest" are the same model to Ollama
+    return model if ":" in model else f"{model}:latest"
+
+
+class ModelRegistry:
+    """
+    Shared view of which models the local Ollama server has.
+    One probe (list + ps) serves every session for PROBE_TTL seconds, and
+    prewarm() loads a model in the background with a keep_alive so the first
+    student after a quiet spell doesn't pay the model-load time. Pages call it
+    on every rerun, so it asks the server at most once per ttl per model, and
+    not at all while the last probe saw the model in memory.
+    """
+
+    def __init__(self, ttl=PROBE_TTL, keep_alive=KEEP_ALIVE):
+        self.ttl = ttl
+        self.keep_alive = keep_alive
+        self.lock = threading.Lock()
+        self.checked_at = None
+        self.models = set()
+        self.loaded = set()
+        self.error = None
+        self.warming = set()   # models with a prewarm in flight
+        self.warmed_at = {}    # model -> when its last prewarm was started
+
+    def _client(self, timeout=PROBE_TIMEOUT):
+        import ollama  # deferred so home.py stays light
+        return ollama.Client(timeout=timeout)
+
+    def refresh(self, force=False):
+        with self.lock:
+            if not force and self.checked_at is not None and time.monotonic() - self.checked_at < self.ttl:
+                return
+            try:
+                client = self._client()
+                self.models = {full_name(m["model"]) for m in client.list()["models"]}
+                self.loaded = {full_name(m["model"]) for m in client.ps()["models"]}
+                self.error = None
+            except Exception as e:
+                self.models, self.loaded, self.error = set(), set(), str(e)
+            self.checked_at = time.monotonic()
+
+    def is_available(self, model):
+        self.refresh()
+        return full_name(model) in self.models
+
+    def problem(self, model):
+        # A student-facing message when the model can't be used, else None
+        self.refresh()
+        if self.error is not None:
+            return "⚠️ Error: Ollama is not running. Please start it with `ollama serve`."
+        if full_name(model) not in self.models:
+            return f"⚠️ Error: The model '{model}' is not found. Please run `ollama pull {model}`."
+        return None
+
+    def prewarm(self, model):
+        with self.lock:
+            if full_name(model) in self.loaded or model in self.warming:
+                return
+            started = self.warmed_at.get(model)
+            if started is not None and time.monotonic() - started < self.ttl:
+                return
+            self.warming.add(model)
+            self.warmed_at[model] = time.monotonic()
+        threading.Thread(target=self._warm, args=(model,), daemon=True).start()
+
+    def _warm(self, model):
+        try:
+            # An empty prompt makes Ollama load the model without generating anything
+            self._client(WARM_TIMEOUT).generate(model=model, prompt="", keep_alive=self.keep_alive)
+            with self.lock:
+                self.loaded.add(full_name(model))
+        except Exception:
+            pass
+        finally:
+            with self.lock:
+                self.warming.discard(model)
+
+    def status(self, model):
+        """
+        READY    - in memory, answers straight away
+        STANDBY  - installed, loads on first request
+        LOADING  - prewarm in progress
+        MISSING  - not pulled yet
+        OFFLINE  - Ollama server not reachable
+        """
+        self.refresh()
+        with self.lock:
+            if self.error is not None:
+                return "OFFLINE"
+            if full_name(model) not in self.models:
+                return "MISSING"
+            if full_name(model) in self.loaded:
+                return "READY"
+            if model in self.warming:
+                return "LOADING"
+            return "STANDBY"
+
+    def health(self, models=(BHALA_MODEL, TUTOR_MODEL)):
+        return {model: self.status(model) for model in models}
+
+
+# One registry per process: every page (and the batch marker) shares its probes
+registry = ModelRegistry()
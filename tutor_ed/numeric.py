@@ -0,0 +1,176 @@
+"""
+Numeric analysis and plotting for "graph" questions ("Sketch y = x^3 - 3x",
+"Where does x^2 meet 2x + 3?"). Each function is compiled once with
+lambdify and then evaluated on a dense NumPy grid in one vectorized call:
+roots, turning points and intersections are bracketed from sign changes on
+the grid and polished by bisection, all brackets at once.
+"""
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from tutor_ed.graphs import default_domain
+from tutor_ed.math_engine import compile_intent
+
+GRID_POINTS = 4001           # x values per view
+PLOT_POINTS = 801            # of those, the ones sent to the chart
+POLISH_STEPS = 60            # bisection halvings: well past float precision on any bracket
+TABLE_ROWS = 11
+
+
+class Curve(NamedTuple):
+    label: str
+    f: object                # vectorized f(xs)
+    df: object               # vectorized f'(xs)
+
+
+# --- 1. COMPILING ---
+@lru_cache(maxsize=256)
+def curves(intent):
+    """One Curve per function, compiled once per intent: moving the x-range slider only re-evaluates."""
+    from sympy import Symbol, diff, lambdify
+    exprs, names, _ = compile_intent(intent)
+    symbols = set().union(*(e.free_symbols for e in exprs))
+    if len(symbols) > 1:
+        raise ValueError(f"A graph needs one variable; this uses {', '.join(sorted(map(str, symbols)))}.")
+    x = names[0] if names else Symbol('x')
+    return tuple(Curve(f"y = {e}".replace("**", "^"), lambdify(x, e, "numpy"), lambdify(x, diff(e, x), "numpy")) for e in exprs)
+
+
+def evaluate(f, xs):
+    # Outside the real domain (sqrt(-1), log(0)) and at poles the value is nan, never an error
+    with np.errstate(all="ignore"):
+        ys = np.asarray(f(xs))
+        if np.iscomplexobj(ys):
+            ys = np.where(np.abs(ys.imag) < 1e-12, ys.real, np.nan)
+        ys = np.broadcast_to(ys.astype(float), xs.shape).copy()   # constants come back as one number
+    ys[~np.isfinite(ys)] = np.nan
+    return ys
+
+
+# --- 2. FINDING POINTS ---
+def _polish(f, lows, highs):
+    # Bisection on every bracket together; each bracket holds a sign change
+    f_lows = evaluate(f, lows)
+    for _ in range(POLISH_STEPS):
+        mids = (lows + highs) / 2
+        f_mids = evaluate(f, mids)
+        left = np.sign(f_mids) == np.sign(f_lows)
+        lows = np.where(left, mids, lows)
+        f_lows = np.where(left, f_mids, f_lows)
+        highs = np.where(left, highs, mids)
+    return (lows + highs) / 2
+
+
+def _zeros(f, xs, ys):
+    """x where f crosses zero: grid points that are exactly zero, plus polished sign changes."""
+    finite = np.isfinite(ys)
+    if finite.any() and not np.any(ys[finite]):
+        return np.array([])          # zero everywhere: no points worth listing
+    exact = xs[ys == 0]
+    changes = np.nonzero(finite[:-1] & finite[1:] & (ys[:-1] * ys[1:] < 0))[0]
+    found = _polish(f, xs[changes], xs[changes + 1])
+    # A sign change across a pole (1/x at 0) isn't a root: |f| stays large there
+    scale = np.nanmax(np.abs(ys)) if finite.any() else 1.0
+    found = found[np.abs(evaluate(f, found)) <= 1e-6 * max(scale, 1.0)]
+    return np.sort(np.concatenate([exact, found]))
+
+
+def _distinct(values, tolerance):
+    kept = []
+    for value in np.sort(values):
+        if not kept or value - kept[-1] > tolerance:
+            kept.append(float(value))
+    return kept
+
+
+def _extrema(curve, xs, ys):
+    # Turning points are zeros of f'; the neighbours decide max or min (a flat inflection is neither)
+    step = xs[1] - xs[0]
+    points = []
+    for x in _distinct(_zeros(curve.df, xs, evaluate(curve.df, xs)), step):
+        here, left, right = evaluate(curve.f, np.array([x, x - step, x + step]))
+        if not np.isfinite([here, left, right]).all():
+            continue
+        if here >= left and here >= right:
+            points.append(("max", x, float(here)))
+        elif here <= left and here <= right:
+            points.append(("min", x, float(here)))
+    return points
+
+
+# --- 3. THE VIEW ---
+def _plot_values(ys):
+    # Keep a pole's spike from flattening the rest of the chart: clip to the bulk of the values
+    finite = ys[np.isfinite(ys)]
+    if finite.size == 0:
+        return ys
+    low, high = np.percentile(finite, [2, 98])
+    margin = (high - low) or 1.0
+    return np.where((ys < low - margin) | (ys > high + margin), np.nan, ys)
+
+
+def view(intent, low=None, high=None):
+    """
+    Everything the page draws for one x range: plot points, roots, turning
+    points, intersections, the y-intercept and a table of values. Plain
+    lists and floats, so it pickles back from a solver worker.
+    """
+    if low is None or high is None:
+        low, high = default_domain(intent)
+    if not low < high:
+        raise ValueError("The x range is empty.")
+    xs = np.linspace(low, high, GRID_POINTS)
+    step = xs[1] - xs[0]
+    compiled = curves(intent)
+    values = [evaluate(c.f, xs) for c in compiled]
+
+    roots, extrema = [], []
+    for curve, ys in zip(compiled, values):
+        found = list(_zeros(curve.f, xs, ys))
+        points = _extrema(curve, xs, ys)
+        # A root that only touches the axis (x^2 at 0) has no sign change; its turning point finds it
+        found += [x for _, x, y in points if abs(y) < 1e-9]
+        roots.append((curve.label, _distinct(found, step)))
+        extrema.append((curve.label, points))
+
+    intersections = []
+    if len(compiled) == 2:
+        f, g = compiled[0].f, compiled[1].f
+        gap = lambda t: evaluate(f, t) - evaluate(g, t)
+        gaps = values[0] - values[1]
+        crossing = list(_zeros(gap, xs, gaps))
+        # Tangent curves touch without crossing: the gap has a turning point at 0
+        touching = _zeros(lambda t: evaluate(compiled[0].df, t) - evaluate(compiled[1].df, t), xs,
+                          evaluate(compiled[0].df, xs) - evaluate(compiled[1].df, xs))
+        crossing += [x for x in touching if abs(gap(np.array([x]))[0]) < 1e-9]
+        intersections = [(x, float(evaluate(f, np.array([x]))[0])) for x in _distinct(crossing, step)]
+
+    y_intercepts = []
+    if low <= 0 <= high:
+        for curve in compiled:
+            y = evaluate(curve.f, np.array([0.0]))[0]
+            if np.isfinite(y):
+                y_intercepts.append((curve.label, float(y)))
+
+    if high - low <= 20 and float(low).is_integer() and float(high).is_integer():
+        table_xs = np.arange(low, high + 1)
+    else:
+        table_xs = np.linspace(low, high, TABLE_ROWS)
+    table = {"x": [float(x) for x in table_xs]}
+    for curve in compiled:
+        table[curve.label] = [None if not np.isfinite(y) else float(y) for y in evaluate(curve.f, table_xs)]
+
+    every = max(1, (GRID_POINTS - 1) // (PLOT_POINTS - 1))
+    return {
+        "low": float(low), "high": float(high),
+        "x": xs[::every].tolist(),
+        "curves": {c.label: [None if not np.isfinite(y) else float(y) for y in _plot_values(ys)[::every]]
+                   for c, ys in zip(compiled, values)},
+        "roots": roots,
+        "extrema": extrema,
+        "intersections": intersections,
+        "y_intercepts": y_intercepts,
+        "table": table,
+    }
@@ -0,0 +1,192 @@
+"""
+Pre-computed answers for a known problem bank (the CAPS textbook exercises).
+
+    python -m tutor_ed.problem_bank benchmarks/corpus/caps_math.txt -o problem_bank.sqlite3
+    python -m tutor_ed.problem_bank bank/*.txt --tutor "Pure Mathematics"   # also store model-written steps
+
+Each problem is run through solve_with_sympy and the step engine in a
+SolverPool (in parallel, with the usual time budgets), and the results are
+written to a small SQLite file keyed on the normalized problem. The page
+loads the whole file into a dict at startup, so a bank problem costs one
+dict lookup: no solver, no model.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+from tutor_ed.intent import read_query
+from tutor_ed.metrics import metrics
+
+BANK_PATH = os.environ.get("TUTOR_ED_BANK", "problem_bank.sqlite3")
+# Code the stored answers depend on: a bank built by another version is ignored
+ENGINE_FILES = ("intent.py", "math_engine.py", "numeric.py", "graphs.py", "formulas.py", "step_engine.py", "step_check.py")
+
+
+def problem_key(query):
+    """
+    Same key for the same exercise typed differently: "Solve 2x^2+5x-3=0"
+    and "solve 2x^2 + 5x - 3 = 0" both read as the same intent.
+    """
+    intent = read_query(query)
+    return json.dumps([intent.operation, [e.replace(" ", "") for e in intent.expressions],
+                       intent.variables, intent.order, intent.bounds, intent.equation])
+
+
+def engine_version():
+    from importlib.metadata import version
+    digest = hashlib.sha256(version("sympy").encode())
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in ENGINE_FILES:
+        with open(os.path.join(here, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def read_bank(paths):
+    # One problem per line; blank lines and # comments are skipped
+    problems = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            problems += [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    return list(dict.fromkeys(problems))
+
+
+# --- 1. LOOKUP (the pages) ---
+class ProblemBank:
+    """The pre-computed answers, held in memory. A missing or stale file is an empty bank."""
+
+    def __init__(self, path=BANK_PATH):
+        self.path = path
+        self.entries = {}
+        self.stale = False
+        if not os.path.exists(path):
+            return
+        with closing(sqlite3.connect(path)) as conn:
+            built_with = conn.execute("SELECT value FROM meta WHERE name = 'engine'").fetchone()
+            if built_with is None or built_with[0] != engine_version():
+                self.stale = True
+                return
+            for key, subject, math_context, steps in conn.execute(
+                    "SELECT key, subject, math_context, steps FROM problems"):
+                self.entries[key] = {
+                    "math_context": math_context,
+                    "steps": [tuple(item) for item in json.loads(steps)] if steps else None,
+                    "subject": subject,  # None: SymPy steps, good for any subject
+                }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, query, subject=None):
+        """{"math_context", "steps"} for a bank problem, else None. steps is None when none fit this subject."""
+        if not self.entries:
+            return None
+        started = time.perf_counter()
+        entry = self.entries.get(problem_key(query))
+        metrics.record("bank", "hit" if entry else "miss", time.perf_counter() - started)
+        if entry is None:
+            return None
+        steps = entry["steps"] if entry["subject"] in (None, subject) else None
+        return {"math_context": entry["math_context"], "steps": steps}
+
+
+# --- 2. BUILDING THE BANK ---
+def _precompute(problem, pool, memo):
+    from tutor_ed.math_engine import solve_with_sympy
+    from tutor_ed.step_check import VALID
+    from tutor_ed.tutor import engine_steps
+
+    math_context = solve_with_sympy(problem, memo=memo, pool=pool)
+    lines = engine_steps(problem, math_context, run=pool.run)
+    steps = [("step", f"$$ {line} $$", VALID, "") for line in lines] if lines else None
+    return math_context, steps
+
+
+def _tutor_steps(subject, problem, math_context, pool):
+    # The checked model answer, as the page would show it once finished
+    from tutor_ed.tutor import ask_tutor_checked
+    events = ask_tutor_checked(subject, problem, math_context=math_context, run=pool.run)
+    if isinstance(events, str):
+        return None
+    items = []
+    for event in events:
+        if event[0] in ("text", "step"):
+            items.append(event)
+        elif event[0] == "repair":
+            del items[event[1]:]
+    return items
+
+
+def build(problems, output, jobs=2, tutor_subject=None, log=print):
+    from tutor_ed.math_engine import SympyMemo
+    from tutor_ed.solver_pool import SolverPool
+
+    pool = SolverPool(workers=jobs)
+    memo = SympyMemo()
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as threads:
+            # Each thread's SolverPool.run blocks on one worker process, so jobs solves run at once
+            results = list(threads.map(lambda p: _precompute(p, pool, memo), problems))
+        rows = []
+        for problem, (math_context, steps) in zip(problems, results):
+            subject = None
+            if steps is None and tutor_subject:
+                steps = _tutor_steps(tutor_subject, problem, math_context, pool)
+                subject = tutor_subject if steps else None
+            rows.append((problem_key(problem), problem, math_context,
+                         json.dumps(steps, ensure_ascii=False) if steps else None, subject))
+    finally:
+        pool.close()
+
+    # Written to a new file and swapped in, so running pages never see half a bank
+    partial = output + ".building"
+    if os.path.exists(partial):
+        os.remove(partial)
+    with closing(sqlite3.connect(partial)) as conn, conn:
+        conn.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute("""
+            CREATE TABLE problems (
+                key TEXT PRIMARY KEY,
+                problem TEXT NOT NULL,
+                math_context TEXT NOT NULL,
+                steps TEXT,
+                subject TEXT
+            )""")
+        conn.executemany("INSERT OR REPLACE INTO problems VALUES (?, ?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                         [("engine", engine_version()), ("built", str(time.time())), ("problems", str(len(rows)))])
+    os.replace(partial, output)
+
+    solved = sum(1 for row in rows if not row[2].startswith("ERROR"))
+    with_steps = sum(1 for row in rows if row[3])
+    log(f"{len(rows)} problems -> {output} in {time.perf_counter() - started:.1f}s "
+        f"({solved} solved by SymPy, {with_steps} with stored steps)")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-compute answers for a problem bank.")
+    parser.add_argument("sources", nargs="+", help="text files, one problem per line")
+    parser.add_argument("-o", "--output", default=BANK_PATH, help=f"bank file (default: {BANK_PATH})")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 2, help="SymPy processes")
+    parser.add_argument("--tutor", metavar="SUBJECT",
+                        help="ask the model (as this subject) for steps SymPy can't write")
+    args = parser.parse_args(argv)
+
+    problems = read_bank(args.sources)
+    if not problems:
+        print("No problems found.")
+        return 1
+    build(problems, args.output, jobs=args.jobs, tutor_subject=args.tutor)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
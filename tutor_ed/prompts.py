@@ -0,0 +1,213 @@
+"""
+Prompt templates for every model call.
+
+A template's system turn is fixed text, byte-identical on every call, so
+Ollama can reuse the prompt prefix it has already evaluated (its KV cache)
+instead of re-reading the instructions each time. Everything that changes
+per request (the essay, the problem, the verified answer, the subject)
+goes in the user turn, after that prefix.
+
+    python -m tutor_ed.prompts             # estimated prompt tokens per template
+    python -m tutor_ed.prompts --measure   # exact counts from the Ollama server
+"""
+import argparse
+import re
+import sys
+import textwrap
+
+from tutor_ed.marks import FEEDBACK_SCHEMA, GRAMMAR_SCHEMA
+from tutor_ed.models import BHALA_MODEL, TUTOR_MODEL
+
+TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]|\s+")
+
+
+def compact(text):
+    """Template text without indentation, blank lines or runs of spaces."""
+    lines = (re.sub(r"[ \t]+", " ", line).strip() for line in textwrap.dedent(text).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def estimate_tokens(text):
+    # Close to a BPE tokenizer on English and LaTeX: a token per short word, per
+    # 3 digits and per symbol; a single space rides on the next word, other runs of
+    # whitespace cost a token each
+    count = 0
+    for piece in TOKEN_PIECES.findall(text):
+        if piece.isspace():
+            count += piece != " "
+        elif piece.isalpha():
+            count += (len(piece) + 5) // 6
+        else:
+            count += 1
+    return count
+
+
+class PromptTemplate:
+    """
+    One task's prompt: a fixed system turn and the format of the user turn.
+    schema: a JSON schema the reply must follow (Ollama's format= option), or None for free text.
+    """
+
+    def __init__(self, name, model, system, user="{text}", schema=None):
+        self.name = name
+        self.model = model
+        self.schema = schema
+        self.raw_chars, self.raw_tokens = len(system), estimate_tokens(system)
+        self.system = compact(system)
+        self.user = compact(user)
+        TEMPLATES[name] = self
+
+    def user_turn(self, **fields):
+        return self.user.format(**fields)
+
+    def messages(self, **fields):
+        return [{'role': 'system', 'content': self.system},
+                {'role': 'user', 'content': self.user_turn(**fields)}]
+
+    def report(self):
+        tokens = estimate_tokens(self.system)
+        return {
+            "template": self.name,
+            "model": self.model,
+            "system_chars": len(self.system),
+            "system_tokens_est": tokens,
+            "compacting_saved_chars": self.raw_chars - len(self.system),
+            "compacting_saved_tokens_est": self.raw_tokens - tokens,
+        }
+
+
+TEMPLATES = {}
+
+# --- 1. BHALA-SMART ---
+# Slang, textspeak, "Borrow me", "Can able to", run-ons and a lowercase "i" are
+# caught instantly by tutor_ed.grammar_rules, so the model only gets the
+# judgement calls. The comma-splice rule only reports clear-cut splices, so the
+# model still looks for the rest.
+GRAMMAR = PromptTemplate("grammar", BHALA_MODEL, """
+    TASK: Identify ONLY spelling, punctuation, and strict grammar errors in this South African English text.
+    CONTEXT: South African English (Grade 12).
+    - IGNORE THESE WORDS (Do not mark as errors): braai, ubuntu, bakkie, gogo, eish, mzansi, lekker, laaitie, bru, ja, nee.
+    - ALREADY CHECKED (Do not report): slang, textspeak, run-on sentences, "Borrow me", "Can able to", lowercase "i".
+    - MARK THESE ERRORS: "I'm coming" (when going), wrong tense, subject-verb agreement, spelling, comma splices.
+    OUTPUT: JSON. For each error, "text" is the wrong words exactly as written, "category" the kind of error
+    and "suggestion" the corrected words. No errors: an empty "errors" list.
+    """, schema=GRAMMAR_SCHEMA)
+
+FEEDBACK = PromptTemplate("feedback", BHALA_MODEL, """
+    ROLE: South African English FAL Teacher.
+    TASK: Critique Tone, Structure, and Content based on CAPS Rubric.
+    GOLDEN RULE:
+    - "Bra" = Friend. "Robot" = Traffic Light. "Just now" = Later.
+
+    OUTPUT: JSON.
+    - "comments": up to 5 short, encouraging points on the essay's structure and tone.
+    - "rubric": a mark out of 100 for content, language and structure.
+    - "score": the overall mark out of 100.
+    """, schema=FEEDBACK_SCHEMA)
+
+# Tiered marking: the bigger model checks feedback drafted by the small one
+REVIEW = PromptTemplate("feedback_review", BHALA_MODEL, """
+    ROLE: Senior South African English FAL Moderator.
+    TASK: A junior teacher drafted the marking given after the essay. Check it against the essay and the CAPS Rubric.
+    - Keep comments that are right; rewrite or replace any that are wrong or vague.
+    - Correct rubric marks that are too high or too low. The score must agree with the rubric.
+    GOLDEN RULE:
+    - "Bra" = Friend. "Robot" = Traffic Light. "Just now" = Later.
+
+    OUTPUT: JSON, the corrected marking.
+    - "comments": up to 5 short, encouraging points on the essay's structure and tone.
+    - "rubric": a mark out of 100 for content, language and structure.
+    - "score": the overall mark out of 100.
+    """, user="""
+    {text}
+    DRAFT MARKING: {draft}
+    """, schema=FEEDBACK_SCHEMA)
+
+# Follow-up turn when a JSON reply came back incomplete: only the missing fields are asked for
+REPAIR = compact("""
+    Your reply is missing these fields, or their values are not valid: {fields}.
+    Reply with a JSON object holding only those fields.
+    """)
+
+# --- 2. UKUFUNDA-SCI ---
+# With a verified SymPy answer: "Marking Memo" mode, the answer travels in the user turn
+TUTOR_MEMO = PromptTemplate("tutor_memo", TUTOR_MODEL, r"""
+    ROLE: Automated Math Solver (Photomath Style).
+    TASK: Show the vertical calculation steps that reach the verified answer given with the problem.
+
+    STRICT VISUAL RULES:
+    1. NO paragraphs or conversational filler (e.g., "Let's assume...").
+    2. Output ONLY the math steps in vertical order.
+    3. Use LaTeX display mode ($$ ... $$) for EVERY line.
+    4. Format it exactly like a student's exam paper.
+
+    EXAMPLE FORMAT:
+    $$ 2x^2 + 5x - 3 = 0 $$
+    $$ (2x - 1)(x + 3) = 0 $$
+    $$ 2x - 1 = 0 \quad \text{or} \quad x + 3 = 0 $$
+    $$ x = \frac{1}{2} \quad \text{or} \quad x = -3 $$
+    """, user="""
+    Solve this: {topic}
+    Verified answer: {math_context}
+    """)
+
+# Fallback for Physics/Theory (still kept structured); the subject is per request
+TUTOR_SCIENCE = PromptTemplate("tutor_science", TUTOR_MODEL, """
+    ROLE: Science Marking Memo Generator.
+
+    INSTRUCTIONS:
+    1. Provide the solution in clear, vertical steps.
+    2. State the Formula first.
+    3. Show Substitution.
+    4. Show Final Answer.
+    5. Use LaTeX ($$) for all math.
+    """, user="""
+    Subject: {subject}
+    Solve this: {topic}
+    """)
+
+SAMPLE_FIELDS = {"text": "My hero is my gogo.", "topic": "Solve 2x = 6", "math_context": "Exact Roots: [3]",
+                 "subject": "Pure Mathematics",
+                 "draft": '{"comments": ["Good start."], "rubric": {"content": 60, "language": 55, "structure": 60}, '
+                          '"score": 59}'}
+
+
+def measure(template, client):
+    # prompt_eval_count of a one-token reply: the server's own count for the whole prompt
+    response = client.chat(model=template.model, messages=template.messages(**SAMPLE_FIELDS),
+                           options={"num_predict": 1}, keep_alive=0)
+    return response.get("prompt_eval_count")
+
+
+def measured(template, client):
+    # The "measured" column; a prompt the server already had cached comes back without a count
+    try:
+        count = measure(template, client)
+    except Exception as e:
+        return f"  ({e})"
+    return f" {'-' if count is None else count:>9}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prompt token counts per template.")
+    parser.add_argument("--measure", action="store_true", help="ask the Ollama server for exact counts")
+    args = parser.parse_args(argv)
+
+    client = None
+    if args.measure:
+        import ollama
+        client = ollama.Client()
+    print(f"{'template':16} {'model':14} {'chars':>6} {'tokens~':>8} {'saved':>12}"
+          + (f" {'measured':>9}" if client else ""))
+    for template in TEMPLATES.values():
+        row = template.report()
+        saved = f"{row['compacting_saved_chars']}c/{row['compacting_saved_tokens_est']}t"
+        line = f"{row['template']:16} {row['model']:14} {row['system_chars']:>6} {row['system_tokens_est']:>8} {saved:>12}"
+        if client is not None:
+            line += measured(template, client)
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import difflib
+import hashlib
+
+from tutor_ed.chunking import word_count
+
+# Share of the essay's words (old and new version together) that may be edited
+# before the feedback and score are written again. Adding or removing a
+# paragraph always counts: structure is part of the mark.
+REMARK_THRESHOLD = 0.2
+
+
+def paragraph_key(text):
+    # Re-wrapped lines or trailing spaces don't make a paragraph "edited"
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()[:16]
+
+
+class Revision:
+    """
+    What was last marked in one page session, paragraph by paragraph. When
+    a student resubmits, only the paragraphs they edited go back to the
+    model for grammar, and the feedback is kept unless the essay changed
+    enough to need new feedback. Plain JSON, so it lives in the session store.
+    """
+
+    def __init__(self, state=None):
+        state = state or {}
+        # paragraph key -> its grammar errors (JSON items)
+        self.grammar = {key: items for key, items in state.get("grammar", {}).items() if isinstance(items, list)}
+        # Feedback._asdict() of the last written feedback (anything else is from an older version)
+        self.feedback = state.get("feedback") if isinstance(state.get("feedback"), dict) else None
+        # (key, words) per paragraph of the version the feedback was written for
+        self.marked = [tuple(p) for p in state.get("marked", [])]
+        self.rechecked = self.reused = 0
+        self.feedback_kept = False
+
+    def state(self):
+        return {"grammar": self.grammar, "feedback": self.feedback, "marked": self.marked}
+
+    # --- grammar ---
+    def kept_grammar(self, units):
+        # Errors still good for this version; None where the paragraph is new or edited
+        kept = [self.grammar.get(paragraph_key(unit.text)) for unit in units]
+        self.rechecked = sum(items is None for items in kept)
+        self.reused = len(kept) - self.rechecked
+        return kept
+
+    def keep_grammar(self, replies):
+        # Only this version's paragraphs are kept, so the state stays essay-sized
+        self.grammar = {paragraph_key(chunk.text): items for chunk, items in replies}
+
+    # --- feedback ---
+    def change(self, units):
+        """Share of words in paragraphs edited, added or removed since the feedback was written."""
+        new = [(paragraph_key(unit.text), word_count(unit.text)) for unit in units]
+        matcher = difflib.SequenceMatcher(None, [key for key, _ in self.marked], [key for key, _ in new],
+                                          autojunk=False)
+        changed = 0
+        for tag, a1, a2, b1, b2 in matcher.get_opcodes():
+            if tag != "equal":
+                changed += sum(words for _, words in self.marked[a1:a2]) + sum(words for _, words in new[b1:b2])
+        total = sum(words for _, words in self.marked) + sum(words for _, words in new)
+        return changed / total if total else 0.0
+
+    def needs_feedback(self, units):
+        if self.feedback is None or len(units) != len(self.marked):
+            return True
+        return self.change(units) > REMARK_THRESHOLD
+
+    def keep_feedback(self, units, feedback):
+        self.feedback = feedback
+        self.marked = [(paragraph_key(unit.text), word_count(unit.text)) for unit in units]
@@ -0,0 +1,328 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# How many generations the single local Ollama server runs at once
+SLOTS = int(os.environ.get("TUTOR_ED_LLM_SLOTS", "2"))
+# Beyond this many waiting requests new ones are turned away
+MAX_QUEUE = int(os.environ.get("TUTOR_ED_LLM_QUEUE", "40"))
+MAX_WAIT = 300           # seconds a request may sit in the queue
+FIRST_GUESS_SERVICE = 20  # seconds per generation until we have measurements
+# serve.py points every worker process at one queue file
+SCHEDULER_PATH = os.environ.get("TUTOR_ED_SCHEDULER")
+POLL_INTERVAL = 0.05  # seconds between queue checks in SharedScheduler
+MAX_RUN = 900        # a slot held longer than this is taken back (a hung worker)
+
+
+class ServerBusy(Exception):
+    pass
+
+
+class _Ticket:
+    __slots__ = ("session", "granted", "started", "waited", "id")
+
+    def __init__(self, session):
+        self.session = session
+        self.granted = False
+        self.started = None
+        self.waited = 0.0
+        self.id = None  # row in SharedScheduler's table
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the Ollama server, shared by every session.
+    At most `slots` generations run at once. Waiting requests are served
+    round-robin across sessions (FIFO within a session), so one student's
+    grammar + feedback pair can't push a whole class back. When the queue is
+    deeper than `max_queue`, new requests are shed with ServerBusy.
+    """
+
+    def __init__(self, slots=SLOTS, max_queue=MAX_QUEUE, max_wait=MAX_WAIT):
+        self.slots = slots
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.cond = threading.Condition()
+        self.sessions = OrderedDict()  # session -> deque of waiting tickets, in serving order
+        self.running = 0
+        self.waiting = 0
+        self.avg_service = FIRST_GUESS_SERVICE
+
+    # --- queue bookkeeping (cond held) ---
+    def _dispatch(self):
+        while self.running < self.slots and self.sessions:
+            session, tickets = self.sessions.popitem(last=False)
+            ticket = tickets.popleft()
+            if tickets:
+                # Served once this round: back of the line for its next request
+                self.sessions[session] = tickets
+            ticket.granted = True
+            self.running += 1
+            self.waiting -= 1
+        self.cond.notify_all()
+
+    def _position(self, ticket):
+        # Replays the round-robin order to count how many requests are ahead
+        queues = list(self.sessions.values())
+        ahead = 0
+        depth = 0
+        while any(depth < len(q) for q in queues):
+            for q in queues:
+                if depth < len(q):
+                    if q[depth] is ticket:
+                        return ahead
+                    ahead += 1
+            depth += 1
+        return ahead
+
+    def _withdraw(self, ticket):
+        tickets = self.sessions.get(ticket.session)
+        if tickets is not None and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del self.sessions[ticket.session]
+            self.waiting -= 1
+
+    def estimate_wait(self, position):
+        # Everyone ahead shares the slots; each takes about avg_service seconds
+        return (position // self.slots + 1) * self.avg_service
+
+    # --- public API ---
+    def acquire(self, session, on_wait=None):
+        """
+        Blocks until a slot is free. on_wait(position, eta_seconds) is called
+        about once a second while queued (position 1 = next in line).
+        """
+        with self.cond:
+            if self.waiting >= self.max_queue:
+                raise ServerBusy("🚦 The tutor is very busy right now. Please try again in a minute.")
+            ticket = _Ticket(session)
+            self.sessions.setdefault(session, deque()).append(ticket)
+            self.waiting += 1
+            self._dispatch()
+
+        queued_at = time.monotonic()
+        try:
+            while True:
+                with self.cond:
+                    if ticket.granted:
+                        break
+                    if time.monotonic() - queued_at > self.max_wait:
+                        self._withdraw(ticket)
+                        raise ServerBusy("🚦 Waited too long for the tutor. Please try again in a minute.")
+                    position = self._position(ticket)
+                    eta = self.estimate_wait(position)
+                # UI callbacks run outside the lock
+                if on_wait is not None:
+                    on_wait(position + 1, eta)
+                with self.cond:
+                    if not ticket.granted:
+                        self.cond.wait(timeout=1.0)
+        except BaseException:
+            # Includes Streamlit stopping the script mid-wait
+            with self.cond:
+                if ticket.granted:
+                    self.running -= 1
+                    self._dispatch()
+                else:
+                    self._withdraw(ticket)
+            raise
+
+        ticket.started = time.monotonic()
+        ticket.waited = ticket.started - queued_at
+        return ticket
+
+    def release(self, ticket):
+        with self.cond:
+            elapsed = time.monotonic() - ticket.started
+            self.avg_service = 0.8 * self.avg_service + 0.2 * elapsed
+            self.running -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, session, on_wait=None):
+        ticket = self.acquire(session, on_wait)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def snapshot(self):
+        with self.cond:
+            return {"running": self.running, "waiting": self.waiting, "slots": self.slots,
+                    "avg_service": round(self.avg_service, 1)}
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SharedScheduler(LLMScheduler):
+    """
+    LLMScheduler for several worker processes on one machine (serve.py).
+    The queue lives in a SQLite file. Waiters poll it with cheap reads and
+    take the write lock only when a slot is free; whoever gets there first
+    hands the free slots to the next tickets in round-robin order (each
+    session's first waiting request, then each session's second, with the
+    most recently served session last). A release wakes the waiters in its
+    own process at once. Tickets of dead processes are dropped, so a
+    crashed worker can't keep a slot.
+    """
+
+    def __init__(self, path, slots=SLOTS, max_queue=MAX_QUEUE, max_wait=MAX_WAIT):
+        super().__init__(slots, max_queue, max_wait)
+        self.path = path
+        self.local = threading.local()
+        self.reaped = 0.0
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tickets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session TEXT NOT NULL,
+                pid INTEGER NOT NULL,
+                queued REAL NOT NULL,
+                granted REAL
+            )""")
+        conn.execute("CREATE TABLE IF NOT EXISTS served (session TEXT PRIMARY KEY, at REAL NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS service (id INTEGER PRIMARY KEY CHECK (id = 1), average REAL NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO service VALUES (1, ?)", (FIRST_GUESS_SERVICE,))
+
+    def _connect(self):
+        # One connection per thread. isolation_level=None: BEGIN IMMEDIATE below
+        # makes each queue update one writer at a time. The queue is worthless
+        # after a power cut, so commits don't wait for the disk.
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # --- queue bookkeeping (inside a transaction) ---
+    def _reap(self, conn):
+        dead = [(pid,) for (pid,) in conn.execute("SELECT DISTINCT pid FROM tickets") if not _alive(pid)]
+        conn.executemany("DELETE FROM tickets WHERE pid = ?", dead)
+        conn.execute("DELETE FROM tickets WHERE granted < ?", (time.time() - MAX_RUN,))
+        conn.execute("DELETE FROM served WHERE at < ?", (time.time() - 3600,))
+        self.reaped = time.monotonic()
+
+    def _order(self, conn):
+        return [row[0] for row in conn.execute("""
+            SELECT w.id FROM (
+                SELECT id, session,
+                       ROW_NUMBER() OVER (PARTITION BY session ORDER BY id) AS depth,
+                       MIN(queued) OVER (PARTITION BY session) AS arrived
+                FROM tickets WHERE granted IS NULL
+            ) AS w LEFT JOIN served ON served.session = w.session
+            ORDER BY w.depth, MAX(w.arrived, COALESCE(served.at, 0)), w.id""")]
+
+    def _running(self, conn):
+        return conn.execute("SELECT COUNT(*) FROM tickets WHERE granted IS NOT NULL").fetchone()[0]
+
+    def _grant(self, conn):
+        # Hands out free slots to the front of the line
+        if time.monotonic() - self.reaped > 5:
+            self._reap(conn)
+        free = self.slots - self._running(conn)
+        if free <= 0:
+            return
+        now = time.time()
+        for ticket_id in self._order(conn)[:free]:
+            conn.execute("UPDATE tickets SET granted = ? WHERE id = ?", (now, ticket_id))
+            conn.execute("INSERT OR REPLACE INTO served(session, at) "
+                         "SELECT session, ? FROM tickets WHERE id = ?", (now, ticket_id))
+
+    # --- public API ---
+    def acquire(self, session, on_wait=None):
+        ticket = _Ticket(session)
+        with self._transaction() as conn:
+            self._reap(conn)
+            waiting = conn.execute("SELECT COUNT(*) FROM tickets WHERE granted IS NULL").fetchone()[0]
+            if waiting >= self.max_queue:
+                raise ServerBusy("🚦 The tutor is very busy right now. Please try again in a minute.")
+            ticket.id = conn.execute("INSERT INTO tickets(session, pid, queued) VALUES (?, ?, ?)",
+                                     (session, os.getpid(), time.time())).lastrowid
+            self._grant(conn)
+
+        queued_at = time.monotonic()
+        reported = 0.0
+        conn = self._connect()
+        try:
+            while True:
+                row = conn.execute("SELECT granted FROM tickets WHERE id = ?", (ticket.id,)).fetchone()
+                if row is None:
+                    raise ServerBusy("🚦 Lost our place in the tutor queue. Please try again.")
+                if row[0] is not None:
+                    break
+                if time.monotonic() - queued_at > self.max_wait:
+                    raise ServerBusy("🚦 Waited too long for the tutor. Please try again in a minute.")
+                if self._running(conn) < self.slots:
+                    with self._transaction() as conn:
+                        self._grant(conn)
+                    continue
+                if on_wait is not None and time.monotonic() - reported >= 1.0:
+                    # UI callbacks: about once a second, like LLMScheduler
+                    reported = time.monotonic()
+                    self.avg_service = conn.execute("SELECT average FROM service").fetchone()[0]
+                    order = self._order(conn)
+                    position = order.index(ticket.id) if ticket.id in order else 0
+                    on_wait(position + 1, self.estimate_wait(position))
+                with self.cond:
+                    self.cond.wait(timeout=POLL_INTERVAL)
+        except BaseException:
+            # Includes Streamlit stopping the script mid-wait
+            self._forget(ticket)
+            raise
+
+        ticket.granted = True
+        ticket.started = time.monotonic()
+        ticket.waited = ticket.started - queued_at
+        return ticket
+
+    def _forget(self, ticket):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM tickets WHERE id = ?", (ticket.id,))
+            self._grant(conn)
+        with self.cond:
+            self.cond.notify_all()
+
+    def release(self, ticket):
+        elapsed = time.monotonic() - ticket.started
+        with self._transaction() as conn:
+            conn.execute("UPDATE service SET average = 0.8 * average + 0.2 * ?", (elapsed,))
+            conn.execute("DELETE FROM tickets WHERE id = ?", (ticket.id,))
+            self._grant(conn)
+        with self.cond:
+            self.cond.notify_all()
+
+    def snapshot(self):
+        conn = self._connect()
+        running, waiting = conn.execute(
+            "SELECT COUNT(granted), COUNT(*) - COUNT(granted) FROM tickets").fetchone()
+        average = conn.execute("SELECT average FROM service").fetchone()[0]
+        return {"running": running, "waiting": waiting, "slots": self.slots, "avg_service": round(average, 1)}
+
+
+# One scheduler per process: every session's LLM calls queue here.
+# Under serve.py all worker processes share one queue file instead.
+scheduler = SharedScheduler(SCHEDULER_PATH) if SCHEDULER_PATH else LLMScheduler()
@@ -0,0 +1,48 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+# Lives next to the cache and stats (relative to where Streamlit is started)
+SESSIONS_PATH = os.environ.get("TUTOR_ED_SESSIONS", "tutor_ed_sessions.sqlite3")
+SESSION_TTL = 12 * 3600  # a school day; older sessions are dropped on write
+
+
+class SessionStore:
+    """
+    Page state that must outlive one server process: the essay and its
+    marked results. st.session_state only lives in the worker that holds
+    the browser's websocket; when several workers sit behind serve.py a
+    reconnect can land on another one, which picks the state up from here
+    using the session id kept in the page URL.
+    """
+
+    def __init__(self, path=SESSIONS_PATH, ttl=SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    updated REAL NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_age ON sessions(updated)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, session_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT state FROM sessions WHERE id = ? AND updated > ?",
+                               (session_id, time.time() - self.ttl)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def put(self, session_id, state):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO sessions(id, state, updated) VALUES (?, ?, ?)",
+                         (session_id, json.dumps(state, ensure_ascii=False), now))
+            conn.execute("DELETE FROM sessions WHERE updated < ?", (now - self.ttl,))
@@ -0,0 +1,149 @@
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+
+try:
+    import resource  # POSIX only; Windows workers run without a memory cap
+except ImportError:
+    resource = None
+
+# Per server process; serve.py lowers it when several Streamlit workers share a machine
+WORKERS = int(os.environ.get("TUTOR_ED_SOLVERS", "2"))
+MEMORY_MB = 1024
+WARMUP_TIMEOUT = 60
+# Workers run "python -m tutor_ed.solver_pool" from the repo root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SolverError(Exception):
+    pass
+
+
+class SolverTimeout(TimeoutError):
+    pass
+
+
+def _worker_main(memory_mb):
+    # Plain subprocess rather than multiprocessing: Streamlit runs each page as
+    # __main__, and a spawned child would re-run the whole page on import.
+    requests, replies = sys.stdin.buffer, sys.stdout.buffer
+    sys.stdout = sys.stderr  # stray prints must not corrupt the reply stream
+
+    if resource is not None and memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    def reply(message):
+        pickle.dump(message, replies)
+        replies.flush()
+
+    # Pre-warm: pay for the SymPy import and parser set-up before any student waits on it
+    from tutor_ed.formulas import units
+    from tutor_ed.math_engine import JOBS, parse
+    parse("x")
+    units()
+    reply(("ready", None))
+
+    while True:
+        try:
+            job, args = pickle.load(requests)
+        except (EOFError, KeyboardInterrupt):
+            return
+        try:
+            reply(("ok", JOBS[job](*args)))
+        except MemoryError:
+            reply(("error", "This problem needs too much memory to solve exactly."))
+        except Exception as e:
+            reply(("error", str(e)))
+
+
+class _Worker:
+    def __init__(self, memory_mb):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "tutor_ed.solver_pool", str(memory_mb)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=ROOT)
+        # A reader thread turns the blocking pipe into a queue we can wait on with a timeout
+        self.replies = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+        self.ready = False
+
+    def _read(self):
+        try:
+            while True:
+                self.replies.put(pickle.load(self.process.stdout))
+        except Exception:
+            self.replies.put(("dead", None))
+
+    def send(self, message):
+        pickle.dump(message, self.process.stdin)
+        self.process.stdin.flush()
+
+    def receive(self, timeout):
+        try:
+            return self.replies.get(timeout=timeout)
+        except queue.Empty:
+            raise SolverTimeout(f"Gave up after {timeout}s.")
+
+    def wait_ready(self):
+        if not self.ready:
+            status, _ = self.receive(WARMUP_TIMEOUT)
+            if status != "ready":
+                raise SolverError("Math engine worker did not start.")
+            self.ready = True
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+
+
+class SolverPool:
+    """
+    Pre-warmed SymPy worker processes with a hard wall-clock budget per job.
+    A job that overruns has its worker killed and replaced, so one
+    pathological input can't hold a Streamlit thread (or a CPU) for minutes.
+    """
+
+    def __init__(self, workers=WORKERS, memory_mb=MEMORY_MB):
+        self.memory_mb = memory_mb
+        self.idle = queue.Queue()
+        self.closed = threading.Event()
+        for _ in range(workers):
+            self.idle.put(_Worker(memory_mb))
+
+    def run(self, job, args, budget):
+        if self.closed.is_set():
+            raise SolverError("Math engine is shutting down.")
+        worker = self.idle.get()
+        try:
+            worker.wait_ready()
+            worker.send((job, args))
+            status, payload = worker.receive(budget)
+            if status == "dead":
+                raise SolverError("The math engine crashed on this problem.")
+        except (SolverTimeout, SolverError, OSError) as e:
+            # Worker is stuck or dead: replace it rather than wait
+            worker.kill()
+            self.idle.put(_Worker(self.memory_mb))
+            if isinstance(e, (SolverTimeout, SolverError)):
+                raise
+            # Broken pipe etc. (TimeoutError is an OSError too, hence the check above)
+            raise SolverError("The math engine crashed on this problem.")
+        self.idle.put(worker)
+        if status == "error":
+            raise SolverError(payload)
+        return payload
+
+    def close(self):
+        self.closed.set()
+        while True:
+            try:
+                self.idle.get_nowait().kill()
+            except queue.Empty:
+                return
+
+
+if __name__ == "__main__":
+    _worker_main(int(sys.argv[1]) if len(sys.argv) > 1 else MEMORY_MB)
@@ -0,0 +1,128 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from tutor_ed.metrics import metrics
+
+STATS_PATH = os.environ.get("TUTOR_ED_STATS", "bhala_stats.sqlite3")
+LEGACY_JSON = "bhala_stats.json"
+BUCKET_WIDTH = 10  # histogram buckets: 0-9, 10-19, ... 90-100
+
+
+def bucket_for(score):
+    # 100 shares the top bucket with 90-99
+    return min(max(int(score), 0), 99) // BUCKET_WIDTH * BUCKET_WIDTH
+
+
+class StatsManager:
+    """
+    Essay statistics shared by every session and process.
+    Each marked essay is appended as an event; the running totals and the
+    score histogram are updated in the same transaction, so reads never
+    have to scan the event log.
+    """
+
+    def __init__(self, path=STATS_PATH, legacy_json=LEGACY_JSON):
+        self.path = path
+        self.legacy_json = legacy_json
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS events (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        ts REAL NOT NULL,
+                        score INTEGER NOT NULL,
+                        word_count INTEGER,
+                        latency REAL
+                    )""")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS summary (
+                        id INTEGER PRIMARY KEY CHECK (id = 1),
+                        essays_marked INTEGER NOT NULL,
+                        total_score INTEGER NOT NULL
+                    )""")
+                conn.execute("CREATE TABLE IF NOT EXISTS histogram (bucket INTEGER PRIMARY KEY, count INTEGER NOT NULL)")
+                conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            self._migrate(conn)
+
+    def _connect(self):
+        # isolation_level=None: we issue BEGIN IMMEDIATE ourselves so writers queue up instead of racing
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _migrate(self, conn):
+        # One-off import of the old read-modify-write JSON counters
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM meta WHERE name = 'migrated'").fetchone():
+                conn.execute("COMMIT")
+                return
+            legacy = {"essays_marked": 0, "total_score": 0}
+            if os.path.exists(self.legacy_json):
+                try:
+                    with open(self.legacy_json, "r") as f:
+                        legacy.update(json.load(f))
+                except:
+                    pass
+            # Old data has no per-essay scores, so it counts towards the totals but not the histogram
+            conn.execute(
+                "INSERT OR IGNORE INTO summary(id, essays_marked, total_score) VALUES (1, ?, ?)",
+                (int(legacy["essays_marked"]), int(legacy["total_score"])))
+            conn.execute("INSERT INTO meta(name, value) VALUES ('migrated', ?)", (str(time.time()),))
+            conn.execute("COMMIT")
+        except:
+            conn.execute("ROLLBACK")
+            raise
+
+    def record_essay(self, score, word_count=None, latency=None):
+        self.record_many([(score, word_count, latency)])
+
+    def record_many(self, essays):
+        """
+        Records (score, word_count, latency) tuples in one transaction.
+        The batch marker uses this so a whole class costs a single write.
+        """
+        essays = [(int(score), word_count, latency) for score, word_count, latency in essays]
+        if not essays:
+            return
+        now = time.time()
+        buckets = {}
+        for score, _, _ in essays:
+            buckets[bucket_for(score)] = buckets.get(bucket_for(score), 0) + 1
+        with metrics.timed("stats", "write"), closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO events(ts, score, word_count, latency) VALUES (?, ?, ?, ?)",
+                    [(now, score, word_count, latency) for score, word_count, latency in essays])
+                conn.execute(
+                    "UPDATE summary SET essays_marked = essays_marked + ?, total_score = total_score + ? WHERE id = 1",
+                    (len(essays), sum(score for score, _, _ in essays)))
+                conn.executemany(
+                    "INSERT INTO histogram(bucket, count) VALUES (?, ?) "
+                    "ON CONFLICT(bucket) DO UPDATE SET count = count + excluded.count", list(buckets.items()))
+                conn.execute("COMMIT")
+            except:
+                conn.execute("ROLLBACK")
+                raise
+
+    def update_stats(self, score, word_count=None, latency=None):
+        self.record_essay(score, word_count, latency)
+        return self.load_stats()
+
+    def load_stats(self):
+        # Summary row + histogram only; never touches the event log
+        with metrics.timed("stats", "read"), closing(self._connect()) as conn:
+            marked, total = conn.execute("SELECT essays_marked, total_score FROM summary WHERE id = 1").fetchone()
+            histogram = dict(conn.execute("SELECT bucket, count FROM histogram ORDER BY bucket").fetchall())
+        return {
+            "essays_marked": marked,
+            "total_score": total,
+            "average": int(total / marked) if marked else 0,
+            "histogram": {b: histogram.get(b, 0) for b in range(0, 100, BUCKET_WIDTH)},
+        }
+
+    def get_average(self):
+        return self.load_stats()["average"]
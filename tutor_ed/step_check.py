@@ -0,0 +1,272 @@
+import re
+from functools import lru_cache
+
+from tutor_ed.math_engine import MEMO_SIZE, compile_intent, parse, real_roots
+
+# Verdicts for one $$ ... $$ line of worked steps
+VALID, INVALID, UNCHECKED = "valid", "invalid", "unchecked"
+BADGES = {VALID: "✅", INVALID: "❌", UNCHECKED: "➖"}
+
+STEP = re.compile(r"\$\$(.+?)\$\$", re.S)
+MAX_REPAIRS = 2  # re-prompts per answer before wrong lines are just marked ❌
+CHECK_BUDGET = 2
+# Operations whose working only rewrites the question's expression
+SAME_VALUE = ("simplify", "factor", "expand", "evaluate")
+
+# Lines that separate several statements: "x = 1 or x = 2", "2x = 6 => x = 3"
+SEPARATORS = re.compile(r"\\text\s*\{\s*(?:or|and|,)\s*\}|\\q?quad|\\Rightarrow|\\implies|\\therefore|\\Leftrightarrow|,|;")
+# Notation the converter doesn't read; such parts are skipped (a label or a working note)
+UNREADABLE = re.compile(r"\\int|\\frac\s*\{\s*d|\\lim|\\sum|\\approx|\\neq|\\begin|\\le|\\ge|[<>]|\bd[xy]\b|'")
+FUNCTION_CALL = re.compile(r"^\s*([fgp])\s*\((.+)\)\s*$")
+GREEK = ("alpha", "beta", "gamma", "delta", "theta", "lambda", "mu", "pi", "sigma", "omega", "Delta")
+COMMANDS = {
+    "cdot": "*", "times": "*", "div": "/", "ln": "log", "log": "log", "exp": "exp",
+    "sin": "sin", "cos": "cos", "tan": "tan", "infty": "oo",
+    **{name: name for name in GREEK},
+}
+NOISE = re.compile(r"\\left|\\right|\\[,;!: ]|\\displaystyle|&|\\\\|\\boxed")
+
+
+# --- 1. READING A LINE OF LaTeX ---
+def _group(text, start):
+    # Contents of the {...} (or single character) starting at `start`, and where it ends
+    while start < len(text) and text[start] == " ":
+        start += 1
+    if start >= len(text):
+        raise ValueError("missing argument")
+    if text[start] != "{":
+        return text[start], start + 1
+    depth = 0
+    for i in range(start, len(text)):
+        depth += {"{": 1, "}": -1}.get(text[i], 0)
+        if depth == 0:
+            return text[start + 1:i], i + 1
+    raise ValueError("unbalanced braces")
+
+
+def latex_to_text(latex):
+    """One LaTeX expression (no "=") in SymPy's parser syntax. Raises ValueError if unsupported."""
+    out = []
+    i = 0
+    while i < len(latex):
+        char = latex[i]
+        if char == "\\":
+            match = re.match(r"\\([a-zA-Z]+)", latex[i:])
+            if not match:
+                raise ValueError(f"unsupported {latex[i:i + 2]}")
+            name = match.group(1)
+            i += len(match.group(0))
+            if name in ("frac", "dfrac", "tfrac"):
+                top, i = _group(latex, i)
+                bottom, i = _group(latex, i)
+                out.append(f"(({latex_to_text(top)})/({latex_to_text(bottom)}))")
+            elif name == "sqrt":
+                if latex[i:i + 1] == "[":
+                    end = latex.index("]", i)
+                    degree = latex_to_text(latex[i + 1:end])
+                    body, i = _group(latex, end + 1)
+                    out.append(f"root({latex_to_text(body)}, {degree})")
+                else:
+                    body, i = _group(latex, i)
+                    out.append(f"sqrt({latex_to_text(body)})")
+            elif name in COMMANDS:
+                out.append(f" {COMMANDS[name]} ")
+            else:
+                raise ValueError(f"unsupported \\{name}")
+        elif char == "^":
+            power, i = _group(latex, i + 1)
+            out.append(f"**({latex_to_text(power)})")
+        elif char == "_":
+            # x_1, x_{2}: numbered roots are still x
+            _, i = _group(latex, i + 1)
+        elif char in "{}":
+            out.append("(" if char == "{" else ")")
+            i += 1
+        else:
+            out.append(char)
+            i += 1
+    return "".join(out)
+
+
+def statements(latex):
+    """
+    A step line as a list of statements, each a list of the parts between "=".
+    "\\pm" doubles the statements; a bare value after "x = 1, 2" reuses "x =".
+    """
+    latex = NOISE.sub(" ", latex)
+    latex = re.sub(r"\\text\s*\{([^}]*)\}", lambda m: m.group(0) if m.group(1).strip() in ("or", "and", ",") else " ", latex)
+    pieces = [p.strip() for p in SEPARATORS.split(latex) if p.strip()]
+
+    result = []
+    for piece in pieces:
+        for statement in _plus_minus(piece):
+            parts = [p.strip() for p in statement.split("=")]
+            if len(parts) == 1 and result and len(result[-1]) > 1:
+                parts = [result[-1][0]] + parts
+            result.append(parts)
+    return result
+
+
+def _plus_minus(piece):
+    # "x = \\frac{-5 \\pm 7}{4}" is two statements
+    found = [i for i in (piece.find("\\pm"), piece.find("\\mp")) if i >= 0]
+    if not found:
+        return [piece]
+    i = min(found)
+    head, tail = piece[:i], piece[i + 3:]
+    return _plus_minus(head + "+" + tail) + _plus_minus(head + "-" + tail)
+
+
+# --- 2. CHECKING A LINE AGAINST SymPy ---
+@lru_cache(maxsize=MEMO_SIZE)
+def target(intent):
+    # The verified answer the steps must arrive at
+    from sympy import solve, diff, integrate, simplify
+    exprs, names, bounds = compile_intent(intent)
+    expr = exprs[0]
+    if intent.operation == "derive":
+        return diff(expr, names[0], intent.order)
+    if intent.operation == "integrate":
+        return integrate(expr, (names[0], *bounds) if bounds else names[0])
+    if intent.operation in SAME_VALUE or not names:
+        return simplify(expr)
+    if len(exprs) > 1 or len(names) > 1:
+        return tuple(solve(list(exprs), list(names), dict=True))
+    return frozenset(real_roots(solve(expr, names[0])))
+
+
+def _read_part(part, intent):
+    # None = a label or notation we don't read ("f'(x)", "\\frac{dy}{dx}", "y")
+    if not part or UNREADABLE.search(part):
+        return None
+    exprs, names, _ = compile_intent(intent)
+    call = FUNCTION_CALL.match(part)
+    if call and len(names) == 1:
+        # f(3) in a factor-theorem line: the problem's own function at 3
+        return exprs[0].subs(names[0], parse(latex_to_text(call.group(2))))
+    expr = parse(latex_to_text(part))
+    if expr.is_Symbol and expr not in names:
+        return None
+    return expr
+
+
+def _same(a, b):
+    from sympy import simplify
+    try:
+        return a == b or simplify(a - b) == 0
+    except Exception:
+        return False
+
+
+def _pieces(expr):
+    # Every sum of the problem's terms: term-by-term working restates or differentiates these
+    from sympy import Add
+    from itertools import combinations
+    terms = Add.make_args(expr)
+    if len(terms) > 8:
+        return [expr]
+    return [Add(*combo) for size in range(1, len(terms) + 1) for combo in combinations(terms, size)]
+
+
+def _calculus(intent, lines, goal, final):
+    # Each part restates, differentiates or integrates some of the question's terms
+    from sympy import diff, integrate, Symbol
+    exprs, names, bounds = compile_intent(intent)
+    x = names[0]
+    name = "derivative" if intent.operation == "derive" else "integral"
+    pieces = _pieces(exprs[0])
+    constant = Symbol("C")
+    if bounds:
+        # [F(x)] from a to b: F(a), F(b) and their difference may appear on their own
+        antiderivative = integrate(exprs[0], x)
+        values = [goal] + [antiderivative.subs(x, b) for b in bounds]
+    for parts in lines:
+        for part in parts:
+            part = part.subs(constant, 0)
+            if part.free_symbols - {x}:
+                return UNCHECKED, f"uses symbols other than {x}"
+            if bounds and not part.free_symbols:
+                ok = any(_same(part, v) for v in values)
+            elif intent.operation == "derive":
+                ok = any(_same(part, diff(p, x, n)) for p in pieces for n in range(intent.order + 1))
+            else:
+                ok = any(_same(part, p) or _same(diff(part, x), p) for p in pieces)
+            if not ok:
+                return INVALID, f"{part} does not follow from the question"
+    if final and not any(_same(part.subs(constant, 0), goal) for part in lines[-1][-1:]):
+        return INVALID, f"the final answer should be the {name}"
+    return VALID, ""
+
+
+def _rewrites(lines, goal):
+    # Simplify / factorise / expand / arithmetic: every part is the same value in another form
+    for parts in lines:
+        for part in parts:
+            if not _same(part, goal):
+                return INVALID, f"{part} is not equal to the original expression"
+    return VALID, ""
+
+
+def _system(intent, lines, goal):
+    # Simultaneous equations: every statement must hold at the verified solution
+    exprs, names, _ = compile_intent(intent)
+    if not goal:
+        return UNCHECKED, "no single solution to check against"
+    for parts in lines:
+        if any(p.free_symbols - set(names) for p in parts):
+            return UNCHECKED, "uses symbols outside the system"
+        for left, right in zip(parts, parts[1:]):
+            if not all(_same((left - right).subs(solution), 0) for solution in goal):
+                return INVALID, f"{left} = {right} does not hold at the solution"
+    return VALID, ""
+
+
+def check_step(intent, latex, final=False):
+    """
+    (verdict, reason) for one $$ line of working for the problem `intent`.
+    A line may show part of the working (one root, one term's derivative);
+    final=True also demands the whole verified answer.
+    """
+    from sympy import solve
+    try:
+        lines = [[_read_part(p, intent) for p in parts] for parts in statements(latex)]
+    except Exception:
+        return UNCHECKED, "could not read this line"
+    lines = [[p for p in parts if p is not None] for parts in lines]
+    lines = [parts for parts in lines if parts]
+    if not lines:
+        return UNCHECKED, "nothing to check on this line"
+
+    goal = target(intent)
+    exprs, names, _ = compile_intent(intent)
+    if intent.operation in ("derive", "integrate"):
+        return _calculus(intent, lines, goal, final)
+    if intent.operation in SAME_VALUE or not names:
+        return _rewrites(lines, goal)
+    if len(exprs) > 1 or len(names) > 1:
+        return _system(intent, lines, goal)
+
+    # Equations: a line may show some of the roots, but never a wrong one
+    x = names[0]
+    roots = set()
+    for parts in lines:
+        if any(p.free_symbols - {x} for p in parts):
+            return UNCHECKED, f"uses symbols other than {x}"
+        for left, right in zip(parts, parts[1:]):
+            if x not in (left - right).free_symbols and not _same(left, right):
+                return INVALID, f"{left} is not equal to {right}"
+        if not any(x in p.free_symbols for p in parts):
+            continue  # arithmetic only (a discriminant, f(3) = 0): already checked above
+        equation = parts[0] - parts[1] if len(parts) > 1 else parts[0]
+        roots |= set(real_roots(solve(equation, x)))
+    extra = [r for r in roots if not any(_same(r, g) for g in goal)]
+    if extra:
+        return INVALID, f"{x} = {', '.join(str(r) for r in extra)} is not a solution"
+    if final and len(roots) < len(goal):
+        return INVALID, "the final line should give every solution"
+    return VALID, ""
+
+
+def checkable(math_context):
+    # Only an exact, verified SymPy result is something to check the steps against
+    return bool(math_context) and math_context.startswith(("Exact", "Calculated", "Simplified", "Factorised", "Expanded"))
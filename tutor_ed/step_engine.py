@@ -0,0 +1,253 @@
+from tutor_ed.math_engine import compile_intent, parse
+
+# Highest degree worked out with the factor theorem before handing over to the tutor
+MAX_DEGREE = 4
+STEPS_BUDGET = 3
+
+
+# Worked steps for the common CAPS problem types, straight from SymPy: each
+# function returns the $$ lines (LaTeX, without the $$) or None when the
+# problem isn't one it covers, in which case the tutor model writes them.
+def _or(items):
+    return r" \quad \text{or} \quad ".join(items)
+
+
+def _roots_line(roots, x):
+    # Grade 12 works in the reals: complex roots are not answers
+    from sympy import latex
+    roots = [r for r in roots if r.is_real]
+    return _or([f"{latex(x)} = {latex(r)}" for r in roots]) if roots else r"\text{no real roots}"
+
+
+def _product(factors, x, constant=1):
+    # "3(x - 2)(x + 2)", with repeated factors as powers: "x^{2}(x - 1)"
+    from sympy import latex
+    counts = {}
+    for f in factors:
+        counts[f] = counts.get(f, 0) + 1
+    shown = [latex(constant)] if constant != 1 else []
+    for f, power in counts.items():
+        base = latex(x) if f == x else rf"\left({latex(f)}\right)"
+        shown.append(base if power == 1 else f"{base}^{{{power}}}")
+    return " ".join(shown)
+
+
+def _factor_lines(factors, x):
+    # "(2x - 1)(x + 3) = 0" -> "2x - 1 = 0 or x + 3 = 0" -> "x = 1/2 or x = -3"
+    from sympy import latex, solve
+    roots = []
+    for factor in factors:
+        for root in solve(factor, x):
+            if root not in roots:
+                roots.append(root)
+    lines = []
+    distinct = list(dict.fromkeys(factors))
+    if len(distinct) > 1:
+        lines.append(_or([f"{latex(f)} = 0" for f in distinct]))
+    lines.append(_roots_line(roots, x))
+    return lines
+
+
+def _linear(poly, x):
+    from sympy import latex
+    a, b = poly.all_coeffs()
+    lines = []
+    if b != 0:
+        lines.append(f"{latex(a * x)} = {latex(-b)}")
+    if a != 1 or b == 0:
+        lines.append(f"{latex(x)} = {latex(-b / a)}")
+    return lines
+
+
+def _quadratic(poly, x, prefix=()):
+    # Factorise when the roots are rational, otherwise use the quadratic formula.
+    # prefix: factors already split off (the factor theorem on a cubic)
+    from sympy import factor_list, latex, sqrt, simplify
+    a, b, c = poly.all_coeffs()
+    constant, factors = factor_list(poly.as_expr())
+    linear = [f for f, power in factors for _ in range(power)]
+    if all(f.as_poly(x).degree() == 1 for f in linear):
+        return [f"{_product(list(prefix) + linear, x, constant)} = 0"] + _factor_lines(list(prefix) + linear, x)
+
+    known = []
+    for f in prefix:
+        known += _factor_lines([f], x)[-1:]
+    discriminant = b ** 2 - 4 * a * c
+    v = latex(x)
+    formula = [
+        rf"{v} = \frac{{-b \pm \sqrt{{b^2 - 4ac}}}}{{2a}}",
+        rf"{v} = \frac{{-({latex(b)}) \pm \sqrt{{({latex(b)})^2 - 4({latex(a)})({latex(c)})}}}}{{2({latex(a)})}}",
+        rf"{v} = \frac{{{latex(-b)} \pm \sqrt{{{latex(discriminant)}}}}}{{{latex(2 * a)}}}",
+    ]
+    if discriminant < 0:
+        # The square root of a negative number: stop at the substitution
+        formula.append(rf"{latex(discriminant)} < 0 \therefore \text{{no real roots}}")
+        return formula + ([_or(known)] if known else [])
+    roots = [simplify((-b + sign * sqrt(discriminant)) / (2 * a)) for sign in (1, -1)]
+    if known:
+        return formula + [_or(known + [_roots_line(roots, x)])]
+    return formula + [_roots_line(roots, x)]
+
+
+def _rational_root(poly):
+    from sympy import Rational, divisors
+    coeffs = poly.all_coeffs()
+    lead, const = coeffs[0], coeffs[-1]
+    if const == 0:
+        return Rational(0)
+    candidates = sorted({Rational(sign * p, q) for p in divisors(abs(int(const))) for q in divisors(abs(int(lead)))
+                         for sign in (1, -1)}, key=lambda r: (r.q != 1, abs(r), r.is_negative))
+    for candidate in candidates:
+        if poly.eval(candidate) == 0:
+            return candidate
+    return None
+
+
+def _synthetic_division(poly, root):
+    # The tableau students draw: root | coefficients, the carried products, the quotient and remainder
+    from sympy import latex
+    coeffs = poly.all_coeffs()
+    carried, row = [], [coeffs[0]]
+    for c in coeffs[1:]:
+        carried.append(row[-1] * root)
+        row.append(c + carried[-1])
+    columns = "r" * len(coeffs)
+    cells = lambda values: " & ".join(latex(v) for v in values)
+    return (rf"\begin{{array}}{{r|{columns}}} {latex(root)} & {cells(coeffs)} \\ "
+            rf"& & {cells(carried)} \\ \hline & {cells(row)} \end{{array}}")
+
+
+def _substituted(poly, value):
+    # "2(3)^{3} - 3(3)^{2} - 11(3) + 6": the factor theorem written out
+    from sympy import latex
+    terms = []
+    for i, c in enumerate(poly.all_coeffs()):
+        if c == 0:
+            continue
+        power = poly.degree() - i
+        sign = "-" if c < 0 else ("+" if terms else "")
+        size = "" if abs(c) == 1 and power else latex(abs(c))
+        base = "" if power == 0 else f"({latex(value)})" + (f"^{{{power}}}" if power > 1 else "")
+        terms.append(f"{sign} {size}{base}".strip())
+    return " ".join(terms)
+
+
+def _common_power(poly, x):
+    # x^k in every term ("x^3 - 4x"): taken out first, so x = 0 isn't found by trial division
+    from sympy import Poly
+    power = min(monom[0] for monom in poly.monoms())
+    return power, poly.quo(Poly(x ** power, x)) if power else poly
+
+
+def _by_factor_theorem(poly, x, prefix=()):
+    from sympy import latex, Poly, div
+    lines = []
+    prefix = list(prefix)
+    while poly.degree() > 2:
+        root = _rational_root(poly)
+        if root is None:
+            return None
+        lines.append(f"f({latex(root)}) = {_substituted(poly, root)} = 0")
+        lines.append(_synthetic_division(poly, root))
+        factor = x - root if root.q == 1 else root.q * x - root.p
+        quotient, _ = div(poly, Poly(factor, x))
+        prefix.append(factor)
+        lines.append(f"{_product(prefix + [quotient.as_expr()], x)} = 0")
+        poly = quotient
+    if poly.degree() == 2:
+        return lines + _quadratic(poly, x, prefix)
+    return lines + _factor_lines(prefix + [poly.as_expr()], x)
+
+
+def _typed(intent):
+    # The equation as the student wrote it: intent.py stored it as "(lhs) - (rhs)"
+    from sympy import latex
+    text = intent.expressions[0]
+    if not intent.equation or not text.startswith("("):
+        return None
+    depth = 0
+    for i, char in enumerate(text):
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        if depth == 0:
+            break
+    if not (text[i:].startswith(") - (") and text.endswith(")")):
+        return None
+    return f"{latex(parse(text[1:i]))} = {latex(parse(text[i + 5:-1]))}"
+
+
+def solve_steps(intent):
+    from sympy import latex, Poly, PolynomialError, expand
+    exprs, names, _ = compile_intent(intent)
+    if len(exprs) != 1 or len(names) != 1:
+        return None  # systems go to the tutor
+    expr, x = exprs[0], names[0]
+    if expr.free_symbols != {x}:
+        return None
+    try:
+        poly = Poly(expand(expr), x)
+    except PolynomialError:
+        return None
+    if not poly.domain.is_QQ and not poly.domain.is_ZZ or not 1 <= poly.degree() <= MAX_DEGREE:
+        return None
+    # Whole-number coefficients read like an exam paper
+    _, poly = poly.clear_denoms(convert=True)
+    if poly.LC() < 0:
+        poly = -poly
+
+    lines = [f"{latex(poly.as_expr())} = 0"]
+    typed = _typed(intent)
+    if typed is not None and typed != lines[0]:
+        lines.insert(0, typed)                         # 2y + 3 = 7, then 2y - 4 = 0
+    power, poly = _common_power(poly, x)
+    prefix = [x] * power
+    if poly.degree() == 0:
+        return lines + _factor_lines(prefix, x)       # x^3 = 0
+    if prefix:
+        lines.append(f"{_product(prefix + [poly.as_expr()], x)} = 0")
+    if poly.degree() == 1:
+        return lines + (_factor_lines(prefix + [poly.as_expr()], x) if prefix else _linear(poly, x))
+    if poly.degree() == 2:
+        return lines + _quadratic(poly, x, prefix)
+    rest = _by_factor_theorem(poly, x, prefix)
+    return lines + rest if rest is not None else None
+
+
+def derive_steps(intent):
+    # Power rule, term by term: c x^n -> c n x^(n-1)
+    from sympy import Add, diff, latex, Symbol
+    exprs, names, _ = compile_intent(intent)
+    x = names[0] if names else Symbol('x')
+    expr = exprs[0]
+    if intent.order != 1 or not expr.free_symbols <= {x}:
+        return None
+    terms = []
+    for term in Add.make_args(expr):
+        coeff, power = term.as_coeff_exponent(x)
+        if coeff.has(x) or power.has(x) or term != coeff * x ** power:
+            return None
+        terms.append((power, coeff))
+
+    working = []
+    for power, coeff in sorted(terms, key=lambda t: -t[0]):
+        if power == 0:
+            continue  # constants drop out
+        shown = f"({latex(power)})" if power < 0 else latex(power)
+        factor = latex(power) if coeff == 1 else rf"{latex(coeff)} \cdot {shown}"
+        rest = "" if power == 1 else f" {latex(x)}" if power == 2 else f" {latex(x)}^{{{latex(power - 1)}}}"
+        working.append(f"({factor}){rest}" if coeff < 0 or power < 0 else f"{factor}{rest}")
+    result = diff(expr, x)
+    v = latex(x)
+    return [
+        f"f({v}) = {latex(expr)}",
+        f"f'({v}) = " + (" + ".join(working) or "0"),
+        f"f'({v}) = {latex(result)}",
+    ]
+
+
+STEP_BUILDERS = {"solve": solve_steps, "answer": solve_steps, "derive": derive_steps}
+
+
+def worked_steps(intent):
+    builder = STEP_BUILDERS.get(intent.operation)
+    return builder(intent) if builder is not None else None
+
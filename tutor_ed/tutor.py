@@ -0,0 +1,187 @@
+from contextlib import nullcontext
+
+from tutor_ed.cache import make_key, replay_stream
+from tutor_ed.formulas import FORMULA_RESULT
+from tutor_ed.intent import read_query
+from tutor_ed.math_engine import run_inline
+from tutor_ed.metrics import metrics
+from tutor_ed.models import KEEP_ALIVE, TUTOR_MODEL, registry
+from tutor_ed.prompts import TUTOR_MEMO, TUTOR_SCIENCE
+from tutor_ed.step_check import CHECK_BUDGET, INVALID, MAX_REPAIRS, STEP, UNCHECKED, VALID, checkable
+from tutor_ed.step_engine import STEPS_BUDGET
+
+
+def cache_as_it_streams(stream, key, cache):
+    # Passes chunks straight through; only a fully finished answer is stored
+    parts = []
+    for chunk in stream:
+        parts.append(chunk['message']['content'])
+        yield chunk
+    if cache is not None:
+        cache.put(key, "".join(parts))
+
+def scheduled_stream(messages, key, session_id, on_wait, cache=None, scheduler=None, client=None,
+                     operation="tutor_steps"):
+    # Waits its turn in the shared queue; the slot is held until the answer has finished streaming
+    # (scheduler=None calls the server directly, like the batch marker does)
+    slot = scheduler.slot(session_id, on_wait) if scheduler is not None else nullcontext()
+    with slot as ticket:
+        if client is None:
+            import ollama as client  # deferred: a cache hit (or a page view) never needs the client
+
+        stream = metrics.chat(
+            client,
+            operation,
+            queue_wait=ticket.waited if ticket is not None else None,
+            model=TUTOR_MODEL,
+            messages=messages,
+            stream=True,
+            keep_alive=KEEP_ALIVE
+        )
+        yield from cache_as_it_streams(stream, key, cache)
+
+def _prompts(subject, topic, math_context):
+    # LOGIC: If we have a verified answer, force "Marking Memo" mode
+    if math_context and "ERROR" not in math_context:
+        return TUTOR_MEMO, TUTOR_MEMO.user_turn(topic=topic, math_context=math_context)
+    return TUTOR_SCIENCE, TUTOR_SCIENCE.user_turn(subject=subject, topic=topic)
+
+def ask_tutor_stream(subject, topic, math_context=None, session_id="default", on_wait=None,
+                     cache=None, scheduler=None, client=None, continuation=None):
+    """
+    Step-by-step working for a science problem, as a stream of ollama chat chunks.
+    Returns a plain string instead when the model can't be used.
+    continuation: extra turns after the question (used to resume from a wrong step).
+    """
+
+    template, user_prompt = _prompts(subject, topic, math_context)
+
+    # Whole class typed the same textbook problem? Replay the stored answer.
+    key = make_key(TUTOR_MODEL, template.system, user_prompt, {"continuation": continuation} if continuation else None)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        return replay_stream(cached)
+
+    # Check if model exists (cached probe, not a round trip per question)
+    problem = registry.problem(TUTOR_MODEL)
+    if problem:
+        return problem
+
+    messages = [{'role': 'system', 'content': template.system},
+                {'role': 'user', 'content': user_prompt}] + (continuation or [])
+    return scheduled_stream(messages, key, session_id, on_wait, cache, scheduler, client, operation=template.name)
+
+def engine_steps(topic, math_context, run=run_inline):
+    # Worked steps straight from SymPy (tutor_ed/step_engine.py) or the formula catalog
+    # (tutor_ed/formulas.py), or None
+    formula = bool(math_context) and math_context.startswith(FORMULA_RESULT)
+    if not formula and not checkable(math_context):
+        return None
+    try:
+        if formula:
+            answer, seconds = run("formula", (topic,), STEPS_BUDGET)
+            lines = list(answer.lines) if answer is not None else None
+        else:
+            lines, seconds = run("steps", (read_query(topic),), STEPS_BUDGET)
+    except Exception:
+        return None
+    metrics.record("sympy", "steps", seconds, ok=lines is not None)
+    return lines
+
+def ask_tutor_checked(subject, topic, math_context=None, run=run_inline, max_repairs=MAX_REPAIRS, **options):
+    """
+    ask_tutor_stream with every $$ line checked against SymPy as it arrives.
+    Yields events instead of chunks:
+        ("text", raw)                   words between steps
+        ("step", raw, verdict, reason)  one $$ line and its check (verdict None = nothing to check against)
+        ("partial", raw)                the unfinished tail, for live display
+        ("repair", keep, reason)        a step was wrong: keep the first `keep` items, the rest is regenerated
+    Returns a plain string instead when the model can't be used.
+    Problem types the step engine covers are worked by SymPy alone, with no model call.
+    """
+    lines = engine_steps(topic, math_context, run)
+    if lines:
+        return iter([("step", f"$$ {line} $$", VALID, "") for line in lines])
+    stream = ask_tutor_stream(subject, topic, math_context, **options)
+    if isinstance(stream, str):
+        return stream
+    return _checked_events(stream, subject, topic, math_context, run, max_repairs, options)
+
+def _checked_events(stream, subject, topic, math_context, run, max_repairs, options):
+    intent = read_query(topic)
+    check = checkable(math_context)
+
+    def verdict(latex, final=False):
+        if not check:
+            return None, ""
+        try:
+            (result, reason), _ = run("check", (intent, latex, final), CHECK_BUDGET)
+            return result, reason
+        except Exception:
+            return UNCHECKED, "the check ran out of time"
+
+    items = []  # raw text of everything accepted so far, one entry per event
+    steps = []  # indexes into items of the $$ lines
+    repairs = 0
+    while True:
+        buffer = ""
+        wrong = None
+        try:
+            for chunk in stream:
+                buffer += chunk['message']['content']
+                match = STEP.search(buffer)
+                while match and wrong is None:
+                    before, raw = buffer[:match.start()], match.group(0)
+                    buffer = buffer[match.end():]
+                    if before.strip():
+                        items.append(before)
+                        yield "text", before
+                    result, reason = verdict(match.group(1))
+                    if result == INVALID and repairs < max_repairs:
+                        # Stop here: everything after a wrong step is built on it
+                        wrong = (len(items), raw, reason)
+                    else:
+                        steps.append(len(items))
+                        items.append(raw)
+                        yield "step", raw, result, reason
+                        match = STEP.search(buffer)
+                if wrong is not None:
+                    break
+                yield "partial", buffer
+        finally:
+            stream.close()
+
+        if wrong is None and check and steps and repairs < max_repairs:
+            # The last line has to carry the whole verified answer
+            result, reason = verdict(STEP.match(items[steps[-1]]).group(1), final=True)
+            if result == INVALID:
+                wrong = (steps[-1], items[steps[-1]], reason)
+                del items[steps.pop():]
+        if wrong is None:
+            if buffer.strip():
+                items.append(buffer)
+                yield "text", buffer
+            break
+
+        # Re-prompt from the wrong step only; the correct prefix is kept as the model's own words
+        keep, raw, reason = wrong
+        repairs += 1
+        yield "repair", keep, reason
+        step_number = sum(1 for i in steps if i < keep) + 1
+        continuation = [
+            {'role': 'assistant', 'content': "\n".join(items[:keep] + [raw])},
+            {'role': 'user', 'content': f"Step {step_number} is wrong: {raw} ({reason}). Continue from step "
+                                        f"{step_number}: write it correctly and finish the solution in the same "
+                                        f"$$ format. Do not repeat the earlier steps."},
+        ]
+        stream = ask_tutor_stream(subject, topic, math_context, continuation=continuation, **options)
+        if isinstance(stream, str):
+            items.append(stream)
+            yield "text", stream
+            return
+
+    cache = options.get("cache")
+    if repairs and cache is not None:
+        # Next student with this problem gets the repaired answer straight away
+        template, user_prompt = _prompts(subject, topic, math_context)
+        cache.put(make_key(TUTOR_MODEL, template.system, user_prompt), "\n".join(items))